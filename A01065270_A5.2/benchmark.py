@@ -0,0 +1,386 @@
+"""
+benchmark.py
+
+Benchmark and load harness for computeSales.py.
+
+The harness generates synthetic `ProductList.json` / `Sales.json` pairs and
+times the pipeline of computeSales.py as separate stages:
+
+- load: read the price catalogue (through `catalogue_cache`) and the sales
+  record,
+- aggregate: aggregate quantities per product (optionally sharded),
+- price: price the aggregated quantities with a money engine,
+- write: write a `Results.txt` file.
+
+Every combination of catalogue size, number of sales lines, money engine,
+shard worker count and catalogue caching is run `--repeat` times, and the
+results are written as JSON so runs can be compared across engines and
+commits.
+
+Synthetic data:
+    Catalogue titles are "Product <n>" with prices of two decimals. Sales
+    pick products with Zipfian popularity (exponent `--zipf`, 0 for
+    uniform), and a `--invalid-ratio` share of the lines names a product
+    missing from the catalogue. Sales are generated and written
+    `--chunk-lines` lines at a time, and files are reused by later runs
+    with the same parameters.
+
+Scale:
+    Sales files of up to `--chunk-lines` lines are loaded whole with
+    `computeSales.load_json`, like computeSales.py does. Longer files are
+    read, parsed and aggregated one chunk at a time (their "load" and
+    "aggregate" stages add up the time of every chunk), so memory use is
+    bounded by the chunk size and 100M-line files can be priced; such a
+    file takes about 8 GB of disk.
+
+Usage:
+    python benchmark.py [--catalogue-sizes N ...] [--sales-lines N ...]
+                        [--invalid-ratio R] [--zipf S] [--money ENGINE ...]
+                        [--shard-workers N ...] [--shard-size N]
+                        [--chunk-lines N] [--compiled-catalogues]
+                        [--repeat N] [--seed N] [--work-dir DIR]
+                        [--output FILE]
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import time
+
+import computeSales as sales
+from catalogue_cache import clear_memory_cache, load_price_catalogue
+from money import ENGINES, get_engine
+
+WORK_DIR = os.path.join("cache", "benchmark")
+OUTPUT_FILE = os.path.join("results", "benchmark.json")
+STAGES = ("load", "aggregate", "price", "write")
+CHUNK_LINES = 1_000_000
+
+
+def zipf_weights(size, exponent):
+    """Return cumulative Zipf weights for ranks 1..size."""
+    return list(itertools.accumulate(
+        1.0 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+def write_json_array(path, items):
+    """Stream an iterable of JSON-serializable items as a JSON array."""
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("[")
+        for index, item in enumerate(items):
+            file.write(",\n" if index else "\n")
+            json.dump(item, file)
+        file.write("\n]\n")
+
+
+def iter_sales_chunks(sales_file, chunk_lines=CHUNK_LINES):
+    """
+    Yield the entries of a generated sales file in lists of up to
+    `chunk_lines` entries.
+
+    Generated files hold one entry per line, between a "[" line and a
+    "]" line, so they can be parsed a chunk of lines at a time.
+    """
+    with open(sales_file, "r", encoding="utf-8") as file:
+        while True:
+            lines = list(itertools.islice(file, chunk_lines))
+            if not lines:
+                return
+            text = "".join(lines).strip().removeprefix("[")
+            text = text.removesuffix("]").strip().removesuffix(",")
+            if text:
+                yield json.loads("[" + text + "]")
+
+
+def generate_case(directory, catalogue_size, sales_lines, invalid_ratio,
+                  zipf, seed, chunk_lines=CHUNK_LINES):
+    """
+    Generate (or reuse) one synthetic test case.
+
+    Sales lines are drawn and written `chunk_lines` at a time: products
+    with one `random.choices` call per chunk, and exactly
+    `invalid_ratio` of each chunk's lines at random positions name
+    unknown products.
+
+    Returns:
+        tuple: (product_file, sales_file) paths.
+    """
+    name = (
+        f"C{catalogue_size}_S{sales_lines}_I{invalid_ratio}"
+        f"_Z{zipf}_R{seed}"
+    )
+    case_dir = os.path.join(directory, name)
+    product_file = os.path.join(case_dir, f"{name}.ProductList.json")
+    sales_file = os.path.join(case_dir, f"{name}.Sales.json")
+    if os.path.exists(product_file) and os.path.exists(sales_file):
+        return product_file, sales_file
+
+    os.makedirs(case_dir, exist_ok=True)
+    rng = random.Random(seed)
+    titles = [f"Product {index}" for index in range(catalogue_size)]
+    write_json_array(product_file, (
+        {"title": title, "price": round(rng.uniform(0.5, 100.0), 2)}
+        for title in titles
+    ))
+
+    cum_weights = zipf_weights(catalogue_size, zipf)
+    quantities = range(1, 11)
+
+    temp_file = f"{sales_file}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as file:
+        file.write("[\n")
+        for start in range(0, sales_lines, chunk_lines):
+            count = min(chunk_lines, sales_lines - start)
+            products = rng.choices(titles, cum_weights=cum_weights, k=count)
+            invalid = rng.sample(range(count), round(count * invalid_ratio))
+            for index in invalid:
+                products[index] = (
+                    f"Unknown product {rng.randrange(catalogue_size)}"
+                )
+            # Titles are plain ASCII, so entries are formatted directly
+            # instead of through json.dumps.
+            file.write(",\n".join(
+                f'{{"SALE_ID": {line // 4 + 1}, '
+                f'"SALE_Date": "{line % 28 + 1:02d}/01/24", '
+                f'"Product": "{product}", "Quantity": {quantity}}}'
+                for line, product, quantity in zip(
+                    range(start, start + count), products,
+                    rng.choices(quantities, k=count),
+                )
+            ))
+            file.write(",\n" if start + count < sales_lines else "\n")
+        file.write("]\n")
+    os.replace(temp_file, sales_file)
+    return product_file, sales_file
+
+
+def load_and_aggregate(sales_file, sales_lines, shard_workers, shard_size,
+                       chunk_lines, timings):
+    """
+    Load and aggregate a sales file, adding the seconds spent on each to
+    `timings["load"]` and `timings["aggregate"]`.
+
+    Files longer than `chunk_lines` are processed chunk by chunk and the
+    partial quantities merged, as sharded aggregation does.
+
+    Returns:
+        dict: Product title -> total quantity.
+    """
+    if sales_lines <= chunk_lines:
+        start = time.perf_counter()
+        chunks = iter([sales.load_json(sales_file)])
+        timings["load"] += time.perf_counter() - start
+    else:
+        chunks = iter_sales_chunks(sales_file, chunk_lines)
+
+    partials = []
+    while True:
+        start = time.perf_counter()
+        sales_record = next(chunks, None)
+        timings["load"] += time.perf_counter() - start
+        if sales_record is None:
+            break
+        start = time.perf_counter()
+        partials.append(sales.aggregate_sharded(
+            sales_record, shard_workers, shard_size
+        ))
+        timings["aggregate"] += time.perf_counter() - start
+
+    if len(partials) == 1:
+        return partials[0]
+    start = time.perf_counter()
+    aggregated_sales = sales.merge_quantities(partials)
+    timings["aggregate"] += time.perf_counter() - start
+    return aggregated_sales
+
+
+def run_once(product_file, sales_file, output_dir, money, shard_workers,
+             compiled, shard_size=sales.SHARD_SIZE, sales_lines=0,
+             chunk_lines=CHUNK_LINES):
+    """
+    Run the computeSales pipeline once on a generated case.
+
+    Returns:
+        dict: Seconds spent in each stage and the formatted total.
+    """
+    timings = {"load": 0.0, "aggregate": 0.0}
+    clear_memory_cache()
+
+    start = time.perf_counter()
+    price_catalogue = load_price_catalogue(
+        product_file, compiled=compiled, money=money
+    )
+    timings["load"] += time.perf_counter() - start
+
+    aggregated_sales = load_and_aggregate(
+        sales_file, sales_lines, shard_workers, shard_size, chunk_lines,
+        timings,
+    )
+
+    start = time.perf_counter()
+    total_cost, invalid_entries = sales.price_quantities(
+        price_catalogue, aggregated_sales, money
+    )
+    total = get_engine(money).format(total_cost)
+    timings["price"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sales.write_results(
+        [f"BENCH\t{total}"], [f"BENCH\t{sum(timings.values()):.4f}"],
+        os.path.join(output_dir, "Results.txt"),
+        os.path.join(output_dir, "Timings.txt"),
+    )
+    timings["write"] = time.perf_counter() - start
+
+    return {
+        "stages": timings,
+        "total": total,
+        "invalid_products": len(invalid_entries),
+    }
+
+
+def run_benchmarks(args):
+    """Run every configured combination and return the result records."""
+    records = []
+    data_dir = os.path.join(args.work_dir, "data")
+    output_dir = os.path.join(args.work_dir, "results")
+
+    for catalogue_size, sales_lines in itertools.product(
+        args.catalogue_sizes, args.sales_lines
+    ):
+        start = time.perf_counter()
+        product_file, sales_file = generate_case(
+            data_dir, catalogue_size, sales_lines, args.invalid_ratio,
+            args.zipf, args.seed, args.chunk_lines
+        )
+        print(
+            f"Data C={catalogue_size} S={sales_lines} ready in "
+            f"{time.perf_counter() - start:.2f}s"
+        )
+
+        for money, shard_workers, compiled in itertools.product(
+            args.money, args.shard_workers,
+            (False, True) if args.compiled_catalogues else (False,)
+        ):
+            runs = [
+                run_once(
+                    product_file, sales_file, output_dir, money,
+                    shard_workers, compiled, args.shard_size, sales_lines,
+                    args.chunk_lines
+                )
+                for _ in range(args.repeat)
+            ]
+            record = {
+                "catalogue_size": catalogue_size,
+                "sales_lines": sales_lines,
+                "invalid_ratio": args.invalid_ratio,
+                "zipf": args.zipf,
+                "money": money,
+                "shard_workers": shard_workers,
+                "shard_size": args.shard_size,
+                "chunk_lines": args.chunk_lines,
+                "compiled_catalogues": compiled,
+                "total": runs[-1]["total"],
+                "invalid_products": runs[-1]["invalid_products"],
+                "stages": {
+                    stage: {
+                        "min": min(run["stages"][stage] for run in runs),
+                        "runs": [run["stages"][stage] for run in runs],
+                    }
+                    for stage in STAGES
+                },
+            }
+            records.append(record)
+            print(
+                f"  money={money} shards={shard_workers} "
+                f"compiled={compiled}: " + " ".join(
+                    f"{stage}={record['stages'][stage]['min']:.4f}s"
+                    for stage in STAGES
+                )
+            )
+    return records
+
+
+def parse_args():
+    """Parse the command line options."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark computeSales.py on synthetic data."
+    )
+    parser.add_argument(
+        "--catalogue-sizes", type=int, nargs="+", default=[10, 1000],
+        help="Catalogue sizes to generate (e.g. 10 1000 1000000)."
+    )
+    parser.add_argument(
+        "--sales-lines", type=int, nargs="+", default=[1000, 100_000],
+        help="Sales file lengths to generate (up to 100000000)."
+    )
+    parser.add_argument(
+        "--invalid-ratio", type=float, default=0.01,
+        help="Share of sales lines naming unknown products."
+    )
+    parser.add_argument(
+        "--zipf", type=float, default=1.1,
+        help="Zipf exponent of product popularity (0 is uniform)."
+    )
+    parser.add_argument(
+        "--money", nargs="+", choices=sorted(ENGINES),
+        default=sorted(ENGINES), help="Money engines to compare."
+    )
+    parser.add_argument(
+        "--shard-workers", type=int, nargs="+", default=[1],
+        help="Shard worker counts to compare."
+    )
+    parser.add_argument(
+        "--shard-size", type=int, default=sales.SHARD_SIZE,
+        help="Sales entries per shard when sharding."
+    )
+    parser.add_argument(
+        "--chunk-lines", type=int, default=CHUNK_LINES,
+        help="Sales lines generated, and loaded for longer files, at a"
+             f" time (default: {CHUNK_LINES})."
+    )
+    parser.add_argument(
+        "--compiled-catalogues", action="store_true",
+        help="Also run every combination with compiled catalogues."
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=WORK_DIR)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    if min(args.catalogue_sizes + args.sales_lines) < 1:
+        parser.error("Sizes must be positive integers.")
+    if not 0 <= args.invalid_ratio <= 1:
+        parser.error("--invalid-ratio must be between 0 and 1.")
+    if min(args.shard_workers) < 1 or min(
+        args.shard_size, args.chunk_lines, args.repeat
+    ) < 1:
+        parser.error(
+            "--shard-workers, --shard-size, --chunk-lines and --repeat"
+            " must be positive."
+        )
+    return args
+
+
+def main():
+    """Run the benchmarks and write the machine-readable results."""
+    args = parse_args()
+    records = run_benchmarks(args)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "results": records,
+        }, file, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
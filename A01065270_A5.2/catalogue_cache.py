@@ -0,0 +1,215 @@
+"""
+catalogue_cache.py
+
+Content-addressed cache for the price catalogues used by computeSales.py.
+
+Test cases frequently ship byte-identical `ProductList.json` files, so the
+catalogue is keyed by the SHA-256 of the file contents:
+
+- Within a run, each distinct catalogue is parsed once and kept in memory.
+- Optionally, the catalogue is also compiled into a small binary file
+  (`cache/catalogues/<sha256>.<engine>.pcat`) that later runs memory-map
+  instead of parsing the JSON again.
+
+Prices are stored in the representation of the money engine in use (see
+`money.py`): float64 for "float", int64 minor units for "cents".
+
+Compiled layout (native byte order, recorded in the header):
+    magic       8 bytes   b"PCAT0002"
+    byteorder   8 bytes   b"little\\0\\0" or b"big\\0\\0\\0\\0\\0"
+    count       uint64    number of distinct titles
+    typecode    1 byte    `array` typecode of the prices, b"d" or b"q"
+    padding     7 bytes
+    offsets     uint64 * (count + 1)   title boundaries in the title blob
+    prices      8 bytes * count        price of each title
+    titles      UTF-8 blob, titles sorted by their encoded bytes
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+from money import get_engine, parse_product_list
+
+CACHE_DIR = os.path.join("cache", "catalogues")
+MAGIC = b"PCAT0002"
+HEADER = struct.Struct("=8s8sQc7x")
+
+_memory_cache = {}
+
+
+def content_hash(data):
+    """Return the hex SHA-256 digest used as the catalogue cache key."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def clear_memory_cache():
+    """Forget the catalogues parsed by this process."""
+    _memory_cache.clear()
+
+
+def build_catalogue(price_catalogue_list, parse_price=float):
+    """Convert a product list into a title -> price dictionary."""
+    return {
+        item["title"]: parse_price(item["price"])
+        for item in price_catalogue_list
+    }
+
+
+def compile_catalogue(price_catalogue, path, typecode="d"):
+    """
+    Write a price catalogue to `path` in the compiled binary layout.
+
+    `typecode` is the `array` typecode the prices are stored with.
+
+    The file is written to a temporary name and renamed into place, so
+    concurrent workers never observe a partially written catalogue.
+    """
+    entries = sorted(
+        (title.encode("utf-8"), price)
+        for title, price in price_catalogue.items()
+    )
+    offsets = array("Q", [0])
+    for title, _ in entries:
+        offsets.append(offsets[-1] + len(title))
+    prices = array(typecode, [price for _, price in entries])
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(
+            MAGIC, sys.byteorder.encode("ascii"), len(entries),
+            typecode.encode("ascii")
+        ))
+        file.write(offsets.tobytes())
+        file.write(prices.tobytes())
+        file.write(b"".join(title for title, _ in entries))
+    os.replace(temp_path, path)
+
+
+class CompiledCatalogue(Mapping):
+    """
+    Read-only, memory-mapped view of a compiled price catalogue.
+
+    Lookups binary-search the sorted title table, so opening a catalogue
+    costs a single `mmap` no matter how many products it lists.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, byteorder, count, typecode = HEADER.unpack_from(self._mmap)
+        byteorder = byteorder.rstrip(b"\0").decode("ascii")
+        if magic != MAGIC or byteorder != sys.byteorder:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a compatible compiled catalogue")
+
+        view = memoryview(self._mmap)
+        start = HEADER.size
+        self._offsets = view[start:start + 8 * (count + 1)].cast("Q")
+        start += 8 * (count + 1)
+        self._prices = view[start:start + 8 * count].cast(
+            typecode.decode("ascii")
+        )
+        self._titles = start + 8 * count
+        self._count = count
+
+    def _title_at(self, index):
+        """Return the encoded title stored at `index`."""
+        return self._mmap[
+            self._titles + self._offsets[index]:
+            self._titles + self._offsets[index + 1]
+        ]
+
+    def _find(self, title):
+        """Return the table index of `title`, or -1 if it is not listed."""
+        if not isinstance(title, str):
+            return -1
+        key = title.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._title_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._title_at(low) == key:
+            return low
+        return -1
+
+    def __getitem__(self, title):
+        index = self._find(title)
+        if index < 0:
+            raise KeyError(title)
+        return self._prices[index]
+
+    def __contains__(self, title):
+        return self._find(title) >= 0
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self._title_at(index).decode("utf-8")
+
+    def __len__(self):
+        return self._count
+
+
+def load_price_catalogue(product_file, compiled=False, cache_dir=CACHE_DIR,
+                         money="cents"):
+    """
+    Load the price catalogue in `product_file`, reusing cached copies.
+
+    Args:
+        product_file (str): Path to a `ProductList.json` file.
+        compiled (bool): Also look up / store the compiled binary form in
+            `cache_dir`, so identical catalogues load without parsing in
+            later runs.
+        cache_dir (str): Directory holding compiled catalogues.
+        money (str): Name of the money engine whose price representation
+            the catalogue should use.
+
+    Returns:
+        Mapping: Product title -> price, or None if the file can't be read.
+    """
+    try:
+        with open(product_file, "rb") as file:
+            data = file.read()
+    except OSError as e:
+        print(f"Error loading file {product_file}: {e}")
+        return None
+
+    engine = get_engine(money)
+    digest = content_hash(data)
+    if (digest, engine.name) in _memory_cache:
+        return _memory_cache[digest, engine.name]
+
+    compiled_path = os.path.join(cache_dir, f"{digest}.{engine.name}.pcat")
+    if compiled and os.path.exists(compiled_path):
+        try:
+            catalogue = CompiledCatalogue(compiled_path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Ignoring compiled catalogue {compiled_path}: {e}")
+        else:
+            _memory_cache[digest, engine.name] = catalogue
+            return catalogue
+
+    try:
+        catalogue = build_catalogue(
+            parse_product_list(data.decode("utf-8")), engine.parse_price
+        )
+    except (UnicodeDecodeError, ValueError) as e:
+        print(f"Error loading file {product_file}: {e}")
+        return None
+
+    if compiled:
+        try:
+            compile_catalogue(catalogue, compiled_path, engine.typecode)
+        except (OSError, OverflowError, TypeError) as e:
+            print(f"Could not compile catalogue {compiled_path}: {e}")
+
+    _memory_cache[digest, engine.name] = catalogue
+    return catalogue
@@ -0,0 +1,152 @@
+"""
+checkpoints.py
+
+Checkpoint store for incremental runs of computeSales.py.
+
+For every test case a small JSON checkpoint (`results/checkpoints/<TC>.json`)
+records:
+
+- a fingerprint (size and mtime) of the product list and sales files,
+- how far the sales array has been consumed: the byte offset just after
+  the last aggregated record, the SHA-256 of the bytes up to that offset
+  and the number of records,
+- the aggregated quantity per product,
+- the formatted totals already computed for that catalogue, per money
+  engine, and the rows of the fuzzy-match report (see `fuzzy_match.py`)
+  per match distance.
+
+On the next run an unchanged case is answered from its checkpoint without
+reading any JSON. If records were appended to the sales array, the stored
+prefix still hashes to the same digest and only the bytes after it are
+parsed and folded into the stored quantities.
+"""
+import hashlib
+import json
+import os
+import re
+
+CHECKPOINT_DIR = os.path.join("results", "checkpoints")
+VERSION = 1
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+def file_fingerprint(path):
+    """Return the (size, mtime_ns) fingerprint of a file."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def iter_json_array(text, pos=0, resume=False):
+    """
+    Incrementally decode the elements of a JSON array.
+
+    Args:
+        text (str): The document, or the tail of it starting at `pos`.
+        pos (int): Offset to start decoding from.
+        resume (bool): When True, `pos` points just after an element that
+            was already consumed, so a "," or the closing "]" is expected
+            instead of the opening "[".
+
+    Yields:
+        tuple: (element, end), where `end` is the offset just after the
+        element.
+
+    Raises:
+        ValueError: If the text is not a well-formed JSON array.
+    """
+    pos = _WHITESPACE.match(text, pos).end()
+    if not resume:
+        if not text.startswith("[", pos):
+            raise ValueError(f"Expected a JSON array at offset {pos}")
+        pos = _WHITESPACE.match(text, pos + 1).end()
+        if text.startswith("]", pos):
+            return
+        element, pos = _DECODER.raw_decode(text, pos)
+        yield element, pos
+
+    while True:
+        pos = _WHITESPACE.match(text, pos).end()
+        if text.startswith("]", pos):
+            return
+        if not text.startswith(",", pos):
+            raise ValueError(f"Expected ',' or ']' at offset {pos}")
+        pos = _WHITESPACE.match(text, pos + 1).end()
+        element, pos = _DECODER.raw_decode(text, pos)
+        yield element, pos
+
+
+def read_new_records(sales_file, checkpoint=None):
+    """
+    Read the sales records not covered by a checkpoint yet.
+
+    When the checkpoint covers at least one record and its prefix digest
+    still matches the file, only the bytes after the prefix are decoded.
+    Otherwise the whole file is read and `resumed` is False, meaning the
+    stored aggregates must be dropped. (A cursor of an empty array ends
+    before its "[", so there is nothing to resume from.)
+
+    Returns:
+        tuple: (records, resumed, consumed) where `consumed` is the new
+        sales cursor to store in the checkpoint.
+    """
+    with open(sales_file, "rb") as file:
+        data = file.read()
+
+    cursor = (checkpoint or {}).get("sales_cursor")
+    resumed = bool(
+        cursor
+        and cursor["records"] > 0
+        and cursor["offset"] <= len(data)
+        and hashlib.sha256(data[:cursor["offset"]]).hexdigest()
+        == cursor["sha256"]
+    )
+    base = cursor["offset"] if resumed else 0
+    count = cursor["records"] if resumed else 0
+
+    text = data[base:].decode("utf-8")
+    records = []
+    end = 0
+    for record, end in iter_json_array(text, resume=resumed):
+        records.append(record)
+
+    offset = base + len(text[:end].encode("utf-8"))
+    consumed = {
+        "offset": offset,
+        "sha256": hashlib.sha256(data[:offset]).hexdigest(),
+        "records": count + len(records),
+    }
+    return records, resumed, consumed
+
+
+class CheckpointStore:
+    """Loads and saves per-test-case checkpoints in a directory."""
+
+    def __init__(self, directory=CHECKPOINT_DIR):
+        """Initializes a store rooted at `directory`."""
+        self.directory = directory
+
+    def path(self, test_case):
+        """Return the checkpoint path of `test_case`."""
+        return os.path.join(self.directory, f"{test_case}.json")
+
+    def load(self, test_case):
+        """Return the checkpoint of `test_case`, or None if unusable."""
+        try:
+            with open(self.path(test_case), "r", encoding="utf-8") as file:
+                checkpoint = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if checkpoint.get("version") != VERSION:
+            return None
+        return checkpoint
+
+    def save(self, test_case, checkpoint):
+        """Atomically write the checkpoint of `test_case`."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(test_case)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(dict(checkpoint, version=VERSION), file)
+        os.replace(temp_path, path)
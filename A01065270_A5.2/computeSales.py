@@ -12,15 +12,58 @@ It supports multiple test case folders (TC1, TC2, ...), each containing:
 The script ensures correct data handling, logs invalid items, and
 follows PEP8 coding standards.
 
+Test case folders can be processed in parallel on a pool of worker
+processes; results are always written in sorted test case order, and the
+per-case processing times go to `results/Timings.txt`. Identical price
+catalogues are parsed once and can be cached in compiled form
+(see `catalogue_cache.py`). A single large sales file can be aggregated
+in shards on its own process pool; totals are reduced in a fixed order,
+so they do not depend on the number of workers. Optionally, the same scan
+produces per-product, per-date and per-sale breakdowns plus a report of
+products missing from the catalogue (see `sales_analytics.py`).
+
+Prices are parsed into integer cents and summed exactly by default; the
+original floating-point pricing remains available (see `money.py`).
+
+In incremental mode, per-case checkpoints (see `checkpoints.py`) let
+unchanged cases be skipped and appended sales records be folded into the
+stored aggregates; `results/Results.txt` is then rebuilt from them.
+
+Products missing from the catalogue can be matched against an index of
+catalogue titles to suggest (and optionally apply) corrections for typos
+(see `fuzzy_match.py`).
+
 Usage:
-    python computeSales.py
+    python computeSales.py [--workers N] [--compiled-catalogues]
+                           [--shard-workers N] [--shard-size N]
+                           [--analytics {csv,json}] [--money {cents,float}]
+                           [--incremental] [--match-distance N]
+                           [--auto-fix-distance N]
 """
+import argparse
 import json
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from catalogue_cache import load_price_catalogue
+from checkpoints import CheckpointStore, file_fingerprint, read_new_records
+from fuzzy_match import (
+    apply_matches, catalogue_index, report_rows, suggest_matches,
+    write_matches,
+)
+from money import DEFAULT_ENGINE, ENGINES, get_engine
+from sales_analytics import (
+    FORMATS as ANALYTICS_FORMATS, analyse_sales, merge_analytics,
+    write_report,
+)
 
 DATA_DIR = "data"
-RESULTS_FILE = "results/Results.txt"
+RESULTS_DIR = "results"
+RESULTS_FILE = os.path.join(RESULTS_DIR, "Results.txt")
+TIMINGS_FILE = os.path.join(RESULTS_DIR, "Timings.txt")
+SHARD_SIZE = 100_000
 
 
 def load_json(file_path):
@@ -33,21 +76,13 @@ def load_json(file_path):
         return None
 
 
-def compute_total_sales(price_catalogue, sales_record):
+def aggregate_quantities(sales_record):
     """
-    Compute the total cost of all sales.
-
-    This function aggregates sales quantities from the given sales record,
-    calculates the total cost based on the price catalog, and identifies
-    any invalid product entries.
+    Sum the quantity sold of each product in a list of sales entries.
 
     Returns:
-        tuple: (total_cost, invalid_entries)
+        dict: Product title -> total quantity, in first-seen order.
     """
-    total_cost = 0.0
-    invalid_entries = []
-
-    # Aggregate sales per product
     aggregated_sales = {}
 
     for entry in sales_record:
@@ -59,82 +94,541 @@ def compute_total_sales(price_catalogue, sales_record):
                 aggregated_sales.get(product, 0) + quantity
             )
 
-    # Compute total cost
+    return aggregated_sales
+
+
+def merge_quantities(partial_sales):
+    """
+    Merge per-shard quantity maps, folding the shards in the given order.
+
+    Returns:
+        dict: Product title -> total quantity over all shards.
+    """
+    aggregated_sales = {}
+
+    for shard_sales in partial_sales:
+        for product, quantity in shard_sales.items():
+            aggregated_sales[product] = (
+                aggregated_sales.get(product, 0) + quantity
+            )
+
+    return aggregated_sales
+
+
+def aggregate_sharded(sales_record, workers, shard_size=SHARD_SIZE,
+                      aggregate=aggregate_quantities, merge=merge_quantities):
+    """
+    Aggregate quantities per product on a pool of worker processes.
+
+    The sales list is cut into consecutive shards of `shard_size` entries,
+    each shard is aggregated in a worker, and the partial results are
+    merged back in shard order.
+
+    Args:
+        aggregate (callable): Aggregates one shard; must be picklable.
+        merge (callable): Merges an iterable of partial aggregates.
+
+    Returns:
+        The merged aggregate; by default a product title -> quantity dict.
+    """
+    if workers <= 1 or len(sales_record) <= shard_size:
+        return aggregate(sales_record)
+
+    shards = [
+        sales_record[start:start + shard_size]
+        for start in range(0, len(sales_record), shard_size)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return merge(executor.map(aggregate, shards))
+
+
+def price_quantities(price_catalogue, aggregated_sales, money="cents"):
+    """
+    Price aggregated quantities against the catalogue.
+
+    Reduction order: one subtotal (price * quantity) is computed per
+    product by the money engine and the subtotals are reduced by it. The
+    "cents" engine rounds fractional quantities' subtotals to whole cents
+    and adds integers, which is exact; the "float" engine uses
+    `math.fsum`, which returns the correctly rounded sum independently of
+    the order of its inputs. Either way the total only depends on the
+    per-product quantities, not on how the sales were sharded or merged.
+
+    Args:
+        price_catalogue (Mapping): Product title -> price, in the
+            representation of the `money` engine.
+        aggregated_sales (dict): Product title -> quantity.
+        money (str): Name of the money engine (see `money.py`).
+
+    Returns:
+        tuple: (total_cost, invalid_entries). Products missing from the
+        catalogue or sold in a quantity that cannot be priced (e.g. NaN)
+        are listed in `invalid_entries`.
+    """
+    engine = get_engine(money)
+    subtotals = []
+    invalid_entries = []
+
     for product, quantity in aggregated_sales.items():
-        if product in price_catalogue:
-            total_cost += price_catalogue[product] * quantity
-        else:
+        if product not in price_catalogue:
+            invalid_entries.append(product)
+            continue
+        try:
+            subtotals.append(
+                engine.subtotal(price_catalogue[product], quantity)
+            )
+        except ValueError:
             invalid_entries.append(product)
 
-    return total_cost, invalid_entries
+    return engine.total(subtotals), invalid_entries
 
 
-def process_test_cases():
+def compute_total_sales(price_catalogue, sales_record, workers=1,
+                        shard_size=SHARD_SIZE, money="cents"):
     """
-    Process multiple test cases (TC1, TC2, TC3, ...) and store results.
+    Compute the total cost of all sales.
 
-    This function scans the `data/` directory for test case folders,
-    loads the corresponding `ProductList.json` and `Sales.json` files,
-    computes total sales per test case, and writes the results to
-     `results/Results.txt`.
+    This function aggregates sales quantities from the given sales record,
+    calculates the total cost based on the price catalog, and identifies
+    any invalid product entries.
+
+    Args:
+        price_catalogue (Mapping): Product title -> price.
+        sales_record (list): Sales entries with `Product` and `Quantity`.
+        workers (int): Worker processes used to aggregate shards of the
+            sales record; 1 aggregates in-process.
+        shard_size (int): Number of sales entries per shard.
+        money (str): Name of the money engine the catalogue prices use.
+
+    Returns:
+        tuple: (total_cost, invalid_entries)
     """
+    aggregated_sales = aggregate_sharded(sales_record, workers, shard_size)
+    return price_quantities(price_catalogue, aggregated_sales, money)
 
-    results = []
 
-    for test_case in sorted(os.listdir(DATA_DIR)):
-        test_case_path = os.path.join(DATA_DIR, test_case)
-        if not os.path.isdir(test_case_path):
-            continue  # Skip non-directory files
+def match_unknown_products(test_case, price_catalogue, aggregated_sales,
+                           match_distance, auto_fix_distance=None):
+    """
+    Suggest catalogue titles for products missing from the catalogue.
 
-        # Identify product list and sales files
-        product_file = None
-        sales_file = None
+    Unknown products are looked up in the catalogue's BK-tree index (see
+    `fuzzy_match.py`) and the suggestions within `match_distance` edits
+    are written to `results/matches/<test_case>.csv`. With
+    `auto_fix_distance`, unambiguous matches within that distance are
+    folded into the matched catalogue product before pricing.
 
-        for filename in os.listdir(test_case_path):
-            if "ProductList" in filename and filename.endswith(".json"):
-                product_file = os.path.join(test_case_path, filename)
-            elif "Sales" in filename and filename.endswith(".json"):
-                sales_file = os.path.join(test_case_path, filename)
+    Returns:
+        tuple: (adjusted_sales, applied, rows) with the (possibly
+        adjusted) product title -> quantity map, the unknown product ->
+        catalogue title corrections that were applied and the rows of the
+        match report.
+    """
+    unknown_products = [
+        product for product in aggregated_sales
+        if product not in price_catalogue
+    ]
+    suggestions = suggest_matches(
+        catalogue_index(price_catalogue), unknown_products, match_distance
+    )
+    adjusted_sales, applied = aggregated_sales, {}
+    if auto_fix_distance is not None:
+        adjusted_sales, applied = apply_matches(
+            aggregated_sales, suggestions, auto_fix_distance
+        )
+    rows = report_rows(aggregated_sales, suggestions, applied)
+    write_matches(test_case, rows)
+    return adjusted_sales, applied, rows
 
-        if not product_file or not sales_file:
-            print(f"Skipping {test_case} - Missing required files")
-            continue
 
-        start_time = time.time()
+def price_case(test_case, price_catalogue, aggregated_sales, money="cents",
+               match_distance=None, auto_fix_distance=None):
+    """
+    Price the aggregated sales of a test case, matching unknown products
+    first when `match_distance` is set.
+
+    Returns:
+        tuple: (total_cost, applied, match_rows) with the unformatted total
+        in the representation of the money engine, the corrections folded
+        into it (see `match_unknown_products`) and the rows of the match
+        report, or None when no matching was requested.
+    """
+    applied, match_rows = {}, None
+    if match_distance is not None:
+        aggregated_sales, applied, match_rows = match_unknown_products(
+            test_case, price_catalogue, aggregated_sales,
+            match_distance, auto_fix_distance
+        )
+    total_cost, _ = price_quantities(price_catalogue, aggregated_sales, money)
+    return total_cost, applied, match_rows
 
-        # Load JSON data
-        price_catalogue_list = load_json(product_file)
-        sales_record = load_json(sales_file)
 
-        if price_catalogue_list is None or sales_record is None:
-            print(f"Skipping {test_case} - Error loading files")
-            continue
+def find_case_files(test_case_path):
+    """
+    Locate the product list and sales files inside a test case folder.
+
+    Returns:
+        tuple: (product_file, sales_file), either of which may be None.
+    """
+    product_file = None
+    sales_file = None
+
+    for filename in os.listdir(test_case_path):
+        if "ProductList" in filename and filename.endswith(".json"):
+            product_file = os.path.join(test_case_path, filename)
+        elif "Sales" in filename and filename.endswith(".json"):
+            sales_file = os.path.join(test_case_path, filename)
 
-        # Convert product list to a dictionary
-        price_catalogue = {
-            item["title"]: item["price"] for item in price_catalogue_list
-        }
+    return product_file, sales_file
 
-        # Compute total sales
-        total_cost, _ = compute_total_sales(
-            price_catalogue, sales_record
+
+def checkpointed_total(test_case, product_file, sales_file,
+                       compiled_catalogues=False, shard_workers=1,
+                       shard_size=SHARD_SIZE, money="cents",
+                       match_distance=None, auto_fix_distance=None):
+    """
+    Compute a test case total incrementally from its checkpoint.
+
+    Sales records already folded into the checkpoint are not parsed again:
+    an unchanged case is answered from the stored total, and records
+    appended to the sales array are aggregated and merged into the stored
+    per-product quantities. A changed product list only triggers repricing.
+    The checkpoint keeps raw quantities; fuzzy-matching corrections are
+    applied when pricing and stored totals are keyed by them. The match
+    report is stored too, per match and auto-fix distance, and written
+    out again when a stored total is reused.
+
+    Returns:
+        tuple: (total, status) with the formatted total and a short note
+        on how the checkpoint was used, or (None, error) on failure.
+    """
+    store = CheckpointStore()
+    checkpoint = store.load(test_case) or {}
+    product_fingerprint = file_fingerprint(product_file)
+    sales_fingerprint = file_fingerprint(sales_file)
+    status = "unchanged, from checkpoint"
+
+    if checkpoint.get("sales_file") != sales_fingerprint:
+        try:
+            records, resumed, cursor = read_new_records(
+                sales_file, checkpoint
+            )
+        except (OSError, ValueError) as e:
+            return None, f"Error loading file {sales_file}: {e}"
+
+        quantities = checkpoint.get("quantities", {}) if resumed else {}
+        checkpoint.update(
+            sales_file=sales_fingerprint,
+            sales_cursor=cursor,
+            quantities=merge_quantities([
+                quantities,
+                aggregate_sharded(records, shard_workers, shard_size),
+            ]),
+            totals={},
+            matches={},
+        )
+        status = (
+            f"{len(records)} new records" if resumed
+            else f"full scan of {len(records)} records"
         )
 
-        elapsed_time = time.time() - start_time
-        print(
-            f"{test_case} Total: ${total_cost:.2f} "
-            f"(Processed in {elapsed_time:.4f}s)"
+    if checkpoint.get("product_file") != product_fingerprint:
+        checkpoint.update(
+            product_file=product_fingerprint, totals={}, matches={}
         )
 
-        # Store results
-        results.append(f"{test_case}\t{total_cost:.2f}")
+    total_key = money
+    if auto_fix_distance is not None:
+        total_key = f"{money}:auto-fix<={auto_fix_distance}"
+    match_key = f"{match_distance}:{auto_fix_distance}"
+    matches = checkpoint.setdefault("matches", {})
+    total = checkpoint["totals"].get(total_key)
+    match_rows = matches.get(match_key)
+    if total is None or (match_distance is not None and match_rows is None):
+        price_catalogue = load_price_catalogue(
+            product_file, compiled=compiled_catalogues, money=money
+        )
+        if price_catalogue is None:
+            return None, f"Error loading file {product_file}"
+        total_cost, _, match_rows = price_case(
+            test_case, price_catalogue, checkpoint["quantities"], money,
+            match_distance, auto_fix_distance
+        )
+        total = get_engine(money).format(total_cost)
+        checkpoint["totals"][total_key] = total
+        if match_rows is not None:
+            matches[match_key] = match_rows
+        store.save(test_case, checkpoint)
+    elif match_distance is not None:
+        write_matches(test_case, match_rows)
 
-    # Write results to file
-    os.makedirs("results", exist_ok=True)
-    with open(RESULTS_FILE, "w", encoding="utf-8") as result_file:
+    return total, status
+
+
+def process_test_case(test_case, compiled_catalogues=False, shard_workers=1,
+                      shard_size=SHARD_SIZE, analytics_format=None,
+                      money="cents", incremental=False,
+                      match_distance=None, auto_fix_distance=None):
+    """
+    Load, aggregate and total a single test case folder.
+
+    The function is self-contained so it can run inside a worker process;
+    instead of printing, it returns its status line to the caller.
+
+    Price catalogues are shared through `catalogue_cache`, so identical
+    `ProductList.json` files are parsed once per process; with
+    `compiled_catalogues` they are also memory-mapped across runs. With
+    `shard_workers` > 1 the sales record itself is aggregated in shards of
+    `shard_size` entries on a process pool. When `analytics_format` is
+    "csv" or "json", the same scan also builds the per-product, per-date
+    and per-sale breakdowns and the invalid-product report, which are
+    written under `results/analytics/` with the same auto-fix corrections
+    as the total. Prices are handled by the `money` engine, and the total
+    is only formatted once it is complete. With
+    `incremental`, the case is answered from its checkpoint and only new
+    sales records are aggregated (see `checkpointed_total`). With
+    `match_distance`, unknown products get catalogue suggestions, and with
+    `auto_fix_distance` close matches are counted as the matched product
+    (see `match_unknown_products`).
+
+    Returns:
+        tuple: (test_case, total, elapsed_time, message). `total` is the
+        formatted total; `total` and `elapsed_time` are None when the case
+        was skipped.
+    """
+    test_case_path = os.path.join(DATA_DIR, test_case)
+    product_file, sales_file = find_case_files(test_case_path)
+
+    if not product_file or not sales_file:
+        return (
+            test_case, None, None,
+            f"Skipping {test_case} - Missing required files"
+        )
+
+    start_time = time.perf_counter()
+
+    if incremental:
+        total, status = checkpointed_total(
+            test_case, product_file, sales_file, compiled_catalogues,
+            shard_workers, shard_size, money, match_distance,
+            auto_fix_distance
+        )
+        if total is None:
+            return test_case, None, None, f"Skipping {test_case} - {status}"
+
+        elapsed_time = time.perf_counter() - start_time
+        return (
+            test_case, total, elapsed_time,
+            f"{test_case} Total: ${total} "
+            f"(Processed in {elapsed_time:.4f}s, {status})"
+        )
+
+    # Load JSON data
+    price_catalogue = load_price_catalogue(
+        product_file, compiled=compiled_catalogues, money=money
+    )
+    sales_record = load_json(sales_file)
+
+    if price_catalogue is None or sales_record is None:
+        return (
+            test_case, None, None,
+            f"Skipping {test_case} - Error loading files"
+        )
+
+    # Compute total sales
+    if analytics_format:
+        analytics = aggregate_sharded(
+            sales_record, shard_workers, shard_size,
+            aggregate=analyse_sales, merge=merge_analytics
+        )
+        aggregated_sales = analytics.quantities
+    else:
+        aggregated_sales = aggregate_sharded(
+            sales_record, shard_workers, shard_size
+        )
+
+    total_cost, applied, _ = price_case(
+        test_case, price_catalogue, aggregated_sales, money,
+        match_distance, auto_fix_distance
+    )
+
+    if analytics_format:
+        # Report the same corrected sales the total was computed from.
+        analytics.apply_corrections(applied)
+        write_report(
+            test_case, analytics.report(price_catalogue, money),
+            analytics_format
+        )
+
+    total = get_engine(money).format(total_cost)
+    elapsed_time = time.perf_counter() - start_time
+    return (
+        test_case, total, elapsed_time,
+        f"{test_case} Total: ${total} "
+        f"(Processed in {elapsed_time:.4f}s)"
+    )
+
+
+def list_test_cases():
+    """Return the sorted names of the test case folders in `data/`."""
+    return [
+        test_case for test_case in sorted(os.listdir(DATA_DIR))
+        if os.path.isdir(os.path.join(DATA_DIR, test_case))
+    ]
+
+
+def run_test_cases(test_cases, workers=1, **case_options):
+    """
+    Process the given test cases, serially or on a pool of worker processes.
+
+    Results are yielded in the same order as `test_cases`, regardless of
+    which worker finishes first.
+
+    Args:
+        test_cases (list of str): Test case folder names inside `data/`.
+        workers (int): Number of worker processes; 1 runs in-process.
+        **case_options: Keyword arguments for `process_test_case`.
+
+    Yields:
+        tuple: The result of `process_test_case` for each test case.
+    """
+    process = partial(process_test_case, **case_options)
+    if workers <= 1 or len(test_cases) <= 1:
+        yield from map(process, test_cases)
+        return
+
+    # Hand out several folders per task so thousands of small cases
+    # don't pay one inter-process round trip each.
+    chunksize = max(1, len(test_cases) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(
+            process, test_cases, chunksize=chunksize
+        )
+
+
+def write_results(results, timings, results_file=RESULTS_FILE,
+                  timings_file=TIMINGS_FILE):
+    """
+    Write the totals to `results/Results.txt` and the per-case processing
+    times to `results/Timings.txt`.
+    """
+    os.makedirs(os.path.dirname(results_file) or ".", exist_ok=True)
+    with open(results_file, "w", encoding="utf-8") as result_file:
         result_file.write("TOTAL\n")
         result_file.write("\n".join(results) + "\n")
 
+    os.makedirs(os.path.dirname(timings_file) or ".", exist_ok=True)
+    with open(timings_file, "w", encoding="utf-8") as timing_file:
+        timing_file.write("ELAPSED_SECONDS\n")
+        timing_file.write("\n".join(timings) + "\n")
+
+
+def process_test_cases(workers=1, **case_options):
+    """
+    Process multiple test cases (TC1, TC2, TC3, ...) and store results.
+
+    This function scans the `data/` directory for test case folders,
+    loads the corresponding `ProductList.json` and `Sales.json` files,
+    computes total sales per test case, and writes the results to
+    `results/Results.txt`.
+
+    Args:
+        workers (int): Number of worker processes used to process test
+            case folders in parallel. The output is written in sorted
+            test case order for any number of workers.
+        **case_options: Keyword arguments for `process_test_case`, e.g.
+            `compiled_catalogues`, `shard_workers` and `shard_size`.
+    """
+    results = []
+    timings = []
+
+    for test_case, total, elapsed_time, message in run_test_cases(
+        list_test_cases(), workers, **case_options
+    ):
+        print(message)
+        if total is None:
+            continue
+
+        # Store results
+        results.append(f"{test_case}\t{total}")
+        timings.append(f"{test_case}\t{elapsed_time:.4f}")
+
+    # Write results to file
+    write_results(results, timings)
+
+
+def parse_args():
+    """Parse the command line options."""
+    parser = argparse.ArgumentParser(
+        description="Compute total sales for every test case in data/."
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1,
+        help="Number of worker processes (default: 1, serial)."
+    )
+    parser.add_argument(
+        "--compiled-catalogues", action="store_true",
+        help="Cache compiled price catalogues in cache/catalogues/."
+    )
+    parser.add_argument(
+        "--shard-workers", type=int, default=1,
+        help="Worker processes aggregating each sales file (default: 1)."
+    )
+    parser.add_argument(
+        "--shard-size", type=int, default=SHARD_SIZE,
+        help=f"Sales entries per shard (default: {SHARD_SIZE})."
+    )
+    parser.add_argument(
+        "--analytics", choices=ANALYTICS_FORMATS, default=None,
+        help="Also write per-product, per-date, per-sale and invalid-product"
+             " breakdowns to results/analytics/ in this format."
+    )
+    parser.add_argument(
+        "--money", choices=sorted(ENGINES), default=DEFAULT_ENGINE,
+        help=f"Money engine used for pricing (default: {DEFAULT_ENGINE})."
+    )
+    parser.add_argument(
+        "--match-distance", type=int, default=None,
+        help="Suggest catalogue titles within this many edits for unknown"
+             " products (report in results/matches/)."
+    )
+    parser.add_argument(
+        "--auto-fix-distance", type=int, default=None,
+        help="Count unknown products as their unambiguous catalogue match"
+             " when it is within this many edits."
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Reuse per-case checkpoints in results/checkpoints/ and only"
+             " aggregate new sales records."
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be a positive integer.")
+    if args.shard_workers < 1 or args.shard_size < 1:
+        parser.error("--shard-workers and --shard-size must be positive.")
+    if args.auto_fix_distance is not None:
+        if args.match_distance is None:
+            args.match_distance = args.auto_fix_distance
+        elif args.auto_fix_distance > args.match_distance:
+            parser.error("--auto-fix-distance exceeds --match-distance.")
+    if min(args.match_distance or 0, args.auto_fix_distance or 0) < 0:
+        parser.error("Match distances must not be negative.")
+    if args.incremental and args.analytics:
+        parser.error("--incremental cannot be combined with --analytics.")
+    return args
+
 
 if __name__ == "__main__":
-    process_test_cases()
+    ARGS = parse_args()
+    process_test_cases(
+        workers=ARGS.workers,
+        compiled_catalogues=ARGS.compiled_catalogues,
+        shard_workers=ARGS.shard_workers,
+        shard_size=ARGS.shard_size,
+        analytics_format=ARGS.analytics,
+        money=ARGS.money,
+        incremental=ARGS.incremental,
+        match_distance=ARGS.match_distance,
+        auto_fix_distance=ARGS.auto_fix_distance,
+    )
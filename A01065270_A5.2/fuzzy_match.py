@@ -0,0 +1,185 @@
+"""
+fuzzy_match.py
+
+Indexed fuzzy matching of unknown product titles for computeSales.py.
+
+Sales often name products with small typos ("stawberry"), which then fall
+out of the total as invalid entries. This module indexes the catalogue
+titles in a BK-tree keyed by Levenshtein distance: the triangle inequality
+lets a query for "every title within distance d" skip whole subtrees, so
+each unknown title is compared against a small part of the catalogue
+rather than all of it.
+
+Titles are compared case-insensitively with whitespace collapsed.
+
+Functions:
+    - levenshtein(a, b): Edit distance between two titles.
+    - suggest_matches(index, products, max_distance): Candidate titles.
+    - apply_matches(aggregated_sales, suggestions, max_distance): Fold
+      unambiguous close matches into their catalogue product.
+    - write_matches(test_case, rows): Write the match report as CSV.
+"""
+import csv
+import os
+
+MATCHES_DIR = os.path.join("results", "matches")
+REPORT_FIELDS = ("product", "quantity", "suggestion", "distance", "applied")
+
+_index_cache = {}
+
+
+def normalize_title(title):
+    """Return the comparison key of a product title."""
+    return " ".join(title.casefold().split())
+
+
+def levenshtein(a, b):
+    """Compute the Levenshtein distance between two strings."""
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """Burkhard-Keller tree over normalized catalogue titles."""
+
+    def __init__(self, titles=()):
+        """Builds the tree from an iterable of catalogue titles."""
+        self._root = None
+        self._titles = {}
+        for title in titles:
+            self.add(title)
+
+    def __len__(self):
+        return len(self._titles)
+
+    def add(self, title):
+        """Index a catalogue title; duplicates after normalization keep
+        the first title seen."""
+        key = normalize_title(title)
+        if key in self._titles:
+            return
+        self._titles[key] = title
+
+        if self._root is None:
+            self._root = (key, {})
+            return
+        node = self._root
+        while True:
+            distance = levenshtein(key, node[0])
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (key, {})
+                return
+            node = child
+
+    def search(self, title, max_distance):
+        """
+        Find the catalogue titles within `max_distance` edits of `title`.
+
+        Returns:
+            list of tuple: (distance, title) pairs, closest first.
+        """
+        key = normalize_title(title)
+        matches = []
+        pending = [self._root] if self._root else []
+        while pending:
+            node_key, children = pending.pop()
+            distance = levenshtein(key, node_key)
+            if distance <= max_distance:
+                matches.append((distance, self._titles[node_key]))
+            low, high = distance - max_distance, distance + max_distance
+            pending.extend(
+                child for edge, child in children.items()
+                if low <= edge <= high
+            )
+        return sorted(matches)
+
+
+def catalogue_index(price_catalogue):
+    """Return the BK-tree of a catalogue, building it once per catalogue."""
+    key = id(price_catalogue)
+    cached = _index_cache.get(key)
+    if cached is None or cached[0] is not price_catalogue:
+        cached = (price_catalogue, BKTree(price_catalogue))
+        _index_cache[key] = cached
+    return cached[1]
+
+
+def suggest_matches(index, products, max_distance):
+    """
+    Look up catalogue suggestions for unknown products.
+
+    Returns:
+        dict: Unknown product -> list of (distance, title), closest first.
+    """
+    return {
+        product: index.search(product, max_distance) for product in products
+    }
+
+
+def apply_matches(aggregated_sales, suggestions, max_distance):
+    """
+    Fold unknown products into their closest catalogue product.
+
+    A suggestion is applied when it is within `max_distance` and no other
+    title is equally close, so ambiguous typos are left for review.
+
+    Returns:
+        tuple: (adjusted_sales, applied) where `applied` maps each unknown
+        product that was folded to the catalogue title it now counts as.
+    """
+    adjusted_sales = dict(aggregated_sales)
+    applied = {}
+    for product, matches in suggestions.items():
+        if not matches or matches[0][0] > max_distance:
+            continue
+        if len(matches) > 1 and matches[1][0] == matches[0][0]:
+            continue
+        title = matches[0][1]
+        adjusted_sales[title] = (
+            adjusted_sales.get(title, 0) + adjusted_sales.pop(product)
+        )
+        applied[product] = title
+    return adjusted_sales, applied
+
+
+def report_rows(aggregated_sales, suggestions, applied):
+    """Build the match report rows, one per suggestion (or per product
+    without any)."""
+    rows = []
+    for product, matches in suggestions.items():
+        quantity = aggregated_sales[product]
+        if not matches:
+            rows.append({
+                "product": product, "quantity": quantity,
+                "suggestion": "", "distance": "", "applied": False,
+            })
+        for distance, title in matches:
+            rows.append({
+                "product": product, "quantity": quantity,
+                "suggestion": title, "distance": distance,
+                "applied": applied.get(product) == title,
+            })
+    return rows
+
+
+def write_matches(test_case, rows, output_dir=MATCHES_DIR):
+    """Write the match report of `test_case` to `<output_dir>/<TC>.csv`."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{test_case}.csv")
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
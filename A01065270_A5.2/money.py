@@ -0,0 +1,117 @@
+"""
+money.py
+
+Money engines used by computeSales.py to price aggregated sales.
+
+An engine bundles how prices are parsed from `ProductList.json`, how
+subtotals are reduced and how totals are formatted:
+
+- "cents" (default): prices are parsed from their JSON text straight into
+  integer minor units (cents), so `price * quantity` and every sum are
+  exact integer arithmetic. A fractional quantity (e.g. 1.5 kg) is
+  multiplied as a decimal and its subtotal rounded half to even to whole
+  minor units before summing. Totals are independent of summation order,
+  which makes merging sharded partial sums safe, and are only turned into
+  a decimal string when written out.
+- "float": the original binary floating-point pricing; subtotals are
+  reduced with `math.fsum` so the result is still order independent.
+"""
+import json
+import math
+import operator
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+
+MINOR_UNIT_DIGITS = 2
+
+MoneyEngine = namedtuple(
+    "MoneyEngine",
+    ["name", "parse_price", "subtotal", "total", "format", "typecode"],
+)
+
+
+def to_minor_units(value, digits=MINOR_UNIT_DIGITS):
+    """
+    Convert a price to an integer number of minor units.
+
+    Args:
+        value (str | int | float): The price, preferably as the literal
+            text found in the JSON file so no binary rounding is involved.
+        digits (int): Number of decimal digits in one major unit.
+
+    Returns:
+        int: The price in minor units; sub-unit digits are rounded half to
+        even.
+    """
+    if isinstance(value, int):
+        return value * 10 ** digits
+    try:
+        amount = Decimal(str(value)).scaleb(digits)
+        return int(amount.to_integral_value(rounding=ROUND_HALF_EVEN))
+    except (InvalidOperation, ValueError) as e:
+        raise ValueError(f"Invalid price: {value!r}") from e
+
+
+def minor_units_subtotal(price, quantity):
+    """
+    Multiply a price in minor units by a quantity sold.
+
+    Integer quantities are multiplied exactly; fractional ones are
+    multiplied as decimals and rounded half to even to whole minor units.
+
+    Raises:
+        ValueError: If the quantity is not a finite number.
+    """
+    if isinstance(quantity, int):
+        return price * quantity
+    if not isinstance(quantity, float):
+        raise ValueError(f"Invalid quantity: {quantity!r}")
+    try:
+        amount = Decimal(price) * Decimal(str(quantity))
+        return int(amount.to_integral_value(rounding=ROUND_HALF_EVEN))
+    except (InvalidOperation, OverflowError, ValueError) as e:
+        raise ValueError(f"Invalid quantity: {quantity!r}") from e
+
+
+def format_minor_units(amount, digits=MINOR_UNIT_DIGITS):
+    """Format an integer amount of minor units as a decimal string."""
+    sign = "-" if amount < 0 else ""
+    major, minor = divmod(abs(amount), 10 ** digits)
+    if not digits:
+        return f"{sign}{major}"
+    return f"{sign}{major}.{minor:0{digits}d}"
+
+
+def format_float(amount):
+    """Format a floating-point amount with two decimals."""
+    return f"{amount:.2f}"
+
+
+ENGINES = {
+    "cents": MoneyEngine(
+        "cents", to_minor_units, minor_units_subtotal, sum,
+        format_minor_units, "q",
+    ),
+    "float": MoneyEngine(
+        "float", float, operator.mul, math.fsum, format_float, "d"
+    ),
+}
+DEFAULT_ENGINE = "cents"
+
+
+def get_engine(name=DEFAULT_ENGINE):
+    """Return the money engine registered under `name`."""
+    try:
+        return ENGINES[name]
+    except KeyError as e:
+        raise ValueError(f"Unknown money engine: {name}") from e
+
+
+def parse_product_list(text):
+    """
+    Parse a `ProductList.json` document without binary float conversion.
+
+    Non-integer numbers are kept as their literal text, so the engine's
+    `parse_price` sees exactly what is written in the file.
+    """
+    return json.loads(text, parse_float=str)
@@ -0,0 +1,218 @@
+"""
+sales_analytics.py
+
+Multi-dimensional breakdown of a sales record for computeSales.py.
+
+A single pass over the sales entries accumulates quantities per product,
+per (SALE_Date, product) and per (SALE_ID, product). Pricing happens once
+the scan is done, producing:
+
+- per-product totals (quantity, unit price, amount),
+- per-date and per-sale totals,
+- a report of products missing from the price catalogue (or sold in a
+  quantity that cannot be priced).
+
+Partial results from several shards can be merged, so the breakdown works
+with the sharded aggregation in computeSales.py. Reports are written as
+CSV files or as a single JSON document per test case.
+"""
+import csv
+import json
+import os
+
+from money import get_engine
+
+ANALYTICS_DIR = os.path.join("results", "analytics")
+FORMATS = ("csv", "json")
+TABLE_FIELDS = {
+    "products": ("product", "quantity", "unit_price", "amount"),
+    "dates": ("sale_date", "quantity", "amount"),
+    "sales": ("sale_id", "quantity", "amount"),
+    "invalid_products": ("product", "quantity", "entries"),
+}
+
+
+class SalesAnalytics:
+    """Accumulates the sales breakdowns of one sales record."""
+
+    def __init__(self):
+        """Initializes empty accumulators."""
+        self.quantities = {}
+        self.entry_counts = {}
+        self.by_date = {}
+        self.by_sale = {}
+
+    @staticmethod
+    def _add(table, key, product, quantity):
+        """Adds `quantity` of `product` under `key` in a nested table."""
+        products = table.setdefault(key, {})
+        products[product] = products.get(product, 0) + quantity
+
+    def add_entry(self, entry):
+        """Folds one sales entry into every breakdown."""
+        product = entry.get("Product")
+        if not product:
+            return
+        quantity = entry.get("Quantity", 0)
+
+        self.quantities[product] = self.quantities.get(product, 0) + quantity
+        self.entry_counts[product] = self.entry_counts.get(product, 0) + 1
+        self._add(self.by_date, entry.get("SALE_Date"), product, quantity)
+        self._add(self.by_sale, entry.get("SALE_ID"), product, quantity)
+
+    def merge(self, other):
+        """Folds the accumulators of another (later) shard into this one."""
+        for product, quantity in other.quantities.items():
+            self.quantities[product] = (
+                self.quantities.get(product, 0) + quantity
+            )
+        for product, count in other.entry_counts.items():
+            self.entry_counts[product] = (
+                self.entry_counts.get(product, 0) + count
+            )
+        for table, other_table in (
+            (self.by_date, other.by_date), (self.by_sale, other.by_sale)
+        ):
+            for key, products in other_table.items():
+                for product, quantity in products.items():
+                    self._add(table, key, product, quantity)
+        return self
+
+    def apply_corrections(self, corrections):
+        """
+        Counts the sales of corrected products as their catalogue title.
+
+        `corrections` maps sold product titles to the catalogue titles they
+        were folded into (see `fuzzy_match.apply_matches`), so the
+        breakdowns agree with the total computed from the same sales.
+        """
+        for product, title in corrections.items():
+            for table in (
+                self.quantities, self.entry_counts,
+                *self.by_date.values(), *self.by_sale.values(),
+            ):
+                if product in table:
+                    table[title] = table.get(title, 0) + table.pop(product)
+        return self
+
+    @staticmethod
+    def _subtotal(price_catalogue, product, quantity, engine):
+        """Returns the price of a quantity of a product, or None if the
+        product is not listed or the quantity cannot be priced."""
+        if product not in price_catalogue:
+            return None
+        try:
+            return engine.subtotal(price_catalogue[product], quantity)
+        except ValueError:
+            return None
+
+    @classmethod
+    def _amount(cls, price_catalogue, products, engine):
+        """Returns the priced total of a product -> quantity map."""
+        subtotals = (
+            cls._subtotal(price_catalogue, product, quantity, engine)
+            for product, quantity in products.items()
+        )
+        return engine.total([
+            subtotal for subtotal in subtotals if subtotal is not None
+        ])
+
+    def report(self, price_catalogue, money="cents"):
+        """
+        Prices the accumulated quantities.
+
+        Money values are formatted as decimal strings by the `money`
+        engine, so exact amounts are not rounded through a float.
+
+        Returns:
+            dict: `products`, `dates`, `sales` and `invalid_products` rows,
+            each a list of dictionaries in first-seen order.
+        """
+        engine = get_engine(money)
+        products = []
+        invalid_products = []
+        for product, quantity in self.quantities.items():
+            amount = self._subtotal(
+                price_catalogue, product, quantity, engine
+            )
+            if amount is not None:
+                products.append({
+                    "product": product,
+                    "quantity": quantity,
+                    "unit_price": engine.format(price_catalogue[product]),
+                    "amount": engine.format(amount),
+                })
+            else:
+                invalid_products.append({
+                    "product": product,
+                    "quantity": quantity,
+                    "entries": self.entry_counts[product],
+                })
+
+        dates = [
+            {
+                "sale_date": sale_date,
+                "quantity": sum(items.values()),
+                "amount": engine.format(
+                    self._amount(price_catalogue, items, engine)
+                ),
+            }
+            for sale_date, items in self.by_date.items()
+        ]
+        sales = [
+            {
+                "sale_id": sale_id,
+                "quantity": sum(items.values()),
+                "amount": engine.format(
+                    self._amount(price_catalogue, items, engine)
+                ),
+            }
+            for sale_id, items in self.by_sale.items()
+        ]
+        return {
+            "products": products,
+            "dates": dates,
+            "sales": sales,
+            "invalid_products": invalid_products,
+        }
+
+
+def analyse_sales(sales_record):
+    """Runs the single-pass breakdown over a list of sales entries."""
+    analytics = SalesAnalytics()
+    for entry in sales_record:
+        analytics.add_entry(entry)
+    return analytics
+
+
+def merge_analytics(partials):
+    """Merges per-shard `SalesAnalytics` objects in the given order."""
+    merged = SalesAnalytics()
+    for partial in partials:
+        merged.merge(partial)
+    return merged
+
+
+def write_report(test_case, report, output_format="csv",
+                 output_dir=ANALYTICS_DIR):
+    """
+    Writes a priced report for `test_case`.
+
+    CSV output creates `<output_dir>/<test_case>/<table>.csv` per table;
+    JSON output creates `<output_dir>/<test_case>.json`.
+    """
+    if output_format == "json":
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"{test_case}.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        return
+
+    case_dir = os.path.join(output_dir, test_case)
+    os.makedirs(case_dir, exist_ok=True)
+    for table, rows in report.items():
+        path = os.path.join(case_dir, f"{table}.csv")
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=TABLE_FIELDS[table])
+            writer.writeheader()
+            writer.writerows(rows)
@@ -0,0 +1,6 @@
+"""
+tests/__init__.py - Unit tests for computeSales.py and its modules.
+
+Run from the A01065270_A5.2 directory with `python -m unittest` or
+`python -m pytest`.
+"""
@@ -0,0 +1,71 @@
+import json
+import os
+import unittest
+
+import benchmark
+from tests.test_compute_sales import SalesTestCase
+
+
+class TestBenchmark(SalesTestCase):
+    """Tests for the synthetic data and the chunked pipeline."""
+
+    def setUp(self):
+        super().setUp()
+        self.product_file, self.sales_file = benchmark.generate_case(
+            "data", 20, 103, 0.1, 1.1, seed=5, chunk_lines=10
+        )
+
+    def test_generated_case(self):
+        """Test the generated catalogue and sales files."""
+        with open(self.product_file, encoding="utf-8") as file:
+            catalogue = json.load(file)
+        with open(self.sales_file, encoding="utf-8") as file:
+            sales_record = json.load(file)
+        titles = {item["title"] for item in catalogue}
+        self.assertEqual(len(titles), 20)
+        self.assertEqual(len(sales_record), 103)
+        unknown = [
+            entry for entry in sales_record if entry["Product"] not in titles
+        ]
+        self.assertEqual(len(unknown), 10)  # 1 per 10-line chunk, 0 for 3
+        self.assertEqual(sales_record[5]["SALE_ID"], 2)
+        self.assertTrue(
+            all(1 <= entry["Quantity"] <= 10 for entry in sales_record)
+        )
+
+        mtime = os.stat(self.sales_file).st_mtime_ns
+        self.assertEqual(
+            benchmark.generate_case("data", 20, 103, 0.1, 1.1, seed=5),
+            (self.product_file, self.sales_file),
+        )
+        self.assertEqual(os.stat(self.sales_file).st_mtime_ns, mtime)
+
+    def test_chunks(self):
+        """Test that chunks hold every entry in order."""
+        with open(self.sales_file, encoding="utf-8") as file:
+            sales_record = json.load(file)
+        for chunk_lines in (1, 10, 103, 1000):
+            with self.subTest(chunk_lines=chunk_lines):
+                chunks = list(
+                    benchmark.iter_sales_chunks(self.sales_file, chunk_lines)
+                )
+                self.assertTrue(all(chunks))
+                self.assertEqual(sum(chunks, []), sales_record)
+
+    def test_chunked_run_matches_whole_file(self):
+        """Test that chunked loading gives the whole-file total."""
+        runs = [
+            benchmark.run_once(
+                self.product_file, self.sales_file, "results", "cents", 1,
+                False, sales_lines=103, chunk_lines=chunk_lines,
+            )
+            for chunk_lines in (1000, 10)
+        ]
+        self.assertEqual(runs[0]["total"], runs[1]["total"])
+        self.assertEqual(runs[0]["invalid_products"],
+                         runs[1]["invalid_products"])
+        self.assertEqual(set(runs[1]["stages"]), set(benchmark.STAGES))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import unittest
+
+from catalogue_cache import (
+    CompiledCatalogue, clear_memory_cache, compile_catalogue, content_hash,
+    load_price_catalogue,
+)
+from tests.test_compute_sales import SalesTestCase
+
+
+class TestCompiledCatalogue(SalesTestCase):
+    """Tests for the memory-mapped PCAT0002 catalogues."""
+
+    def test_round_trip(self):
+        """Test that a compiled catalogue reads back every price."""
+        for typecode, prices in (
+            ("d", {"Brown eggs": 28.1, "Crème brûlée": 5.5, "Apple": -1.25}),
+            ("q", {"Brown eggs": 2810, "Crème brûlée": 550, "Zeta": 2**40}),
+        ):
+            with self.subTest(typecode=typecode):
+                path = os.path.join("cache", f"catalogue.{typecode}.pcat")
+                compile_catalogue(prices, path, typecode)
+                catalogue = CompiledCatalogue(path)
+                self.assertEqual(dict(catalogue), prices)
+                self.assertEqual(len(catalogue), 3)
+                self.assertEqual(
+                    list(catalogue),
+                    sorted(prices, key=lambda title: title.encode("utf-8")),
+                )
+                self.assertNotIn("Brown egg", catalogue)
+                self.assertNotIn(5, catalogue)
+                with self.assertRaises(KeyError):
+                    catalogue["Missing"]  # pylint: disable=W0104
+
+    def test_empty_catalogue(self):
+        """Test that an empty catalogue compiles and finds nothing."""
+        compile_catalogue({}, "empty.pcat")
+        catalogue = CompiledCatalogue("empty.pcat")
+        self.assertEqual(len(catalogue), 0)
+        self.assertNotIn("Brown eggs", catalogue)
+
+    def test_rejects_other_files(self):
+        """Test that files without the PCAT0002 header are rejected."""
+        compile_catalogue({"Brown eggs": 28.1}, "catalogue.pcat")
+        with open("catalogue.pcat", "r+b") as file:
+            file.write(b"PCAT0001")
+        with self.assertRaises(ValueError):
+            CompiledCatalogue("catalogue.pcat")
+
+
+class TestLoadPriceCatalogue(SalesTestCase):
+    """Tests for sharing parsed catalogues between test cases."""
+
+    def setUp(self):
+        super().setUp()
+        self.first, _ = self.write_case("TC1", [])
+        self.second, _ = self.write_case("TC2", [])
+
+    def test_identical_files_share_one_catalogue(self):
+        """Test that identical product lists are parsed once."""
+        catalogue = load_price_catalogue(self.first)
+        self.assertIs(load_price_catalogue(self.second), catalogue)
+        self.assertEqual(catalogue["Brown eggs"], 2810)
+        floats = load_price_catalogue(self.second, money="float")
+        self.assertEqual(floats["Brown eggs"], 28.1)
+
+    def test_compiled_cache(self):
+        """Test that later runs map the compiled catalogue."""
+        catalogue = load_price_catalogue(self.first, compiled=True)
+        with open(self.first, "rb") as file:
+            digest = content_hash(file.read())
+        path = os.path.join("cache", "catalogues", f"{digest}.cents.pcat")
+        self.assertTrue(os.path.exists(path))
+
+        clear_memory_cache()
+        mapped = load_price_catalogue(self.second, compiled=True)
+        self.assertIsInstance(mapped, CompiledCatalogue)
+        self.assertEqual(dict(mapped), dict(catalogue))
+
+        clear_memory_cache()
+        with open(path, "wb") as file:
+            file.write(b"damaged")
+        reparsed = load_price_catalogue(self.first, compiled=True)
+        self.assertIsInstance(reparsed, dict)
+        self.assertEqual(reparsed, catalogue)
+
+    def test_unreadable_files(self):
+        """Test that missing or invalid product lists give None."""
+        self.assertIsNone(load_price_catalogue("missing.json"))
+        with open("bad.json", "w", encoding="utf-8") as file:
+            file.write("[{")
+        self.assertIsNone(load_price_catalogue("bad.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
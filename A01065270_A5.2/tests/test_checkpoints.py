@@ -0,0 +1,160 @@
+import json
+import os
+import unittest
+
+import computeSales as sales
+from checkpoints import CheckpointStore, iter_json_array, read_new_records
+from fuzzy_match import MATCHES_DIR
+from tests.test_compute_sales import SalesTestCase
+
+
+class TestIterJsonArray(unittest.TestCase):
+    """Tests for decoding a JSON array element by element."""
+
+    def test_elements_and_offsets(self):
+        """Test that each element comes with the offset after it."""
+        text = ' [ {"a": 1} ,\n"é", [2] ] '
+        elements = list(iter_json_array(text))
+        self.assertEqual([e for e, _ in elements], [{"a": 1}, "é", [2]])
+        resumed = list(iter_json_array(text, elements[0][1], resume=True))
+        self.assertEqual(resumed, elements[1:])
+        self.assertEqual(list(iter_json_array("[ ]")), [])
+
+    def test_invalid_arrays(self):
+        """Test that malformed arrays raise ValueError."""
+        for text in ('{"a": 1}', "[1 2]", "[1,", "[1"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    list(iter_json_array(text))
+
+
+class TestCheckpointResume(SalesTestCase):
+    """Tests for resuming a sales file from its checkpoint."""
+
+    def setUp(self):
+        super().setUp()
+        self.records = [
+            self.sale("Brown eggs", 1, sale_id=index)
+            for index in range(1, 6)
+        ] + [self.sale("Crème brûlée", 2, sale_id=6)]
+        _, self.sales_file = self.write_case("TC1", self.records[:4])
+
+    def rewrite(self, records):
+        """Replaces the sales file with `records`."""
+        with open(self.sales_file, "w", encoding="utf-8") as file:
+            json.dump(records, file, indent=2)
+
+    def test_resume_after_append(self):
+        """Test that only appended records are read again."""
+        records, resumed, cursor = read_new_records(self.sales_file)
+        self.assertEqual((records, resumed), (self.records[:4], False))
+        self.assertEqual(cursor["records"], 4)
+
+        self.rewrite(self.records)
+        records, resumed, cursor = read_new_records(
+            self.sales_file, {"sales_cursor": cursor}
+        )
+        self.assertEqual((records, resumed), (self.records[4:], True))
+        self.assertEqual(cursor["records"], 6)
+        with open(self.sales_file, "rb") as file:
+            self.assertEqual(file.read()[cursor["offset"]:].strip(), b"]")
+
+        records, resumed, _ = read_new_records(
+            self.sales_file, {"sales_cursor": cursor}
+        )
+        self.assertEqual((records, resumed), ([], True))
+
+    def test_append_to_empty_array(self):
+        """Test that records appended to an empty array are all read."""
+        self.rewrite([])
+        records, resumed, cursor = read_new_records(self.sales_file)
+        self.assertEqual((records, resumed), ([], False))
+
+        self.rewrite(self.records[:2])
+        records, resumed, cursor = read_new_records(
+            self.sales_file, {"sales_cursor": cursor}
+        )
+        self.assertEqual((records, resumed), (self.records[:2], False))
+        self.assertEqual(cursor["records"], 2)
+
+        product_file, _ = sales.find_case_files(
+            os.path.join(sales.DATA_DIR, "TC1")
+        )
+        self.rewrite([])
+        self.assertEqual(
+            sales.checkpointed_total("TC1", product_file, self.sales_file),
+            ("0.00", "full scan of 0 records"),
+        )
+        self.rewrite(self.records[:2])
+        self.assertEqual(
+            sales.checkpointed_total("TC1", product_file, self.sales_file),
+            ("56.20", "full scan of 2 records"),
+        )
+
+    def test_full_scan_after_truncation(self):
+        """Test that a truncated or edited file is read from the start."""
+        _, _, cursor = read_new_records(self.sales_file)
+        for records in (self.records[:2], self.records[1:5]):
+            with self.subTest(records=len(records)):
+                self.rewrite(records)
+                read, resumed, new_cursor = read_new_records(
+                    self.sales_file, {"sales_cursor": cursor}
+                )
+                self.assertEqual((read, resumed), (records, False))
+                self.assertEqual(new_cursor["records"], len(records))
+
+    def test_checkpointed_total(self):
+        """Test totals after appending, truncating and repricing."""
+        product_file, _ = sales.find_case_files(
+            os.path.join(sales.DATA_DIR, "TC1")
+        )
+
+        def total():
+            return sales.checkpointed_total("TC1", product_file,
+                                            self.sales_file)
+
+        self.assertEqual(total(), ("112.40", "full scan of 4 records"))
+        self.assertEqual(total(), ("112.40", "unchanged, from checkpoint"))
+        self.rewrite(self.records)
+        self.assertEqual(total(), ("140.50", "2 new records"))
+        self.rewrite(self.records[:2])
+        self.assertEqual(total(), ("56.20", "full scan of 2 records"))
+        self.write_case("TC1", self.records[:2], [
+            {"title": "Brown eggs", "price": 30},
+        ])
+        self.assertEqual(total()[0], "60.00")
+        checkpoint = CheckpointStore().load("TC1")
+        self.assertEqual(checkpoint["quantities"], {"Brown eggs": 2})
+        self.assertEqual(set(checkpoint["totals"]), {"cents"})
+
+    def test_match_report_from_checkpoint(self):
+        """Test that a stored total still writes the match report."""
+        self.rewrite(self.records[:4] + [self.sale("Brown egs", 3)])
+        report = os.path.join(MATCHES_DIR, "TC1.csv")
+        args = ("TC1", *sales.find_case_files(
+            os.path.join(sales.DATA_DIR, "TC1")
+        ))
+
+        first = sales.checkpointed_total(*args, match_distance=2,
+                                         auto_fix_distance=1)
+        with open(report, encoding="utf-8") as file:
+            expected = file.read()
+        self.assertIn("Brown egs,3,Brown eggs,1,True", expected)
+
+        os.remove(report)
+        again = sales.checkpointed_total(*args, match_distance=2,
+                                         auto_fix_distance=1)
+        self.assertEqual(again, (first[0], "unchanged, from checkpoint"))
+        with open(report, encoding="utf-8") as file:
+            self.assertEqual(file.read(), expected)
+
+        os.remove(report)
+        sales.checkpointed_total(*args)
+        self.assertFalse(os.path.exists(report))
+        sales.checkpointed_total(*args, match_distance=1)
+        with open(report, encoding="utf-8") as file:
+            self.assertIn("Brown egs,3,Brown eggs,1,False", file.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
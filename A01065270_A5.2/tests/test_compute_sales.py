@@ -0,0 +1,149 @@
+import json
+import os
+import tempfile
+import unittest
+
+import computeSales as sales
+from catalogue_cache import clear_memory_cache
+from money import get_engine
+
+CATALOGUE = [
+    {"title": "Brown eggs", "price": 28.1},
+    {"title": "Sweet fresh stawberry", "price": 29.45},
+    {"title": "Green smoothie", "price": 17.68},
+]
+
+
+class SalesTestCase(unittest.TestCase):
+    """Runs each test in a temporary directory with its own data/."""
+
+    def setUp(self):
+        clear_memory_cache()
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+        clear_memory_cache()
+
+    @staticmethod
+    def write_case(test_case, sales_record, catalogue=None):
+        """Writes the product list and sales files of a test case."""
+        case_dir = os.path.join(sales.DATA_DIR, test_case)
+        os.makedirs(case_dir, exist_ok=True)
+        product_file = os.path.join(case_dir, f"{test_case}.ProductList.json")
+        sales_file = os.path.join(case_dir, f"{test_case}.Sales.json")
+        with open(product_file, "w", encoding="utf-8") as file:
+            json.dump(CATALOGUE if catalogue is None else catalogue, file)
+        with open(sales_file, "w", encoding="utf-8") as file:
+            json.dump(sales_record, file, indent=2)
+        return product_file, sales_file
+
+    @staticmethod
+    def sale(product, quantity, sale_id=1, sale_date="01/12/23"):
+        """Returns one sales entry."""
+        return {"SALE_ID": sale_id, "SALE_Date": sale_date,
+                "Product": product, "Quantity": quantity}
+
+
+class TestProcessTestCases(SalesTestCase):
+    """Tests for processing the test case folders."""
+
+    def setUp(self):
+        super().setUp()
+        for number in range(1, 6):
+            self.write_case(f"TC{number}", [
+                self.sale("Brown eggs", number),
+                self.sale("Green smoothie", 2, sale_id=2),
+            ])
+        os.makedirs(os.path.join(sales.DATA_DIR, "TC9"))  # No files
+
+    def test_workers_keep_case_order(self):
+        """Test that a worker pool yields the same results in order."""
+        cases = sales.list_test_cases()
+        self.assertEqual(cases, ["TC1", "TC2", "TC3", "TC4", "TC5", "TC9"])
+        serial = list(sales.run_test_cases(cases))
+        parallel = list(sales.run_test_cases(cases, workers=3))
+        self.assertEqual(
+            [(case, total) for case, total, _, _ in parallel],
+            [(case, total) for case, total, _, _ in serial],
+        )
+        self.assertEqual(serial[0][1], "63.46")
+        self.assertEqual(serial[4][1], "175.86")
+        self.assertIsNone(serial[5][1])
+        self.assertIn("Missing required files", serial[5][3])
+
+    def test_results_files(self):
+        """Test that totals and timings are written in case order."""
+        sales.process_test_cases(workers=2)
+        with open(sales.RESULTS_FILE, encoding="utf-8") as file:
+            lines = file.read().splitlines()
+        self.assertEqual(lines[0], "TOTAL")
+        self.assertEqual(lines[1:], [
+            "TC1\t63.46", "TC2\t91.56", "TC3\t119.66",
+            "TC4\t147.76", "TC5\t175.86",
+        ])
+        with open(sales.TIMINGS_FILE, encoding="utf-8") as file:
+            timings = file.read().splitlines()
+        self.assertEqual(
+            [line.split("\t")[0] for line in timings[1:]],
+            ["TC1", "TC2", "TC3", "TC4", "TC5"],
+        )
+
+
+class TestShardedAggregation(unittest.TestCase):
+    """Tests for aggregating one sales record in shards."""
+
+    def setUp(self):
+        titles = [item["title"] for item in CATALOGUE] + ["Unknown", ""]
+        self.sales_record = [
+            {"Product": titles[index % len(titles)],
+             "Quantity": index % 7 - 1}
+            for index in range(1000)
+        ]
+
+    def test_merge_quantities(self):
+        """Test that partial maps are summed in first-seen order."""
+        merged = sales.merge_quantities([
+            {"b": 1, "a": 2}, {}, {"c": 3, "a": -2},
+        ])
+        self.assertEqual(merged, {"b": 1, "a": 0, "c": 3})
+        self.assertEqual(list(merged), ["b", "a", "c"])
+
+    def test_shards_match_single_pass(self):
+        """Test that any sharding gives the single-pass aggregate."""
+        expected = sales.aggregate_quantities(self.sales_record)
+        self.assertNotIn("", expected)
+        for workers, shard_size in ((1, 10), (2, 1000), (2, 37), (4, 1)):
+            with self.subTest(workers=workers, shard_size=shard_size):
+                self.assertEqual(
+                    sales.aggregate_sharded(
+                        self.sales_record, workers, shard_size
+                    ),
+                    expected,
+                )
+
+    def test_sharded_total(self):
+        """Test that sharding does not change the total."""
+        catalogue = {item["title"]: item["price"] for item in CATALOGUE}
+        for money in ("cents", "float"):
+            with self.subTest(money=money):
+                prices = {
+                    title: get_engine(money).parse_price(str(price))
+                    for title, price in catalogue.items()
+                }
+                serial = sales.compute_total_sales(
+                    prices, self.sales_record, money=money
+                )
+                sharded = sales.compute_total_sales(
+                    prices, self.sales_record, workers=3, shard_size=64,
+                    money=money,
+                )
+                self.assertEqual(sharded, serial)
+                self.assertEqual(serial[1], ["Unknown"])
+
+
+if __name__ == "__main__":
+    unittest.main()
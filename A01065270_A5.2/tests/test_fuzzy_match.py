@@ -0,0 +1,143 @@
+import json
+import os
+import random
+import unittest
+
+import computeSales as sales
+from fuzzy_match import (
+    BKTree, apply_matches, catalogue_index, levenshtein, normalize_title,
+    suggest_matches,
+)
+from sales_analytics import ANALYTICS_DIR
+from tests.test_compute_sales import SalesTestCase
+
+
+class TestLevenshtein(unittest.TestCase):
+    """Tests for the edit distance."""
+
+    def test_distances(self):
+        """Test insertions, deletions and substitutions."""
+        for a, b, distance in (
+            ("", "", 0), ("", "abc", 3), ("kitten", "sitting", 3),
+            ("stawberry", "strawberry", 1), ("flaw", "lawn", 2),
+            ("crème", "creme", 1),
+        ):
+            with self.subTest(a=a, b=b):
+                self.assertEqual(levenshtein(a, b), distance)
+                self.assertEqual(levenshtein(b, a), distance)
+
+
+class TestBKTree(unittest.TestCase):
+    """Tests for the BK-tree index of catalogue titles."""
+
+    def test_matches_brute_force(self):
+        """Test that range queries find exactly the brute-force matches."""
+        rng = random.Random(11)
+        alphabet = "abcde "
+        titles = {
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 8)))
+            for _ in range(400)
+        }
+        tree = BKTree(titles)
+        keys = {normalize_title(title) for title in titles}
+        self.assertEqual(len(tree), len(keys))
+        for _ in range(100):
+            query = "".join(
+                rng.choice(alphabet) for _ in range(rng.randint(0, 9))
+            )
+            distances = sorted(
+                (levenshtein(normalize_title(query), key), key)
+                for key in keys
+            )
+            for max_distance in (0, 1, 2, 3):
+                expected = [
+                    match for match in distances if match[0] <= max_distance
+                ]
+                found = tree.search(query, max_distance)
+                self.assertEqual(
+                    sorted((d, normalize_title(t)) for d, t in found),
+                    expected, (query, max_distance),
+                )
+                self.assertEqual(found, sorted(found))
+
+    def test_normalized_titles(self):
+        """Test that case and spacing are ignored, keeping the first title."""
+        tree = BKTree(["Brown eggs", "brown  EGGS", "Green smoothie"])
+        self.assertEqual(len(tree), 2)
+        self.assertEqual(tree.search(" BROWN eggs", 0), [(0, "Brown eggs")])
+        self.assertEqual(BKTree().search("anything", 5), [])
+
+    def test_catalogue_index_is_cached(self):
+        """Test that a catalogue's tree is built once."""
+        catalogue = {"Brown eggs": 2810}
+        self.assertIs(catalogue_index(catalogue), catalogue_index(catalogue))
+        self.assertIsNot(
+            catalogue_index(catalogue), catalogue_index(dict(catalogue))
+        )
+
+
+class TestApplyMatches(unittest.TestCase):
+    """Tests for folding unknown products into catalogue products."""
+
+    def test_unambiguous_matches_only(self):
+        """Test that only close, unambiguous matches are applied."""
+        tree = BKTree(["Brown eggs", "Green tea", "Green pea"])
+        sales_map = {"Brown eggs": 1, "Brown egs": 2, "Green tza": 3,
+                     "Brwn egs": 4}
+        suggestions = suggest_matches(
+            tree, ["Brown egs", "Green tza", "Brwn egs"], 2
+        )
+        self.assertEqual(suggestions["Green tza"],
+                         [(1, "Green tea"), (2, "Green pea")])
+        adjusted, applied = apply_matches(sales_map, suggestions, 1)
+        self.assertEqual(applied, {"Brown egs": "Brown eggs",
+                                   "Green tza": "Green tea"})
+        self.assertEqual(adjusted, {"Brown eggs": 3, "Green tea": 3,
+                                    "Brwn egs": 4})
+        self.assertEqual(len(sales_map), 4)
+
+        tree.add("Green tzz")
+        suggestions = suggest_matches(tree, ["Green tza"], 1)
+        self.assertEqual(apply_matches(sales_map, suggestions, 1)[1], {})
+
+
+class TestAutoFixAnalytics(SalesTestCase):
+    """Tests for the breakdowns of auto-fixed sales."""
+
+    def test_analytics_match_total(self):
+        """Test that the breakdowns use the corrected product names."""
+        self.write_case("TC1", [
+            self.sale("Brown eggs", 1, sale_id=1, sale_date="01/12/23"),
+            self.sale("Brown egs", 2, sale_id=1, sale_date="01/12/23"),
+            self.sale("Brown egs", 1, sale_id=2, sale_date="02/12/23"),
+            self.sale("Unknown thing", 5, sale_id=2, sale_date="02/12/23"),
+        ])
+        _, total, _, _ = sales.process_test_case(
+            "TC1", analytics_format="json", match_distance=2,
+            auto_fix_distance=1,
+        )
+        self.assertEqual(total, "112.40")
+        with open(os.path.join(ANALYTICS_DIR, "TC1.json"),
+                  encoding="utf-8") as file:
+            report = json.load(file)
+        self.assertEqual(report["products"], [
+            {"product": "Brown eggs", "quantity": 4,
+             "unit_price": "28.10", "amount": "112.40"},
+        ])
+        self.assertEqual(
+            [row["amount"] for row in report["dates"]], ["84.30", "28.10"]
+        )
+        self.assertEqual(
+            [row["amount"] for row in report["sales"]], ["84.30", "28.10"]
+        )
+        self.assertEqual(report["invalid_products"], [
+            {"product": "Unknown thing", "quantity": 5, "entries": 1},
+        ])
+
+        _, plain, _, _ = sales.process_test_case("TC1",
+                                                 analytics_format="json")
+        self.assertEqual(plain, "28.10")
+
+
+if __name__ == "__main__":
+    unittest.main()
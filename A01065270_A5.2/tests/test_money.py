@@ -0,0 +1,140 @@
+import json
+import random
+import unittest
+
+import computeSales as sales
+from money import (
+    format_minor_units, get_engine, minor_units_subtotal,
+    parse_product_list, to_minor_units,
+)
+from sales_analytics import analyse_sales
+from tests.test_compute_sales import SalesTestCase
+
+
+class TestMinorUnits(unittest.TestCase):
+    """Tests for the integer-cents conversions."""
+
+    def test_to_minor_units(self):
+        """Test that prices are converted without binary rounding."""
+        self.assertEqual(to_minor_units("28.1"), 2810)
+        self.assertEqual(to_minor_units("0.29"), 29)
+        self.assertEqual(to_minor_units(3), 300)
+        self.assertEqual(to_minor_units("-4.5"), -450)
+        self.assertEqual(to_minor_units("0.125"), 12)  # Half to even
+        self.assertEqual(to_minor_units("0.135"), 14)
+        self.assertEqual(to_minor_units(1.1), 110)
+        with self.assertRaises(ValueError):
+            to_minor_units("twelve")
+
+    def test_format_minor_units(self):
+        """Test the decimal strings of cent amounts."""
+        self.assertEqual(format_minor_units(0), "0.00")
+        self.assertEqual(format_minor_units(5), "0.05")
+        self.assertEqual(format_minor_units(248186), "2481.86")
+        self.assertEqual(format_minor_units(-5), "-0.05")
+        self.assertEqual(format_minor_units(-1234, digits=0), "-1234")
+
+    def test_subtotal(self):
+        """Test that fractional quantities round to whole cents."""
+        self.assertEqual(minor_units_subtotal(2810, 3), 8430)
+        self.assertEqual(minor_units_subtotal(2810, 1.5), 4215)
+        self.assertEqual(minor_units_subtotal(2815, 0.5), 1408)
+        self.assertEqual(minor_units_subtotal(2825, 0.5), 1412)
+        self.assertEqual(minor_units_subtotal(1999, 0.1 + 0.2), 600)
+        for quantity in (float("nan"), float("inf"), "2"):
+            with self.subTest(quantity=quantity):
+                with self.assertRaises(ValueError):
+                    minor_units_subtotal(2810, quantity)
+
+
+class TestEngines(unittest.TestCase):
+    """Tests comparing the cents and float engines on the same input."""
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.text = json.dumps([
+            {"title": f"P{index}", "price": rng.randrange(1, 10000) / 100}
+            for index in range(50)
+        ])
+        self.quantities = {
+            f"P{rng.randrange(60)}": rng.randint(-2, 40) for _ in range(200)
+        }
+
+    def catalogue(self, money):
+        """Parses the product list with an engine's prices."""
+        parse_price = get_engine(money).parse_price
+        return {
+            item["title"]: parse_price(item["price"])
+            for item in parse_product_list(self.text)
+        }
+
+    def test_same_totals(self):
+        """Test that both engines agree to the cent on the same sales."""
+        results = {
+            money: sales.price_quantities(
+                self.catalogue(money), self.quantities, money
+            )
+            for money in ("cents", "float")
+        }
+        self.assertEqual(
+            get_engine("cents").format(results["cents"][0]),
+            get_engine("float").format(results["float"][0]),
+        )
+        self.assertEqual(results["cents"][1], results["float"][1])
+        self.assertTrue(results["cents"][1])
+
+    def test_exact_cents(self):
+        """Test a total that binary floating point gets wrong."""
+        catalogue = {"Candy": to_minor_units("0.1")}
+        total, _ = sales.price_quantities(catalogue, {"Candy": 3})
+        self.assertEqual(total, 30)
+        self.assertEqual(format_minor_units(total), "0.30")
+
+    def test_fractional_quantities(self):
+        """Test that fractional quantities are priced by both engines."""
+        quantities = {"P1": 1.5, "P2": 0.25, "P3": float("nan")}
+        for money in ("cents", "float"):
+            with self.subTest(money=money):
+                catalogue = self.catalogue(money)
+                total, invalid = sales.price_quantities(
+                    catalogue, dict(quantities, P3=2), money
+                )
+                expected = (
+                    catalogue["P1"] * 1.5 + catalogue["P2"] * 0.25
+                    + catalogue["P3"] * 2
+                )
+                self.assertAlmostEqual(float(total), expected, delta=1)
+                self.assertEqual(invalid, [])
+        _, invalid = sales.price_quantities(self.catalogue("cents"),
+                                            quantities)
+        self.assertEqual(invalid, ["P3"])
+
+
+class TestFractionalSales(SalesTestCase):
+    """Tests for sales files with fractional quantities."""
+
+    def test_process_test_case(self):
+        """Test that a fractional quantity is priced instead of failing."""
+        self.write_case("TC1", [
+            self.sale("Brown eggs", 1.5),
+            self.sale("Green smoothie", 2),
+            self.sale("Sweet fresh stawberry", 0.4),
+        ])
+        for money, expected in (("cents", "89.29"), ("float", "89.29")):
+            with self.subTest(money=money):
+                _, total, _, message = sales.process_test_case(
+                    "TC1", money=money
+                )
+                self.assertEqual(total, expected, message)
+
+    def test_analytics(self):
+        """Test that the breakdowns price fractional quantities too."""
+        report = analyse_sales([
+            self.sale("Brown eggs", 1.5), self.sale("Brown eggs", 0.25),
+        ]).report({"Brown eggs": 2810})
+        self.assertEqual(report["products"][0]["amount"], "49.18")
+        self.assertEqual(report["sales"][0]["amount"], "49.18")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import csv
+import json
+import os
+import unittest
+
+from sales_analytics import analyse_sales, merge_analytics, write_report
+from tests.test_compute_sales import SalesTestCase
+
+PRICES = {"Brown eggs": 2810, "Green smoothie": 1768}
+SALES_RECORD = [
+    SalesTestCase.sale("Brown eggs", 2, sale_id=1, sale_date="01/12/23"),
+    SalesTestCase.sale("Green smoothie", 1, sale_id=1, sale_date="01/12/23"),
+    SalesTestCase.sale("Brown egs", 4, sale_id=2, sale_date="01/12/23"),
+    SalesTestCase.sale("Green smoothie", 3, sale_id=3, sale_date="02/12/23"),
+    SalesTestCase.sale("Brown egs", 1, sale_id=3, sale_date="02/12/23"),
+    {"SALE_ID": 4, "SALE_Date": "02/12/23", "Quantity": 5},  # No product
+]
+
+
+class TestSalesAnalytics(unittest.TestCase):
+    """Tests for the per-product, per-date and per-sale breakdowns."""
+
+    def test_report(self):
+        """Test the priced tables of one sales record."""
+        report = analyse_sales(SALES_RECORD).report(PRICES)
+        self.assertEqual(report["products"], [
+            {"product": "Brown eggs", "quantity": 2,
+             "unit_price": "28.10", "amount": "56.20"},
+            {"product": "Green smoothie", "quantity": 4,
+             "unit_price": "17.68", "amount": "70.72"},
+        ])
+        self.assertEqual(report["dates"], [
+            {"sale_date": "01/12/23", "quantity": 7, "amount": "73.88"},
+            {"sale_date": "02/12/23", "quantity": 4, "amount": "53.04"},
+        ])
+        self.assertEqual(report["sales"], [
+            {"sale_id": 1, "quantity": 3, "amount": "73.88"},
+            {"sale_id": 2, "quantity": 4, "amount": "0.00"},
+            {"sale_id": 3, "quantity": 4, "amount": "53.04"},
+        ])
+        self.assertEqual(report["invalid_products"], [
+            {"product": "Brown egs", "quantity": 5, "entries": 2},
+        ])
+
+    def test_float_engine(self):
+        """Test that the float engine formats the same amounts."""
+        prices = {title: price / 100 for title, price in PRICES.items()}
+        report = analyse_sales(SALES_RECORD).report(prices, money="float")
+        cents = analyse_sales(SALES_RECORD).report(PRICES)
+        self.assertEqual(report, cents)
+
+    def test_merged_shards(self):
+        """Test that merged shards give the single-pass breakdowns."""
+        expected = analyse_sales(SALES_RECORD).report(PRICES)
+        for size in (1, 2, 4):
+            with self.subTest(size=size):
+                merged = merge_analytics(
+                    analyse_sales(SALES_RECORD[start:start + size])
+                    for start in range(0, len(SALES_RECORD), size)
+                )
+                self.assertEqual(merged.report(PRICES), expected)
+
+
+class TestWriteReport(SalesTestCase):
+    """Tests for writing the breakdowns to files."""
+
+    def setUp(self):
+        super().setUp()
+        self.report = analyse_sales(SALES_RECORD).report(PRICES)
+
+    def test_csv(self):
+        """Test that each table is written to its own CSV file."""
+        write_report("TC1", self.report, "csv", "analytics")
+        with open(os.path.join("analytics", "TC1", "dates.csv"),
+                  encoding="utf-8", newline="") as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(rows[1], {
+            "sale_date": "02/12/23", "quantity": "4", "amount": "53.04",
+        })
+        self.assertEqual(
+            sorted(os.listdir(os.path.join("analytics", "TC1"))),
+            ["dates.csv", "invalid_products.csv", "products.csv",
+             "sales.csv"],
+        )
+
+    def test_json(self):
+        """Test that the report is written as one JSON document."""
+        write_report("TC1", self.report, "json", "analytics")
+        with open(os.path.join("analytics", "TC1.json"),
+                  encoding="utf-8") as file:
+            self.assertEqual(json.load(file), self.report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,24 @@
 """
 Initialization module for the application.
 
-Imports core classes to make them available at the package level.
+Makes the core classes available at the package level. They are imported
+on first use, so modules that do not need them (such as the service
+client in `app.service`) start without loading the storage backends.
 """
 
-from .base_classes.hotel import Hotel
-from .base_classes.customer import Customer
-from .base_classes.reservation import Reservation
+import importlib
+
+_EXPORTS = {
+    "Hotel": "app.base_classes.hotel",
+    "Customer": "app.base_classes.customer",
+    "Reservation": "app.base_classes.reservation",
+}
 
 __all__ = ["Hotel", "Customer", "Reservation"]  # Mark them as intended exports
+
+
+def __getattr__(name):
+    """Imports the core classes on first access."""
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,248 @@
+"""
+async_repository.py - Asyncio access to the stored collections.
+
+This module provides the `AsyncRepository` class, an asyncio counterpart of
+`Repository` for event-loop based frontends. Nothing blocks the event loop:
+
+- Blocking work (file I/O, waiting for locks) runs in one bounded thread
+  pool shared by every collection (`ASYNC_MAX_WORKERS` in
+  `app/config.py`).
+- Concurrent reads of a collection share a single load: while one reload
+  of the stored data is in flight, further readers wait for it instead of
+  starting their own.
+- Writes go through an `asyncio.Queue` served by one writer task per
+  collection. The writer takes every write waiting in the queue (up to
+  `ASYNC_WRITE_BATCH`) and commits them with a single backend write (see
+  `Repository.enqueue`).
+
+Example:
+    hotels = Hotel.async_repository()
+    created = await hotels.add(Hotel(hotel_id, "Sea View", "Cancún"))
+    hotel = await hotels.get(hotel_id)
+
+Operations spanning several collections, such as `Reservation.book`, can
+be run in the same thread pool with `run_blocking`.
+
+Author: José Manuel Romo
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import app.config as conf
+from app.repository import Repository
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Returns the thread pool that runs the blocking operations."""
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=conf.ASYNC_MAX_WORKERS,
+                thread_name_prefix="hotel-io",
+            )
+        return _executor
+
+
+async def run_blocking(function, *args, **kwargs):
+    """Runs a blocking call in the shared thread pool and awaits it."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), functools.partial(function, *args, **kwargs)
+    )
+
+
+class AsyncRepository:
+    """Awaitable reads and batched writes of one model's collection."""
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, model):
+        """Initializes the asyncio access to `model`'s repository."""
+        self.model = model
+        self._loop = None
+        self._loading = None
+        self._queue = None
+        self._writer = None
+
+    @classmethod
+    def for_model(cls, model):
+        """Returns the shared asyncio repository of a model class."""
+        with cls._instances_lock:
+            repository = cls._instances.get(model)
+            if repository is None:
+                repository = cls._instances[model] = cls(model)
+            return repository
+
+    @classmethod
+    def reset_all(cls):
+        """Drops every asyncio repository (e.g. between tests)."""
+        with cls._instances_lock:
+            cls._instances.clear()
+
+    @property
+    def repository(self):
+        """Returns the underlying (blocking) repository."""
+        return Repository.for_model(self.model)
+
+    def _bind(self):
+        """Binds the queue and writer task to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._loading = None
+            self._queue = asyncio.Queue()
+            self._writer = None
+        return loop
+
+    async def refresh(self):
+        """Reloads the collection if the stored data changed.
+
+        Concurrent calls wait for the same reload.
+        """
+        loop = self._bind()
+        if self._loading is None:
+            self._loading = loop.run_in_executor(
+                get_executor(), self.repository.refresh
+            )
+            self._loading.add_done_callback(self._loaded)
+        await asyncio.shield(self._loading)
+
+    def _loaded(self, future):
+        """Forgets a finished reload, so the next read checks again."""
+        if self._loading is future:
+            self._loading = None
+
+    async def get(self, record_id):
+        """Returns the record with the given primary key, or None."""
+        await self.refresh()
+        return await run_blocking(self.repository.get, record_id)
+
+    async def contains(self, record_id):
+        """Checks whether a record with the given primary key exists."""
+        await self.refresh()
+        return await run_blocking(self.repository.contains, record_id)
+
+    async def all(self):
+        """Returns every record, in storage order."""
+        await self.refresh()
+        return await run_blocking(self.repository.all)
+
+    async def find_by(self, field, value):
+        """Returns the records whose `field` equals `value`."""
+        await self.refresh()
+        return await run_blocking(self.repository.find_by, field, value)
+
+    async def add(self, record):
+        """Adds and persists a record; False if its key already exists."""
+        return await self._write("add", record)
+
+    async def update(self, record_id, **changes):
+        """Applies non-empty field changes to a record and persists them.
+
+        Returns the updated record, or None if the key does not exist.
+        """
+        return await self._write("update", record_id, **changes)
+
+    async def remove(self, record_id):
+        """Removes and persists a record; returns it, or None if absent."""
+        return await self._write("remove", record_id)
+
+    async def add_many(self, items):
+        """Adds many records; returns a `BulkResult`."""
+        return await self._write("add_many", items)
+
+    async def update_many(self, updates):
+        """Applies many field updates; returns a `BulkResult`."""
+        return await self._write("update_many", updates)
+
+    async def remove_many(self, record_ids):
+        """Removes many records; returns a `BulkResult`."""
+        return await self._write("remove_many", record_ids)
+
+    async def _write(self, name, /, *args, **kwargs):
+        """Queues a mutation for the writer task and awaits its result."""
+        loop = self._bind()
+        if self._writer is None or self._writer.done():
+            self._writer = loop.create_task(self._write_batches())
+        future = loop.create_future()
+        await self._queue.put((name, args, kwargs, future))
+        return await future
+
+    async def _write_batches(self):
+        """Commits the queued writes, a batch at a time."""
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < conf.ASYNC_WRITE_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                outcomes = await run_blocking(self._commit, batch)
+            except Exception as e:  # pylint: disable=broad-except
+                outcomes = [(e, None)] * len(batch)
+            for (_, _, _, future), (error, result) in zip(batch, outcomes):
+                if future.done():  # The caller stopped waiting
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            for _ in batch:
+                queue.task_done()
+
+    def _commit(self, batch):
+        """Commits a batch of mutations together (in a worker thread).
+
+        Returns an `(error, result)` pair per mutation.
+        """
+        repository = self.repository
+        futures = []
+        for name, args, kwargs, _ in batch:
+            try:
+                futures.append(repository.enqueue(
+                    repository.mutation(name, *args, **kwargs)
+                ))
+            except Exception as e:  # pylint: disable=broad-except
+                futures.append(e)
+        repository.commit_pending(
+            [future for future in futures if not isinstance(future, Exception)]
+        )
+        outcomes = []
+        for future in futures:
+            if isinstance(future, Exception):
+                outcomes.append((future, None))
+            elif future.exception() is not None:
+                outcomes.append((future.exception(), None))
+            else:
+                outcomes.append((None, future.result()))
+        return outcomes
+
+    async def flush(self):
+        """Waits until every queued write is committed."""
+        loop = asyncio.get_running_loop()
+        if self._queue is not None and self._loop is loop:
+            await self._queue.join()
+
+    async def close(self):
+        """Commits the queued writes and stops the writer task."""
+        await self.flush()
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,266 @@
+"""
+availability.py - Room availability of the hotels over date ranges.
+
+A dated reservation occupies one room of its hotel for every night from
+its check-in date up to, but not including, its check-out date. A hotel
+has a room free for a stay when, on every night of the stay, fewer
+reservations occupy it than the hotel has `rooms`.
+
+`AvailabilityIndex` is an index of the reservations (see `app.indexes`):
+the `Repository` keeps it up to date with every change. For each hotel it
+holds an `Occupancy`, a segment tree over the nights, which adds a stay
+and finds the busiest night of a date range in time logarithmic in the
+range of dates, whatever the number of reservations. (An interval tree
+would find the reservations overlapping a stay, but not how many of them
+overlap on the same night, which is what room capacity depends on.)
+
+Reservations without valid dates (such as those stored before dates were
+introduced) do not occupy any room.
+
+`StagedAvailability` follows the occupancy while a transaction stages
+several reservations, so each one is checked against the others too.
+
+Author: José Manuel Romo
+"""
+
+from datetime import date
+
+from app.indexes import Index
+
+DAY_BITS = 22  # Nights are date ordinals, and date.max.toordinal() < 2**22
+
+
+def parse_date(text):
+    """Returns the date of an ISO 8601 string (`YYYY-MM-DD`).
+
+    Raises `ValueError` if the string is not a valid date.
+    """
+    if not isinstance(text, str):
+        raise ValueError(f"Invalid date: {text!r}")
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Invalid date: {text!r}") from None
+
+
+def stay_nights(check_in, check_out):
+    """Returns the nights of a stay as a `(start, end)` range of ordinals.
+
+    Raises `ValueError` if a date is invalid or the stay is empty.
+    """
+    start = parse_date(check_in).toordinal()
+    end = parse_date(check_out).toordinal()
+    if end <= start:
+        raise ValueError(
+            f"Check-out {check_out} must be after check-in {check_in}."
+        )
+    return start, end
+
+
+def reservation_stay(record, field="hotel_id"):
+    """Returns the `(hotel_id, start, end)` stay of a reservation, or None.
+
+    Reservations without valid dates occupy no room and have no stay.
+    """
+    try:
+        return (getattr(record, field),
+                *stay_nights(record.check_in, record.check_out))
+    except ValueError:
+        return None
+
+
+class Occupancy:
+    """The number of rooms occupied on each night at one hotel.
+
+    A sparse segment tree over the nights `[0, 2**DAY_BITS)`: node 1
+    covers every night and node `n` has children `2n` and `2n + 1`. Each
+    node stores the count added to its whole range (`_added`) and the
+    highest count of any night in its range (`_peak`); nodes whose range
+    is empty are not stored.
+    """
+
+    def __init__(self):
+        """Initializes an occupancy with every night free."""
+        self._added = {}
+        self._peak = {}
+
+    def __bool__(self):
+        return bool(self._peak)
+
+    def copy(self):
+        """Returns an independent copy of the occupancy."""
+        occupancy = Occupancy()
+        occupancy._added = dict(self._added)
+        occupancy._peak = dict(self._peak)
+        return occupancy
+
+    def add(self, start, end, count=1):
+        """Adds `count` occupied rooms to the nights `[start, end)`."""
+        self._add(1, 0, 1 << DAY_BITS, start, end, count)
+
+    def remove(self, start, end, count=1):
+        """Frees `count` rooms on the nights `[start, end)`."""
+        self._add(1, 0, 1 << DAY_BITS, start, end, -count)
+
+    def peak(self, start, end):
+        """Returns the most rooms occupied on a night of `[start, end)`."""
+        return self._max(1, 0, 1 << DAY_BITS, start, end)
+
+    def _add(self, node, low, high, start, end, count):
+        """Adds `count` to the nights of `[start, end)` under `node`."""
+        if start <= low and high <= end:
+            added = self._added.get(node, 0) + count
+            peak = self._peak.get(node, 0) + count
+        else:
+            middle = (low + high) // 2
+            if start < middle:
+                self._add(2 * node, low, middle, start, end, count)
+            if end > middle:
+                self._add(2 * node + 1, middle, high, start, end, count)
+            added = self._added.get(node, 0)
+            peak = added + max(
+                self._peak.get(2 * node, 0), self._peak.get(2 * node + 1, 0)
+            )
+        if peak:
+            self._added[node] = added
+            self._peak[node] = peak
+        else:  # Counts never go below zero, so the whole range is free
+            self._added.pop(node, None)
+            self._peak.pop(node, None)
+
+    def _max(self, node, low, high, start, end):
+        """Returns the peak of the nights of `[start, end)` under `node`."""
+        if node not in self._peak:
+            return 0
+        if start <= low and high <= end:
+            return self._peak[node]
+        middle = (low + high) // 2
+        peak = 0
+        if start < middle:
+            peak = self._max(2 * node, low, middle, start, end)
+        if end > middle:
+            peak = max(
+                peak, self._max(2 * node + 1, middle, high, start, end)
+            )
+        return self._added.get(node, 0) + peak
+
+
+class AvailabilityIndex(Index):
+    """The occupancy of each hotel by the dated reservations."""
+
+    def __init__(self, field="hotel_id"):
+        """Initializes an index of the reservations by their `field`."""
+        super().__init__(field)
+
+    @property
+    def name(self):
+        return "availability"
+
+    def clear(self):
+        self._hotels = {}  # hotel_id -> Occupancy
+        self._stays = {}   # record_id -> (hotel_id, start, end)
+
+    def put(self, record_id, record):
+        stay = reservation_stay(record, self.field)
+        if stay is None:  # Undated or invalid: occupies no room
+            self.discard(record_id)
+            return
+        if self._stays.get(record_id) == stay:
+            return
+        self.discard(record_id)
+        hotel_id, start, end = stay
+        occupancy = self._hotels.get(hotel_id)
+        if occupancy is None:
+            occupancy = self._hotels[hotel_id] = Occupancy()
+        occupancy.add(start, end)
+        self._stays[record_id] = stay
+
+    def discard(self, record_id):
+        stay = self._stays.pop(record_id, None)
+        if stay is None:
+            return
+        hotel_id, start, end = stay
+        occupancy = self._hotels[hotel_id]
+        occupancy.remove(start, end)
+        if not occupancy:
+            del self._hotels[hotel_id]
+
+    def stay(self, record_id):
+        """Returns the indexed stay of a reservation, or None."""
+        return self._stays.get(record_id)
+
+    def occupancy(self, hotel_id):
+        """Returns a copy of the occupancy of a hotel."""
+        occupancy = self._hotels.get(hotel_id)
+        return occupancy.copy() if occupancy else Occupancy()
+
+    def busiest(self, hotel_id):
+        """Returns the most rooms of a hotel occupied on any night."""
+        occupancy = self._hotels.get(hotel_id)
+        return occupancy.peak(0, 1 << DAY_BITS) if occupancy else 0
+
+    def occupied(self, hotel_id, check_in, check_out):
+        """Returns the most rooms of a hotel occupied on a night of a stay.
+
+        Raises `ValueError` if the dates do not form a valid stay.
+        """
+        start, end = stay_nights(check_in, check_out)
+        occupancy = self._hotels.get(hotel_id)
+        return occupancy.peak(start, end) if occupancy else 0
+
+    def is_available(self, hotel_id, rooms, check_in, check_out):
+        """Checks whether one of a hotel's `rooms` is free for a stay."""
+        return self.occupied(hotel_id, check_in, check_out) < rooms
+
+
+class StagedAvailability:
+    """The occupancy of the hotels as a transaction stages reservations.
+
+    Starts from an `AvailabilityIndex` holding the state the transaction
+    began with. The occupancy of a hotel is copied from it the first time
+    one of its stays changes, so the index itself is left untouched.
+    """
+
+    def __init__(self, index):
+        """Initializes the staged occupancy on top of `index`."""
+        self.index = index
+        self._hotels = {}  # hotel_id -> Occupancy, once changed
+        self._stays = {}   # record_id -> staged stay (None if undated)
+
+    def stay(self, record_id):
+        """Returns the staged stay of a reservation, or None."""
+        if record_id in self._stays:
+            return self._stays[record_id]
+        return self.index.stay(record_id)
+
+    def _occupancy(self, hotel_id):
+        """Returns the staged occupancy of a hotel."""
+        occupancy = self._hotels.get(hotel_id)
+        if occupancy is None:
+            occupancy = self._hotels[hotel_id] = self.index.occupancy(
+                hotel_id
+            )
+        return occupancy
+
+    def put(self, record_id, record, rooms=0):
+        """Stages a new or changed reservation.
+
+        Returns False, and stages nothing, if its hotel (which has
+        `rooms` rooms) has no room free on some night of a new stay. A
+        stay that does not change is always kept.
+        """
+        old = self.stay(record_id)
+        new = reservation_stay(record, self.index.field)
+        if new == old:
+            return True
+        if old is not None:
+            self._occupancy(old[0]).remove(old[1], old[2])
+        if new is not None:
+            occupancy = self._occupancy(new[0])
+            if occupancy.peak(new[1], new[2]) >= rooms:
+                if old is not None:
+                    self._occupancy(old[0]).add(old[1], old[2])
+                return False
+            occupancy.add(new[1], new[2])
+        self._stays[record_id] = new
+        return True
@@ -2,7 +2,12 @@
 customer.py - A module for managing customer information.
 
 This module provides the `Customer` class, which handles creating, storing,
-retrieving, updating, and deleting customer records in a JSON file.
+retrieving, updating, and deleting customer records in a JSON file. Records
+are served from an indexed in-memory `Repository` that reloads the file only
+when it changes.
+
+Emails are unique: no two customers may have the same email, compared
+without case or surrounding whitespace (see `normalize_email`).
 
 Author: José Manuel Romo
 """
@@ -11,6 +16,21 @@ import json
 import os
 
 import app.config as conf
+from app import listing
+from app.async_repository import AsyncRepository
+from app.ids import IdAllocator
+from app.indexes import UniqueIndex, UniqueViolation
+from app.repository import Repository
+from app.schema import Schema, SchemaError
+from app.search import TextIndex
+from app.storage import formats
+from app.storage.formats import FormatError
+from app.transaction import Transaction
+
+
+def normalize_email(email):
+    """Returns the form emails are compared in for uniqueness."""
+    return email.strip().casefold()
 
 
 class Customer:
@@ -18,6 +38,14 @@ class Customer:
     to manage customer records."""
 
     FILE_PATH = os.path.join("data", "Customers.json")
+    PRIMARY_KEY = "customer_id"
+    TABLE_NAME = "customers"
+    SCHEMA = Schema(customer_id=int, name=str, email=str)
+    FIELDS = SCHEMA.names
+    INDEXES = (
+        TextIndex("name", "email"),
+        UniqueIndex("email", normalize=normalize_email),
+    )
 
     def __init__(self, customer_id, name, email):
         """Initializes a new customer instance."""
@@ -33,6 +61,30 @@ class Customer:
             "email": self.email
         }
 
+    @classmethod
+    def from_dict(cls, data):
+        """Creates an instance from a stored dictionary.
+
+        Field types are coerced to `SCHEMA`; raises `SchemaError` if the
+        dictionary does not match it.
+        """
+        return cls(**cls.SCHEMA.coerce(data))
+
+    @classmethod
+    def repository(cls):
+        """Returns the shared in-memory repository of customers."""
+        return Repository.for_model(cls)
+
+    @classmethod
+    def async_repository(cls):
+        """Returns the shared asyncio repository of customers."""
+        return AsyncRepository.for_model(cls)
+
+    @classmethod
+    def id_allocator(cls):
+        """Returns the shared allocator of new customer IDs."""
+        return IdAllocator.for_model(cls)
+
     @classmethod
     def ensure_data_directory(cls):
         """Ensures the 'data' directory exists before writing the file."""
@@ -40,15 +92,21 @@ class Customer:
 
     @classmethod
     def save_to_file(cls, customers):
-        """Saves a list of Customer objects to a file in JSON format."""
+        """Saves a list of Customer objects to the file.
+
+        The file is written in the `DATA_FORMAT` of `app/config.py`.
+        Errors are logged and raised again, so the commit that saves the
+        collection fails instead of losing the changes.
+        """
         cls.ensure_data_directory()
         try:
-            with open(cls.FILE_PATH, "w", encoding="utf-8") as f:
-                json.dump(
-                    [customer.to_dict() for customer in customers], f, indent=4
-                )
-        except IOError as e:
+            formats.save(
+                cls.FILE_PATH, [customer.to_dict() for customer in customers],
+                cls.SCHEMA,
+            )
+        except (IOError, FormatError) as e:
             conf.debug_log(f"Error saving customers: {e}")
+            raise
 
     @classmethod
     def load_from_file(cls):
@@ -58,65 +116,169 @@ class Customer:
         if not os.path.exists(cls.FILE_PATH):
             return []
         try:
-            with open(cls.FILE_PATH, "r", encoding="utf-8") as f:
-                return [cls(**customer) for customer in json.load(f)]
-        except (IOError, json.JSONDecodeError) as e:
+            data = formats.load(cls.FILE_PATH)
+        except (IOError, json.JSONDecodeError, FormatError) as e:
             conf.debug_log(f"Error loading customers: {e}")
             return []
+        customers = []
+        for customer in data:  # A bad record is skipped, not the collection
+            try:
+                customers.append(cls.from_dict(customer))
+            except SchemaError as e:
+                conf.debug_log(f"Skipping invalid customer {customer!r}: {e}")
+        return customers
 
     @classmethod
     def create_customer(cls, customer_id, name, email):
-        """Creates a new customer and prevents duplicate IDs."""
-        customers = cls.load_from_file()
-        if any(cust.customer_id == customer_id for cust in customers):
+        """Creates a new customer and prevents duplicate IDs and emails."""
+        new_customer = cls(customer_id, name, email)
+        try:
+            added = cls.repository().add(new_customer)
+        except UniqueViolation as e:
+            conf.debug_log(f"Customer ID {customer_id} not created: {e}.")
+            return False
+        if not added:
             conf.debug_log(
                 f"Customer ID {customer_id}"
                 " already exists. Choose a different ID."
             )
             return False
-
-        new_customer = cls(customer_id, name, email)
-        customers.append(new_customer)
-        cls.save_to_file(customers)
         return new_customer
 
     @classmethod
     def delete_customer(cls, customer_id):
         """Deletes a customer by ID if it exists."""
-        customers = cls.load_from_file()
-        new_customers = [
-            cust for cust in customers if cust.customer_id != customer_id
-        ]
-
-        if len(new_customers) == len(customers):  # No customer removed
+        if cls.repository().remove(customer_id) is None:  # None removed
             conf.debug_log(f"Customer ID {customer_id} not found.")
             return False
 
-        cls.save_to_file(new_customers)
         conf.debug_log(f"Customer ID {customer_id} deleted.")
         return True
 
+    @classmethod
+    def delete_customer_with_reservations(cls, customer_id):
+        """Deletes a customer and cancels its reservations atomically.
+
+        Both files are written in a single transaction, so either the
+        customer and all its reservations are removed, or nothing is.
+        """
+        # Imported here because reservation.py imports this module.
+        from app.base_classes.reservation import (  # pylint: disable=C0415
+            Reservation,
+        )
+
+        with Transaction(cls, Reservation) as tx:
+            if tx.remove(cls, customer_id) is None:
+                conf.debug_log(f"Customer ID {customer_id} not found.")
+                return False
+            canceled = [
+                res.reservation_id
+                for res in tx.find_by(Reservation, "customer_id", customer_id)
+            ]
+            for reservation_id in canceled:
+                tx.remove(Reservation, reservation_id)
+
+        conf.debug_log(
+            f"Customer ID {customer_id} deleted with "
+            f"{len(canceled)} reservations."
+        )
+        return True
+
+    @classmethod
+    def bulk_create(cls, customers):
+        """Creates many customers with a single save.
+
+        `customers` holds Customer instances or dicts of their fields.
+        Returns a `BulkResult` with the created customers and a
+        `(customer_id, reason)` tuple for each rejected one.
+        """
+        result = cls.repository().add_many(customers)
+        for customer_id, reason in result.failed:
+            conf.debug_log(
+                f"Customer ID {customer_id} not created: {reason}."
+            )
+        return result
+
+    @classmethod
+    def bulk_update(cls, updates):
+        """Updates many customers with a single save.
+
+        `updates` maps customer IDs to dicts of field changes. Returns a
+        `BulkResult` with the updated customers and the rejected IDs.
+        """
+        result = cls.repository().update_many(updates)
+        for customer_id, reason in result.failed:
+            conf.debug_log(
+                f"Customer ID {customer_id} not updated: {reason}."
+            )
+        return result
+
+    @classmethod
+    def bulk_delete(cls, customer_ids):
+        """Deletes many customers by ID with a single save.
+
+        Returns a `BulkResult` with the deleted customers and the IDs
+        that were not found.
+        """
+        result = cls.repository().remove_many(customer_ids)
+        for customer_id, reason in result.failed:
+            conf.debug_log(
+                f"Customer ID {customer_id} not deleted: {reason}."
+            )
+        return result
+
     @classmethod
     def find_by_id(cls, customer_id):
         """Finds a customer by ID and returns an instance if found."""
-        customers = cls.load_from_file()
-        for cust in customers:
-            if cust.customer_id == customer_id:
-                return cust
-        return None
+        return cls.repository().get(customer_id)
+
+    @classmethod
+    def search(cls, query, fields=None, prefix=True):
+        """Returns the customers whose name or email matches a query.
+
+        Every word of the query must start a word of the searched
+        `fields` ("name", "email" or both), ignoring case and accents;
+        with `prefix=False` whole words must match.
+        """
+        return cls.repository().search(query, fields, prefix)
+
+    @classmethod
+    def find_by_email(cls, email):
+        """Finds the customer with an email (ignoring case), or None."""
+        repository = cls.repository()
+        with repository.lock:
+            repository.refresh()
+            keys = repository.indexes["unique_email"].lookup(email)
+            return repository.get(keys[0]) if keys else None
+
+    @classmethod
+    def find_reservations(cls, customer_id):
+        """Returns the reservations of a customer, using the index."""
+        # Imported here because reservation.py imports this module.
+        from app.base_classes.reservation import (  # pylint: disable=C0415
+            Reservation,
+        )
+
+        return Reservation.repository().find_by("customer_id", customer_id)
+
+    def reservations(self):
+        """Returns the reservations of this customer."""
+        return Customer.find_reservations(self.customer_id)
 
     def save(self):
         """Saves this customer instance to the database."""
-        customers = Customer.load_from_file()
-        if any(cust.customer_id == self.customer_id for cust in customers):
+        try:
+            added = Customer.repository().add(self)
+        except UniqueViolation as e:
+            conf.debug_log(f"Customer {self.customer_id} not saved: {e}.")
+            return False
+        if not added:
             conf.debug_log(
                 f"Customer ID {self.customer_id}"
                 " already exists. Use `update()` instead."
             )
             return False
 
-        customers.append(self)
-        Customer.save_to_file(customers)
         conf.debug_log(f"Customer {self.name} saved successfully.")
         return True
 
@@ -125,35 +287,48 @@ class Customer:
         return Customer.delete_customer(self.customer_id)
 
     @classmethod
-    def display_customers(cls):
-        """Displays all customers in a readable format."""
-        customers = cls.load_from_file()
-        if not customers:
-            conf.debug_log("No customers found.")
-            return
-
-        print("\n=== Customer List ===")
+    def text_lines(cls, customers):
+        """Formats customers as the lines of the text listing."""
         for cust in customers:
-            print(
+            yield (
                 f"ID: {cust.customer_id} "
                 f"| Name: {cust.name} "
                 f"| Email: {cust.email}"
             )
 
+    @classmethod
+    def display_customers(cls, offset=0, limit=None, after=None,
+                          filters=None, output_format="text", stream=None,
+                          streaming=False):
+        """Displays customers in a readable format.
+
+        Shows the page of customers selected by `offset`, `limit`, the
+        `after` cursor and the `{field: value}` filters, as text, JSON
+        Lines ("jsonl") or CSV. With `streaming=True` the customers are
+        read from storage one at a time (see `app.listing`).
+        """
+        customers = listing.page(cls, offset, limit, after, filters, streaming)
+        shown = listing.write_listing(
+            customers, cls.FIELDS, output_format, cls.text_lines,
+            "\n=== Customer List ===", stream,
+        )
+        if not shown:
+            conf.debug_log("No customers found.")
+
     def update(self, name=None, email=None):
         """Updates this specific customer's details in the database."""
-        customers = Customer.load_from_file()
-        for cust in customers:
-            if cust.customer_id == self.customer_id:
-                if name:
-                    cust.name = name
-                if email:
-                    cust.email = email
-                Customer.save_to_file(customers)
-                conf.debug_log(
-                    f"Customer {self.customer_id}"
-                    " updated successfully."
-                )
-                return True
-        conf.debug_log(f"Customer ID {self.customer_id} not found.")
-        return False
+        try:
+            updated = Customer.repository().update(
+                self.customer_id, name=name, email=email
+            )
+        except UniqueViolation as e:
+            conf.debug_log(f"Customer {self.customer_id} not updated: {e}.")
+            return False
+        if updated is None:
+            conf.debug_log(f"Customer ID {self.customer_id} not found.")
+            return False
+        conf.debug_log(
+            f"Customer {self.customer_id}"
+            " updated successfully."
+        )
+        return True
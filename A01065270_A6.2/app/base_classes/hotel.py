@@ -2,7 +2,13 @@
 hotel.py - A module for managing hotel information.
 
 This module provides the `Hotel` class, which handles creating, storing,
-retrieving, updating, and deleting hotel records in a JSON file.
+retrieving, updating, and deleting hotel records in a JSON file. Records are
+served from an indexed in-memory `Repository` that reloads the file only
+when it changes.
+
+A hotel's rooms are only lowered by `update_hotel`, which checks that no
+night has more of them reserved; the repository rejects lower room counts
+that come any other way.
 
 Author: José Manuel Romo
 """
@@ -11,27 +17,82 @@ import json
 import os
 
 import app.config as conf
+from app import listing
+from app.async_repository import AsyncRepository
+from app.ids import IdAllocator
+from app.indexes import ConstraintViolation, SecondaryIndex
+from app.repository import Repository, copy_record
+from app.schema import Field, Schema, SchemaError
+from app.search import TextIndex
+from app.storage import formats
+from app.storage.formats import FormatError
+from app.transaction import Transaction
 
 
 class Hotel:
     """Represents a hotel and provides methods to manage hotel records."""
 
     FILE_PATH = os.path.join("data", "Hotels.json")
+    PRIMARY_KEY = "hotel_id"
+    TABLE_NAME = "hotels"
+    DEFAULT_ROOMS = 1  # Rooms of the hotels stored before rooms were added
+    SCHEMA = Schema(hotel_id=int, name=str, location=str,
+                    rooms=Field(int, default=DEFAULT_ROOMS))
+    FIELDS = SCHEMA.names
+    INDEXED_FIELDS = ("location",)
+    INDEXES = (SecondaryIndex("location"), TextIndex("name", "location"))
 
-    def __init__(self, hotel_id, name, location):
+    def __init__(self, hotel_id, name, location, rooms=DEFAULT_ROOMS):
         """Initializes a new hotel instance."""
         self.hotel_id = hotel_id
         self.name = name
         self.location = location
+        self.rooms = rooms
 
     def to_dict(self):
         """Converts the hotel instance to a dictionary."""
         return {
             "hotel_id": self.hotel_id,
             "name": self.name,
-            "location": self.location
+            "location": self.location,
+            "rooms": self.rooms,
         }
 
+    @classmethod
+    def from_dict(cls, data):
+        """Creates an instance from a stored dictionary.
+
+        Field types are coerced to `SCHEMA`; raises `SchemaError` if the
+        dictionary does not match it.
+        """
+        return cls(**cls.SCHEMA.coerce(data))
+
+    @classmethod
+    def check_change(cls, old, new):
+        """Returns why the repository must not store a change, or None.
+
+        Lowering the rooms has to be checked against the reservations,
+        which the repository cannot do on its own.
+        """
+        if old is not None and new.rooms < old.rooms:
+            return "rooms are lowered with update_hotel"
+        return None
+
+    @classmethod
+    def repository(cls):
+        """Returns the shared in-memory repository of hotels."""
+        return Repository.for_model(cls)
+
+    @classmethod
+    def async_repository(cls):
+        """Returns the shared asyncio repository of hotels."""
+        return AsyncRepository.for_model(cls)
+
+    @classmethod
+    def id_allocator(cls):
+        """Returns the shared allocator of new hotel IDs."""
+        return IdAllocator.for_model(cls)
+
     @classmethod
     def ensure_data_directory(cls):
         """Ensures the 'data' directory exists before writing the file."""
@@ -39,13 +100,21 @@ class Hotel:
 
     @classmethod
     def save_to_file(cls, hotels):
-        """Saves a list of Hotel objects to a file in JSON format."""
+        """Saves a list of Hotel objects to the file.
+
+        The file is written in the `DATA_FORMAT` of `app/config.py`.
+        Errors are logged and raised again, so the commit that saves the
+        collection fails instead of losing the changes.
+        """
         cls.ensure_data_directory()
         try:
-            with open(cls.FILE_PATH, "w", encoding="utf-8") as f:
-                json.dump([hotel.to_dict() for hotel in hotels], f, indent=4)
-        except IOError as e:
+            formats.save(
+                cls.FILE_PATH, [hotel.to_dict() for hotel in hotels],
+                cls.SCHEMA,
+            )
+        except (IOError, FormatError) as e:
             print(f"Error saving hotels: {e}")
+            raise
 
     @classmethod
     def load_from_file(cls):
@@ -53,100 +122,255 @@ class Hotel:
         if not os.path.exists(cls.FILE_PATH):
             return []
         try:
-            with open(cls.FILE_PATH, "r", encoding="utf-8") as f:
-                return [cls(**hotel) for hotel in json.load(f)]
-        except (IOError, json.JSONDecodeError) as e:
+            data = formats.load(cls.FILE_PATH)
+        except (IOError, json.JSONDecodeError, FormatError) as e:
             print(f"Error loading hotels: {e}")
             return []
+        hotels = []
+        for hotel in data:  # A bad record is skipped, not the collection
+            try:
+                hotels.append(cls.from_dict(hotel))
+            except SchemaError as e:
+                print(f"Skipping invalid hotel {hotel!r}: {e}")
+        return hotels
 
     @classmethod
-    def create_hotel(cls, hotel_id, name, location):
+    def create_hotel(cls, hotel_id, name, location, rooms=DEFAULT_ROOMS):
         """Creates a new hotel and prevents duplicate IDs."""
-        hotels = cls.load_from_file()
-        if any(h.hotel_id == hotel_id for h in hotels):
+        new_hotel = cls(hotel_id, name, location, rooms)
+        if not cls.repository().add(new_hotel):
             conf.debug_log(
                 f"Hotel ID {hotel_id}"
                 " already exists. Choose a different ID."
             )
             return False
-
-        new_hotel = cls(hotel_id, name, location)
-        hotels.append(new_hotel)
-        cls.save_to_file(hotels)
         return new_hotel  # Return instance instead of True
 
+    @classmethod
+    def update_hotel(cls, hotel_id, name=None, location=None, rooms=None):
+        """Changes the given fields of a hotel; returns it, or None.
+
+        A change of `rooms` is made in a transaction with the
+        reservations; raises `ConstraintViolation` if more rooms than
+        `rooms` are reserved on some night.
+        """
+        if not rooms:
+            return cls.repository().update(
+                hotel_id, name=name, location=location
+            )
+        # Imported here because reservation.py imports this module.
+        from app.base_classes.reservation import (  # pylint: disable=C0415
+            Reservation,
+        )
+
+        with Transaction(cls, Reservation) as tx:
+            if not tx.contains(cls, hotel_id):
+                return None
+            reserved = Reservation.availability().busiest(hotel_id)
+            if reserved > rooms:
+                raise ConstraintViolation(
+                    f"hotel {hotel_id} has {reserved} rooms reserved "
+                    "on one night"
+                )
+            hotel = tx.update(
+                cls, hotel_id, name=name, location=location, rooms=rooms
+            )
+        return copy_record(hotel)
+
     @classmethod
     def delete_hotel(cls, hotel_id):
         """Deletes a hotel by ID if it exists."""
-        hotels = cls.load_from_file()
-        new_hotels = [hotel for hotel in hotels if hotel.hotel_id != hotel_id]
-
-        if len(new_hotels) == len(hotels):  # No hotel removed
+        if cls.repository().remove(hotel_id) is None:  # No hotel removed
             conf.debug_log(f"Hotel ID {hotel_id} not found.")
             return False
 
-        cls.save_to_file(new_hotels)
         conf.debug_log(f"Hotel ID {hotel_id} deleted.")
         return True
 
+    @classmethod
+    def delete_hotel_with_reservations(cls, hotel_id):
+        """Deletes a hotel and cancels its reservations atomically.
+
+        Both files are written in a single transaction, so either the
+        hotel and all its reservations are removed, or nothing is.
+        """
+        # Imported here because reservation.py imports this module.
+        from app.base_classes.reservation import (  # pylint: disable=C0415
+            Reservation,
+        )
+
+        with Transaction(cls, Reservation) as tx:
+            if tx.remove(cls, hotel_id) is None:
+                conf.debug_log(f"Hotel ID {hotel_id} not found.")
+                return False
+            canceled = [
+                res.reservation_id
+                for res in tx.find_by(Reservation, "hotel_id", hotel_id)
+            ]
+            for reservation_id in canceled:
+                tx.remove(Reservation, reservation_id)
+
+        conf.debug_log(
+            f"Hotel ID {hotel_id} deleted with {len(canceled)} reservations."
+        )
+        return True
+
+    @classmethod
+    def bulk_create(cls, hotels):
+        """Creates many hotels with a single save.
+
+        `hotels` holds Hotel instances or dicts of their fields.
+        Returns a `BulkResult` with the created hotels and a
+        `(hotel_id, reason)` tuple for each rejected one.
+        """
+        result = cls.repository().add_many(hotels)
+        for hotel_id, reason in result.failed:
+            conf.debug_log(
+                f"Hotel ID {hotel_id} not created: {reason}."
+            )
+        return result
+
+    @classmethod
+    def bulk_update(cls, updates):
+        """Updates many hotels with a single save.
+
+        `updates` maps hotel IDs to dicts of field changes. Returns a
+        `BulkResult` with the updated hotels and the rejected IDs.
+        """
+        result = cls.repository().update_many(updates)
+        for hotel_id, reason in result.failed:
+            conf.debug_log(
+                f"Hotel ID {hotel_id} not updated: {reason}."
+            )
+        return result
+
+    @classmethod
+    def bulk_delete(cls, hotel_ids):
+        """Deletes many hotels by ID with a single save.
+
+        Returns a `BulkResult` with the deleted hotels and the IDs
+        that were not found.
+        """
+        result = cls.repository().remove_many(hotel_ids)
+        for hotel_id, reason in result.failed:
+            conf.debug_log(
+                f"Hotel ID {hotel_id} not deleted: {reason}."
+            )
+        return result
+
     @classmethod
     def find_by_id(cls, hotel_id):
         """Finds a hotel by ID and returns an instance if found."""
-        hotels = cls.load_from_file()
-        for hotel in hotels:
-            if hotel.hotel_id == hotel_id:
-                return hotel
-        return None
+        return cls.repository().get(hotel_id)
+
+    @classmethod
+    def find_reservations(cls, hotel_id):
+        """Returns the reservations of a hotel, using the index."""
+        # Imported here because reservation.py imports this module.
+        from app.base_classes.reservation import (  # pylint: disable=C0415
+            Reservation,
+        )
+
+        return Reservation.repository().find_by("hotel_id", hotel_id)
+
+    @classmethod
+    def find_by_location(cls, location):
+        """Returns the hotels at a location, using the index."""
+        return cls.repository().find_by("location", location)
+
+    @classmethod
+    def search(cls, query, fields=None, prefix=True):
+        """Returns the hotels whose name or location matches a query.
+
+        Every word of the query must start a word of the searched
+        `fields` ("name", "location" or both), ignoring case and accents;
+        with `prefix=False` whole words must match.
+        """
+        return cls.repository().search(query, fields, prefix)
+
+    @classmethod
+    def find_available(cls, location, check_in, check_out):
+        """Returns the hotels at a location with a room free for a stay.
+
+        `check_in` and `check_out` are ISO dates (`YYYY-MM-DD`); raises
+        `ValueError` if they do not form a valid stay. Each hotel is
+        checked against the availability index of the reservations, in
+        time logarithmic in the range of dates.
+        """
+        # Imported here because reservation.py imports this module.
+        from app.base_classes.reservation import (  # pylint: disable=C0415
+            Reservation,
+        )
+
+        hotels = cls.find_by_location(location)
+        repository = Reservation.repository()
+        with repository.lock:
+            availability = Reservation.availability()
+            return [
+                hotel for hotel in hotels
+                if availability.is_available(
+                    hotel.hotel_id, hotel.rooms, check_in, check_out
+                )
+            ]
+
+    def reservations(self):
+        """Returns the reservations of this hotel."""
+        return Hotel.find_reservations(self.hotel_id)
 
     def save(self):
         """Saves this hotel instance to the database."""
-        hotels = Hotel.load_from_file()
-        if any(h.hotel_id == self.hotel_id for h in hotels):
+        if not Hotel.repository().add(self):
             conf.debug_log(
                 f"Hotel ID {self.hotel_id} already exists."
                 " Use `update()` instead."
             )
             return False
 
-        hotels.append(self)
-        Hotel.save_to_file(hotels)
         conf.debug_log(f"Hotel {self.name} saved successfully.")
         return True
 
-    def update(self, name=None, location=None):
+    def update(self, name=None, location=None, rooms=None):
         """Updates this specific hotel's details in the database."""
-        hotels = Hotel.load_from_file()
-        for hotel in hotels:
-            if hotel.hotel_id == self.hotel_id:
-                if name:
-                    hotel.name = name
-                if location:
-                    hotel.location = location
-                Hotel.save_to_file(hotels)
-                conf.debug_log(
-                    f"Hotel {self.hotel_id} updated successfully."
-                )
-                return True
-        conf.debug_log(f"Hotel ID {self.hotel_id} not found.")
-        return False
+        try:
+            updated = Hotel.update_hotel(self.hotel_id, name, location, rooms)
+        except ConstraintViolation as e:
+            conf.debug_log(f"Hotel {self.hotel_id} not updated: {e}.")
+            return False
+        if updated is None:
+            conf.debug_log(f"Hotel ID {self.hotel_id} not found.")
+            return False
+        conf.debug_log(f"Hotel {self.hotel_id} updated successfully.")
+        return True
 
     def delete(self):
         """Deletes this specific hotel from the database."""
         return Hotel.delete_hotel(self.hotel_id)
 
     @classmethod
-    def display_hotels(cls):
-        """Displays all hotels in a readable format."""
-        hotels = cls.load_from_file()
-        if not hotels:
-            conf.debug_log("No hotels found.")
-            return
-
-        print("\n=== Available Hotels ===")
+    def text_lines(cls, hotels):
+        """Formats hotels as the lines of the text listing."""
         for hotel in hotels:
             hex_id = f"0x{hotel.hotel_id:04X}"
-            print(
+            yield (
                 f"ID: {hex_id} "
                 f"| Name: {hotel.name} "
                 f"| Location: {hotel.location}"
             )
+
+    @classmethod
+    def display_hotels(cls, offset=0, limit=None, after=None, filters=None,
+                       output_format="text", stream=None, streaming=False):
+        """Displays hotels in a readable format.
+
+        Shows the page of hotels selected by `offset`, `limit`, the
+        `after` cursor and the `{field: value}` filters, as text, JSON
+        Lines ("jsonl") or CSV. With `streaming=True` the hotels are read
+        from storage one at a time (see `app.listing`).
+        """
+        hotels = listing.page(cls, offset, limit, after, filters, streaming)
+        shown = listing.write_listing(
+            hotels, cls.FIELDS, output_format, cls.text_lines,
+            "\n=== Available Hotels ===", stream,
+        )
+        if not shown:
+            conf.debug_log("No hotels found.")
@@ -3,14 +3,34 @@ reservation.py - A module for managing hotel reservations.
 
 This module provides the `Reservation` class, which handles creating, storing,
 retrieving, updating, and deleting hotel reservations in a JSON file.
+Records are served from an indexed in-memory `Repository` that reloads the
+file only when it changes.
+
+A reservation may be for a stay from `check_in` to `check_out` (ISO dates);
+`book`, `bulk_create` and `bulk_update` only store a stay if the hotel has
+a room free for every night of it (see `app.availability`), and the
+repository rejects stays that come any other way.
 
 Author: José Manuel Romo
 """
 
+import copy
 import json
 import os
 
 import app.config as conf
+from app import listing
+from app.async_repository import AsyncRepository
+from app.availability import (
+    AvailabilityIndex, StagedAvailability, reservation_stay, stay_nights,
+)
+from app.ids import IdAllocator
+from app.indexes import SecondaryIndex
+from app.repository import BulkResult, Repository, join
+from app.schema import Field, Schema, SchemaError
+from app.storage import formats
+from app.storage.formats import FormatError
+from app.transaction import Transaction
 from app.base_classes.hotel import Hotel
 from app.base_classes.customer import Customer
 
@@ -19,12 +39,31 @@ class Reservation:
     """Represents a reservation and provides methods to manage reservations."""
 
     FILE_PATH = os.path.join("data", "Reservations.json")
+    PRIMARY_KEY = "reservation_id"
+    TABLE_NAME = "reservations"
+    SCHEMA = Schema(reservation_id=int, customer_id=int, hotel_id=int,
+                    check_in=Field(str, default=""),
+                    check_out=Field(str, default=""))
+    FIELDS = SCHEMA.names
+    INDEXED_FIELDS = ("customer_id", "hotel_id")
+    INDEXES = (
+        SecondaryIndex("customer_id"),
+        SecondaryIndex("hotel_id"),
+        AvailabilityIndex("hotel_id"),
+    )
+
+    def __init__(self, reservation_id, customer_id, hotel_id, check_in="",
+                 check_out=""):
+        """Initializes a new reservation instance.
 
-    def __init__(self, reservation_id, customer_id, hotel_id):
-        """Initializes a new reservation instance."""
+        `check_in` and `check_out` are ISO dates, or empty for a
+        reservation without dates.
+        """
         self.reservation_id = reservation_id
         self.customer_id = customer_id
         self.hotel_id = hotel_id
+        self.check_in = check_in
+        self.check_out = check_out
 
     def to_dict(self):
         """Converts the reservation instance to a dictionary."""
@@ -32,8 +71,58 @@ class Reservation:
             "reservation_id": self.reservation_id,
             "customer_id": self.customer_id,
             "hotel_id": self.hotel_id,
+            "check_in": self.check_in,
+            "check_out": self.check_out,
         }
 
+    @classmethod
+    def from_dict(cls, data):
+        """Creates an instance from a stored dictionary.
+
+        Field types are coerced to `SCHEMA`; raises `SchemaError` if the
+        dictionary does not match it.
+        """
+        return cls(**cls.SCHEMA.coerce(data))
+
+    @classmethod
+    def check_change(cls, old, new):
+        """Returns why the repository must not store a change, or None.
+
+        A new or changed stay has to be checked against the rooms of its
+        hotel, which the repository cannot do on its own.
+        """
+        stay = reservation_stay(new)
+        if stay is not None and (old is None or reservation_stay(old) != stay):
+            return "stays are booked with book, bulk_create or bulk_update"
+        return None
+
+    @classmethod
+    def repository(cls):
+        """Returns the shared in-memory repository of reservations."""
+        return Repository.for_model(cls)
+
+    @classmethod
+    def async_repository(cls):
+        """Returns the shared asyncio repository of reservations."""
+        return AsyncRepository.for_model(cls)
+
+    @classmethod
+    def id_allocator(cls):
+        """Returns the shared allocator of new reservation IDs."""
+        return IdAllocator.for_model(cls)
+
+    @classmethod
+    def availability(cls):
+        """Returns the up-to-date `AvailabilityIndex` of the reservations.
+
+        Hold the repository's lock while using it to keep it from
+        changing in the meantime.
+        """
+        repository = cls.repository()
+        with repository.lock:
+            repository.refresh()
+            return repository.indexes["availability"]
+
     @classmethod
     def ensure_data_directory(cls):
         """Ensures the 'data' directory exists before writing the file."""
@@ -41,13 +130,21 @@ class Reservation:
 
     @classmethod
     def save_to_file(cls, reservations):
-        """Saves a list of Reservation objects to a file in JSON format."""
+        """Saves a list of Reservation objects to the file.
+
+        The file is written in the `DATA_FORMAT` of `app/config.py`.
+        Errors are logged and raised again, so the commit that saves the
+        collection fails instead of losing the changes.
+        """
         cls.ensure_data_directory()
         try:
-            with open(cls.FILE_PATH, "w", encoding="utf-8") as f:
-                json.dump([res.to_dict() for res in reservations], f, indent=4)
-        except IOError as e:
+            formats.save(
+                cls.FILE_PATH, [res.to_dict() for res in reservations],
+                cls.SCHEMA,
+            )
+        except (IOError, FormatError) as e:
             conf.debug_log(f"Error saving reservations: {e}")
+            raise
 
     @classmethod
     def load_from_file(cls):
@@ -57,67 +154,242 @@ class Reservation:
         if not os.path.exists(cls.FILE_PATH):
             return []
         try:
-            with open(cls.FILE_PATH, "r", encoding="utf-8") as f:
-                return [cls(**res) for res in json.load(f)]
-        except (IOError, json.JSONDecodeError) as e:
+            data = formats.load(cls.FILE_PATH)
+        except (IOError, json.JSONDecodeError, FormatError) as e:
             conf.debug_log(f"Error loading reservations: {e}")
             return []
+        reservations = []
+        for res in data:  # A bad record is skipped, not the collection
+            try:
+                reservations.append(cls.from_dict(res))
+            except SchemaError as e:
+                conf.debug_log(f"Skipping invalid reservation {res!r}: {e}")
+        return reservations
 
     @classmethod
     def create_reservation(cls, reservation_id, customer_id, hotel_id):
         """Creates a new reservation and prevents duplicate IDs."""
-        reservations = cls.load_from_file()
-        if any(res.reservation_id == reservation_id for res in reservations):
+        new_reservation = cls(reservation_id, customer_id, hotel_id)
+        if not cls.repository().add(new_reservation):
             conf.debug_log(
                 f"Reservation ID {reservation_id} already exists. "
                 "Please choose a different ID."
             )
             return False
+        return new_reservation
 
-        new_reservation = cls(reservation_id, customer_id, hotel_id)
-        reservations.append(new_reservation)
-        cls.save_to_file(reservations)
+    @classmethod
+    def book(cls, reservation_id, customer_id, hotel_id, check_in="",
+             check_out=""):
+        """Creates a reservation after checking its customer and hotel.
+
+        For a stay from `check_in` to `check_out` (ISO dates), the hotel
+        must also have a room free on every night of it; raises
+        `ValueError` if the dates do not form a valid stay. The three
+        collections are read and the reservation is written in one
+        transaction, so neither can change in the meantime.
+        """
+        if check_in or check_out:
+            stay_nights(check_in, check_out)
+        with Transaction(Customer, Hotel, cls) as tx:
+            if not tx.contains(Customer, customer_id):
+                conf.debug_log(f"Customer ID {customer_id} not found.")
+                return False
+            hotel = tx.get(Hotel, hotel_id)
+            if hotel is None:
+                conf.debug_log(f"Hotel ID {hotel_id} not found.")
+                return False
+            # The repository is locked, so its index holds the state the
+            # transaction began with, and nothing has been staged since.
+            availability = cls.availability()
+            if (check_in or check_out) and not availability.is_available(
+                hotel_id, hotel.rooms, check_in, check_out
+            ):
+                conf.debug_log(
+                    f"Hotel ID {hotel_id} has no room free from "
+                    f"{check_in} to {check_out}."
+                )
+                return False
+            new_reservation = cls(
+                reservation_id, customer_id, hotel_id, check_in, check_out
+            )
+            if not tx.add(new_reservation):
+                conf.debug_log(
+                    f"Reservation ID {reservation_id} already exists. "
+                    "Please choose a different ID."
+                )
+                return False
         return new_reservation
 
     @classmethod
     def cancel_reservation(cls, reservation_id):
         """Cancels a reservation by ID if it exists."""
-        reservations = cls.load_from_file()
-        new_reservations = [
-            res for res in reservations if res.reservation_id != reservation_id
-        ]
-
-        if len(new_reservations) == len(reservations):
+        if cls.repository().remove(reservation_id) is None:
             conf.debug_log(f"Reservation ID {reservation_id} not found.")
             return False
 
-        cls.save_to_file(new_reservations)
         conf.debug_log(f"Reservation ID {reservation_id} canceled.")
         return True
 
+    @staticmethod
+    def _stay_rejected(tx, staged, record):
+        """Stages the stay of a reservation; returns why it failed, or None.
+
+        `staged` is the `StagedAvailability` of the transaction `tx`.
+        """
+        if record.check_in or record.check_out:
+            try:
+                stay_nights(record.check_in, record.check_out)
+            except ValueError as e:
+                return f"invalid stay: {e}"
+        record_id = record.reservation_id
+        if reservation_stay(record) is None:
+            staged.put(record_id, record)
+            return None
+        hotel = tx.get(Hotel, record.hotel_id)
+        if hotel is None:
+            return f"hotel {record.hotel_id} not found"
+        if not staged.put(record_id, record, hotel.rooms):
+            return (
+                f"no room free from {record.check_in} to {record.check_out}"
+            )
+        return None
+
+    @classmethod
+    def bulk_create(cls, reservations):
+        """Creates many reservations with a single save.
+
+        `reservations` holds Reservation instances or dicts of their fields.
+        Returns a `BulkResult` with the created reservations and a
+        `(reservation_id, reason)` tuple for each rejected one. Stays are
+        checked against the rooms of their hotel, counting the stays
+        created before them.
+        """
+        reservations = list(reservations)
+        created, failed = [], []
+        with Transaction(Hotel, cls) as tx:
+            staged = StagedAvailability(cls.availability())
+            for item in reservations:
+                try:
+                    record = (
+                        cls.from_dict(item) if isinstance(item, dict)
+                        else copy.copy(item)
+                    )
+                except ValueError as e:
+                    failed.append((
+                        item.get(cls.PRIMARY_KEY), f"invalid fields: {e}"
+                    ))
+                    continue
+                if tx.contains(cls, record.reservation_id):
+                    failed.append((record.reservation_id, "already exists"))
+                    continue
+                reason = cls._stay_rejected(tx, staged, record)
+                if reason:
+                    failed.append((record.reservation_id, reason))
+                    continue
+                tx.add(record)
+                created.append(copy.copy(record))
+        result = BulkResult(created, failed)
+        for reservation_id, reason in result.failed:
+            conf.debug_log(
+                f"Reservation ID {reservation_id} not created: {reason}."
+            )
+        return result
+
+    @classmethod
+    def bulk_update(cls, updates):
+        """Updates many reservations with a single save.
+
+        `updates` maps reservation IDs to dicts of field changes. Returns a
+        `BulkResult` with the updated reservations and the rejected IDs.
+        Changed stays are checked against the rooms of their hotel, as in
+        `bulk_create`.
+        """
+        if isinstance(updates, dict):
+            updates = updates.items()
+        updates = list(updates)
+        fields = set(cls.FIELDS) - {cls.PRIMARY_KEY}
+        updated, failed = [], []
+        with Transaction(Hotel, cls) as tx:
+            staged = StagedAvailability(cls.availability())
+            for reservation_id, changes in updates:
+                record = tx.get(cls, reservation_id)
+                unknown = sorted(set(changes) - fields)
+                if record is None:
+                    failed.append((reservation_id, "not found"))
+                    continue
+                if unknown:
+                    failed.append((
+                        reservation_id,
+                        f"unknown fields: {', '.join(unknown)}",
+                    ))
+                    continue
+                record = copy.copy(record)
+                for field, value in changes.items():
+                    if value:
+                        setattr(record, field, value)
+                reason = cls._stay_rejected(tx, staged, record)
+                if reason:
+                    failed.append((reservation_id, reason))
+                    continue
+                updated.append(copy.copy(
+                    tx.update(cls, reservation_id, **changes)
+                ))
+        result = BulkResult(updated, failed)
+        for reservation_id, reason in result.failed:
+            conf.debug_log(
+                f"Reservation ID {reservation_id} not updated: {reason}."
+            )
+        return result
+
+    @classmethod
+    def bulk_delete(cls, reservation_ids):
+        """Deletes many reservations by ID with a single save.
+
+        Returns a `BulkResult` with the deleted reservations and the IDs
+        that were not found.
+        """
+        result = cls.repository().remove_many(reservation_ids)
+        for reservation_id, reason in result.failed:
+            conf.debug_log(
+                f"Reservation ID {reservation_id} not deleted: {reason}."
+            )
+        return result
+
     @classmethod
     def find_by_id(cls, reservation_id):
         """Finds a reservation by ID and returns an instance if found."""
-        reservations = cls.load_from_file()
-        for res in reservations:
-            if res.reservation_id == reservation_id:
-                return res
-        return None
+        return cls.repository().get(reservation_id)
+
+    @classmethod
+    def find_by_customer(cls, customer_id):
+        """Returns the reservations of a customer, using the index."""
+        return cls.repository().find_by("customer_id", customer_id)
+
+    @classmethod
+    def find_by_hotel(cls, hotel_id):
+        """Returns the reservations at a hotel, using the index."""
+        return cls.repository().find_by("hotel_id", hotel_id)
+
+    @classmethod
+    def rooms_occupied(cls, hotel_id, check_in, check_out):
+        """Returns the most rooms of a hotel reserved on a night of a stay.
+
+        Raises `ValueError` if the dates do not form a valid stay.
+        """
+        repository = cls.repository()
+        with repository.lock:
+            return cls.availability().occupied(hotel_id, check_in, check_out)
 
     def save(self):
         """Saves this reservation instance to the database."""
-        reservations = Reservation.load_from_file()
-        if any(
-            res.reservation_id == self.reservation_id for res in reservations
-        ):
+        if not Reservation.repository().add(self):
             conf.debug_log(
                 f"Reservation ID {self.reservation_id} already exists. "
                 f"Use `update()` instead."
             )
             return False
 
-        reservations.append(self)
-        Reservation.save_to_file(reservations)
         conf.debug_log(
             f"Reservation {self.reservation_id} saved successfully."
         )
@@ -128,21 +400,46 @@ class Reservation:
         return Reservation.cancel_reservation(self.reservation_id)
 
     @classmethod
-    def display_reservations(cls):
-        """Displays all reservations in a readable format."""
-        reservations = cls.load_from_file()
-        customers = {c.customer_id: c.name for c in Customer.load_from_file()}
-        hotels = {h.hotel_id: h.name for h in Hotel.load_from_file()}
+    def text_lines(cls, reservations):
+        """Formats reservations as text lines with customer and hotel names.
+
+        Names are joined a chunk of reservations at a time.
+        """
+        for chunk in listing.chunked(reservations, 1000):
+            customers = join(chunk, "customer_id", Customer)
+            hotels = join(chunk, "hotel_id", Hotel)
+            for (res, customer), (_, hotel) in zip(customers, hotels):
+                customer_name = (
+                    customer.name if customer else "Unknown Customer"
+                )
+                hotel_name = hotel.name if hotel else "Unknown Hotel"
+                stay = (
+                    f" | Stay: {res.check_in} to {res.check_out}"
+                    if res.check_in else ""
+                )
+                yield (
+                    f"Reservation ID: {res.reservation_id} | "
+                    f"Customer: {customer_name} | Hotel: {hotel_name}{stay}"
+                )
+
+    @classmethod
+    def display_reservations(cls, offset=0, limit=None, after=None,
+                             filters=None, output_format="text", stream=None,
+                             streaming=False):
+        """Displays reservations in a readable format.
 
-        if not reservations:
+        Shows the page of reservations selected by `offset`, `limit`, the
+        `after` cursor and the `{field: value}` filters, as text (with
+        customer and hotel names), JSON Lines ("jsonl") or CSV. With
+        `streaming=True` the reservations are read from storage one at a
+        time (see `app.listing`).
+        """
+        reservations = listing.page(
+            cls, offset, limit, after, filters, streaming
+        )
+        shown = listing.write_listing(
+            reservations, cls.FIELDS, output_format, cls.text_lines,
+            "\n=== Current Reservations ===", stream,
+        )
+        if not shown:
             conf.debug_log("No reservations found.")
-            return
-
-        print("\n=== Current Reservations ===")
-        for res in reservations:
-            customer_name = customers.get(res.customer_id, "Unknown Customer")
-            hotel_name = hotels.get(res.hotel_id, "Unknown Hotel")
-            print(
-                f"Reservation ID: {res.reservation_id} | "
-                f"Customer: {customer_name} | Hotel: {hotel_name}"
-            )
@@ -0,0 +1,266 @@
+"""
+batch.py - Running many operations in one process, persisting at checkpoints.
+
+This module provides:
+
+- `Batch`, a context manager that locks a set of collections and defers
+  their persistence: the operations run inside it (model methods,
+  transactions, commands) change the in-memory collections only, and the
+  changes are written at each `checkpoint()` and when the batch ends. A
+  checkpoint commits every collection at once, like a transaction (see
+  `StorageBackend.commit_transaction`).
+- `CommandShell`, which reads the commands of `app.commands` from a file or
+  interactively (see `run_commands.py`), one per line:
+
+      create_hotel "Grand Hotel" "New York"
+      update_hotel 7 location=Boston
+      cancel_reservation 12
+      display reservations --limit 10 --format csv
+
+  Arguments are given in order or as `name=value`; `display` takes the
+  options of the display scripts.
+
+While a batch runs, other processes wait to write its collections, as they
+would for a long transaction. If the batch ends with an exception, the
+changes since its last checkpoint are discarded.
+
+Example:
+    with Batch(Hotel, Customer, Reservation) as batch:
+        for ...:
+            Hotel.create_hotel(...)
+        batch.checkpoint()
+
+Author: José Manuel Romo
+"""
+
+import argparse
+import cmd
+import inspect
+import json
+import os
+import shlex
+from contextlib import ExitStack
+
+from app import listing
+from app.commands import COLLECTIONS, Dispatcher
+from app.service import CommandError
+from app.storage import get_backend
+
+INTEGER_PARAMS = ("rooms",)  # Besides the `_id` parameters
+
+
+class Batch:
+    """Defers the persistence of several collections to checkpoints."""
+
+    def __init__(self, *models):
+        """Initializes a batch over the given model classes."""
+        self.models = sorted(
+            set(models), key=lambda model: os.path.abspath(model.FILE_PATH)
+        )
+        self.backend = get_backend()
+        self._stack = None
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(discard=exc_type is not None)
+
+    @property
+    def active(self):
+        """Whether the batch has begun and not yet ended."""
+        return self._stack is not None
+
+    def begin(self):
+        """Locks and loads the collections and starts deferring writes."""
+        if self.active:
+            raise RuntimeError("Batch already begun.")
+        stack = ExitStack()
+        try:
+            for model in self.models:
+                repository = model.repository()
+                stack.enter_context(repository.lock)
+                stack.enter_context(self.backend.lock(model))
+                self.backend.recover(model)
+                repository.defer()
+        except BaseException:
+            for model in self.models:
+                model.repository().end_deferral()
+            stack.close()
+            raise
+        self._stack = stack
+
+    def checkpoint(self):
+        """Writes the changes made since the last checkpoint.
+
+        Returns the number of changes written.
+        """
+        if not self.active:
+            raise RuntimeError("Batch is not active.")
+        entries = []
+        for model in self.models:
+            repository = model.repository()
+            changes = repository.take_deferred()
+            if changes:
+                entries.append((model, repository.records, changes))
+        try:
+            if entries:
+                self.backend.commit_transaction(entries)
+        except BaseException:
+            for model, _, _ in entries:  # Memory is ahead of the storage
+                model.repository().invalidate()
+            raise
+        for model, _, _ in entries:
+            model.repository().persisted()
+        return sum(len(changes) for _, _, changes in entries)
+
+    def end(self, discard=False):
+        """Writes the remaining changes (unless discarded) and unlocks."""
+        if not self.active:
+            return
+        try:
+            if not discard:
+                self.checkpoint()
+        finally:
+            for model in self.models:
+                model.repository().end_deferral(discard)
+            stack, self._stack = self._stack, None
+            stack.close()
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+    """Argument parser reporting errors as `CommandError`."""
+
+    def error(self, message):
+        raise CommandError(f"{self.prog}: {message}")
+
+
+def _display_parser():
+    """Returns the parser of the `display` command's arguments."""
+    parser = _ArgumentParser(prog="display", add_help=False)
+    parser.add_argument("collection", choices=sorted(COLLECTIONS))
+    listing.add_arguments(parser)
+    return parser
+
+
+def parse_line(dispatcher, line):
+    """Parses a command line into a `(command, params)` pair.
+
+    Returns None for blank lines and comments. Parameters whose name ends
+    with `_id` or is in `INTEGER_PARAMS` are converted to integers. Raises
+    `CommandError` if the line is invalid.
+    """
+    try:
+        tokens = shlex.split(line, comments=True)
+    except ValueError as e:
+        raise CommandError(f"Invalid line: {e}") from e
+    if not tokens:
+        return None
+    command, args = tokens[0], tokens[1:]
+    if command == "display":
+        return command, vars(_display_parser().parse_args(args))
+
+    method = getattr(dispatcher, f"do_{command}", None)
+    if method is None:
+        raise CommandError(f"Unknown command: {command}")
+    names = list(inspect.signature(method).parameters)
+    params = {}
+    positional = []
+    for arg in args:
+        name, sep, value = arg.partition("=")
+        if sep and name in names:
+            params[name] = value
+        else:
+            positional.append(arg)
+    free = [name for name in names if name not in params]
+    if len(positional) > len(free):
+        raise CommandError(f"Too many arguments for {command}.")
+    params.update(zip(free, positional))
+
+    for name, value in params.items():
+        if name.endswith("_id") or name in INTEGER_PARAMS:
+            try:
+                params[name] = int(value)
+            except ValueError:
+                raise CommandError(f"{name} must be an integer.") from None
+    return command, params
+
+
+class CommandShell(cmd.Cmd):
+    """Runs command lines against a batch, one line at a time."""
+
+    intro = "Hotel commands; type 'help' for a list, 'quit' to leave."
+    prompt = "hotel> "
+
+    def __init__(self, batch, checkpoint_every=0, dispatcher=None,
+                 stdin=None, stdout=None):
+        """Initializes a shell over an active `Batch`.
+
+        With `checkpoint_every` > 0, a checkpoint follows every that many
+        successful commands. `stdin` is a file of commands to run instead
+        of reading them interactively.
+        """
+        super().__init__(stdin=stdin, stdout=stdout)
+        if stdin is not None:
+            self.use_rawinput = False
+            self.intro = None
+            self.prompt = ""
+        self.batch = batch
+        self.checkpoint_every = checkpoint_every
+        self.dispatcher = dispatcher or Dispatcher()
+        self.executed = 0
+        self.errors = 0
+
+    def emptyline(self):
+        """Ignores blank lines (instead of repeating the last command)."""
+
+    def default(self, line):
+        """Runs a command of `app.commands`."""
+        try:
+            parsed = parse_line(self.dispatcher, line)
+            if parsed is None:
+                return
+            command, params = parsed
+            result = self.dispatcher.execute(command, params)
+        except CommandError as e:
+            self.errors += 1
+            self.stdout.write(f"Error: {e}\n")
+            return
+        if command == "display":
+            self.stdout.write(result)
+        else:
+            self.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.executed += 1
+        every = self.checkpoint_every
+        if every and self.executed % every == 0:
+            self.batch.checkpoint()
+
+    def do_checkpoint(self, _arg):
+        """checkpoint: write the changes made so far."""
+        changes = self.batch.checkpoint()
+        self.stdout.write(f"Checkpoint: {changes} changes written.\n")
+
+    def do_quit(self, _arg):
+        """quit: write the remaining changes and leave."""
+        return True
+
+    def do_EOF(self, _arg):  # pylint: disable=invalid-name
+        """Leaves at the end of the input."""
+        if self.use_rawinput:
+            self.stdout.write("\n")
+        return True
+
+    def do_help(self, arg):
+        """help: list the commands."""
+        if arg:
+            super().do_help(arg)
+            return
+        self.stdout.write(
+            "Commands: " + ", ".join(self.dispatcher.commands())
+            + ", checkpoint, quit\n"
+            "Arguments are given in order or as name=value, e.g.\n"
+            '    create_hotel "Grand Hotel" "New York"\n'
+            "    update_customer 7 email=alice@example.com\n"
+            "    display hotels --limit 10 --filter location=Boston\n"
+        )
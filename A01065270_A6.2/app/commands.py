@@ -0,0 +1,208 @@
+"""
+commands.py - The commands of the command line scripts.
+
+The scripts (`create_hotel.py`, `display_hotels.py`, ...) run their work
+as named commands with JSON-compatible parameters and results, through
+`app.service.call`. A `Dispatcher` runs them, either in the hotel service
+or, when the service is not running, in the script's own process.
+
+Example:
+    Dispatcher().execute("create_hotel", {"name": "Sea View",
+                                          "location": "Cancún"})
+
+Author: José Manuel Romo
+"""
+
+import inspect
+import io
+
+from app import listing
+from app.base_classes.customer import Customer
+from app.base_classes.hotel import Hotel
+from app.base_classes.reservation import Reservation
+from app.indexes import ConstraintViolation, UniqueViolation
+from app.service import CommandError
+
+COLLECTIONS = {
+    "hotels": Hotel,
+    "customers": Customer,
+    "reservations": Reservation,
+}
+
+
+class Dispatcher:
+    """Runs the commands of the scripts by name.
+
+    Each command is a `do_<name>` method taking keyword arguments.
+    """
+
+    def __init__(self, streaming=False):
+        """Initializes a dispatcher.
+
+        With `streaming=True` listings are read straight from storage,
+        which suits a process running a single command; otherwise they
+        come from the in-memory repositories, as in the hotel service.
+        """
+        self.streaming = streaming
+
+    def commands(self):
+        """Returns the names of the available commands."""
+        return sorted(
+            name[3:] for name in dir(self) if name.startswith("do_")
+        )
+
+    def execute(self, command, params=None):
+        """Runs a command with a dict of parameters and returns its result.
+
+        Raises `CommandError` if the command is unknown or the parameters
+        do not match it.
+        """
+        method = getattr(self, f"do_{command}", None)
+        if not isinstance(command, str) or method is None:
+            raise CommandError(f"Unknown command: {command!r}")
+        params = {} if params is None else params
+        if not isinstance(params, dict):
+            raise CommandError("Command parameters must be an object.")
+        try:
+            inspect.signature(method).bind(**params)
+        except TypeError as e:
+            raise CommandError(f"Invalid parameters for {command}: {e}") from e
+        return method(**params)
+
+    @staticmethod
+    def _check_ids(**ids):
+        """Raises `CommandError` unless every given ID is an integer."""
+        for name, value in ids.items():
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise CommandError(f"{name} must be an integer.")
+
+    @staticmethod
+    def _check_rooms(rooms):
+        """Raises `CommandError` unless `rooms` is a positive integer."""
+        if not isinstance(rooms, int) or isinstance(rooms, bool) or rooms < 1:
+            raise CommandError("rooms must be a positive integer.")
+
+    def do_create_hotel(self, name, location, rooms=Hotel.DEFAULT_ROOMS):
+        """Creates a hotel with a new ID; returns it as a dict, or None."""
+        self._check_rooms(rooms)
+        hotel_id = Hotel.id_allocator().allocate()
+        hotel = Hotel.create_hotel(hotel_id, name, location, rooms)
+        return hotel.to_dict() if hotel else None
+
+    def do_create_customer(self, name, email):
+        """Creates a customer with a new ID; returns it as a dict, or None."""
+        customer_id = Customer.id_allocator().allocate()
+        customer = Customer.create_customer(customer_id, name, email)
+        return customer.to_dict() if customer else None
+
+    def do_update_hotel(self, hotel_id, name=None, location=None,
+                        rooms=None):
+        """Changes the given fields of a hotel; returns it, or None."""
+        self._check_ids(hotel_id=hotel_id)
+        if rooms is not None:
+            self._check_rooms(rooms)
+        try:
+            hotel = Hotel.update_hotel(hotel_id, name, location, rooms)
+        except ConstraintViolation as e:
+            raise CommandError(str(e)) from e
+        return hotel.to_dict() if hotel else None
+
+    def do_update_customer(self, customer_id, name=None, email=None):
+        """Changes the given fields of a customer; returns it, or None."""
+        self._check_ids(customer_id=customer_id)
+        try:
+            customer = Customer.repository().update(
+                customer_id, name=name, email=email
+            )
+        except UniqueViolation as e:
+            raise CommandError(str(e)) from e
+        return customer.to_dict() if customer else None
+
+    def do_delete_hotel(self, hotel_id):
+        """Deletes a hotel; returns whether it existed."""
+        self._check_ids(hotel_id=hotel_id)
+        return Hotel.delete_hotel(hotel_id)
+
+    def do_delete_customer(self, customer_id):
+        """Deletes a customer; returns whether it existed."""
+        self._check_ids(customer_id=customer_id)
+        return Customer.delete_customer(customer_id)
+
+    def do_create_reservation(self, customer_id, hotel_id, check_in=None,
+                              check_out=None):
+        """Creates a reservation with a new ID; returns it, or None.
+
+        A reservation for a stay from `check_in` to `check_out` is only
+        created if its customer and hotel exist and the hotel has a room
+        free for the stay (see `Reservation.book`).
+        """
+        self._check_ids(customer_id=customer_id, hotel_id=hotel_id)
+        reservation_id = Reservation.id_allocator().allocate()
+        if check_in is None and check_out is None:
+            reservation = Reservation.create_reservation(
+                reservation_id, customer_id, hotel_id
+            )
+        else:
+            try:
+                reservation = Reservation.book(
+                    reservation_id, customer_id, hotel_id,
+                    check_in or "", check_out or "",
+                )
+            except ValueError as e:
+                raise CommandError(str(e)) from e
+        return reservation.to_dict() if reservation else None
+
+    def do_find_available(self, location, check_in, check_out):
+        """Returns the hotels at a location with a room free for a stay."""
+        try:
+            hotels = Hotel.find_available(location, check_in, check_out)
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+        return [hotel.to_dict() for hotel in hotels]
+
+    def do_cancel_reservation(self, reservation_id):
+        """Cancels a reservation; returns whether it existed."""
+        self._check_ids(reservation_id=reservation_id)
+        return Reservation.cancel_reservation(reservation_id)
+
+    def do_search(self, collection, query, fields=None, exact=False):
+        """Returns the records of a collection matching a text query.
+
+        Every word of `query` must start (with `exact=True`, equal) a
+        word of the searched `fields`, ignoring case and accents; see
+        `app.search`.
+        """
+        model = COLLECTIONS.get(collection)
+        if model is None:
+            raise CommandError(f"Unknown collection: {collection!r}")
+        if not isinstance(query, str):
+            raise CommandError("query must be a string.")
+        if isinstance(fields, str):
+            fields = [fields]
+        try:
+            records = model.repository().search(query, fields, not exact)
+        except (TypeError, ValueError) as e:
+            raise CommandError(str(e)) from e
+        return [record.to_dict() for record in records]
+
+    def do_display(self, collection, offset=0, limit=None, after=None,
+                   filters=(), output_format="text"):
+        """Returns the listing text of a collection.
+
+        The options are those of the display scripts, unparsed: `after`
+        is the text of an ID and `filters` a list of `FIELD=VALUE`
+        expressions (see `app.listing.parse_options`).
+        """
+        model = COLLECTIONS.get(collection)
+        if model is None:
+            raise CommandError(f"Unknown collection: {collection!r}")
+        try:
+            options = listing.parse_options(
+                model, offset, limit, after, filters, output_format
+            )
+        except (TypeError, ValueError) as e:
+            raise CommandError(str(e)) from e
+        stream = io.StringIO()
+        display = getattr(model, f"display_{collection}")
+        display(stream=stream, streaming=self.streaming, **options)
+        return stream.getvalue()
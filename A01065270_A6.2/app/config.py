@@ -4,8 +4,47 @@ Configuration module for the application.
 Contains global settings and utility functions.
 """
 
+import os
+
 DEBUG = False  # Set to True to enable debug messages
 
+# Storage backend used by the Hotel, Customer and Reservation classes:
+#   "json"    - rewrite the whole JSON file on every change
+#   "journal" - append changes to a journal, compacting it periodically
+#   "sqlite"  - one table per collection in the SQLite database below
+STORAGE_BACKEND = "json"
+
+SQLITE_PATH = os.path.join("data", "hotel.db")
+
+# Format the collection files are written in (they are read in any):
+#   "json"    - indented JSON array
+#   "compact" - JSON array without whitespace
+#   "jsonl"   - JSON Lines, one record per line
+#   "binary"  - HREC binary records (see app/storage/formats.py)
+DATA_FORMAT = "json"
+
+JOURNAL_COMPACT_THRESHOLD = 1000  # Journal entries before compaction
+JOURNAL_FSYNC = False  # fsync the journal after every append
+
+# Seconds a commit waits for concurrent writes to join it (group commit);
+# 0 commits right away, batching only writes that are already waiting.
+GROUP_COMMIT_DELAY = 0.0
+
+ID_BLOCK_SIZE = 100  # IDs a process reserves per sequence counter update
+
+# Asyncio access (app/async_repository.py): threads running the blocking
+# file I/O, and most queued writes committed together.
+ASYNC_MAX_WORKERS = 4
+ASYNC_WRITE_BATCH = 100
+
+# Hotel service (hotel_service.py): the command line scripts send their
+# commands to it when it is running, and work on the files directly when
+# it is not. It listens on the Unix socket below, or on localhost at
+# SERVICE_PORT where Unix sockets are not available.
+SERVICE_SOCKET = os.path.join("data", "hotel.sock")
+SERVICE_PORT = 8765
+SERVICE_TIMEOUT = 30.0  # Seconds a client waits for a response
+
 
 def debug_log(message):
     """Conditionally prints debug messages if DEBUG is enabled globally."""
@@ -0,0 +1,134 @@
+"""
+fileio.py - Safe file access shared by the model classes.
+
+This module provides:
+
+- `FileLock`, an inter-process lock on a lock file next to a data file, so
+  that several scripts running at once do not overwrite each other's
+  changes (read, modify and write happen while holding it), and
+- `atomic_open`, which writes a file through a temporary file that then
+  replaces it, so readers never see a partially written data file.
+
+Author: José Manuel Romo
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """An exclusive lock shared by threads and processes.
+
+    The lock is held on `path` (created if missing). It is reentrant within
+    a thread; other threads of the same process wait on an in-process lock
+    before taking the file lock, so each path has a single `FileLock`
+    instance per process (see `for_path`).
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path):
+        """Initializes an unlocked lock on `path`."""
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    @classmethod
+    def for_path(cls, path):
+        """Returns the shared lock of a lock file path."""
+        path = os.path.abspath(path)
+        with cls._instances_lock:
+            lock = cls._instances.get(path)
+            if lock is None:
+                lock = cls._instances[path] = cls(path)
+            return lock
+
+    def acquire(self):
+        """Blocks until the lock is held by the calling thread."""
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                self._lock_file()
+            except BaseException:
+                self._lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        """Releases one level of the lock."""
+        self._depth -= 1
+        if self._depth == 0:
+            self._unlock_file()
+        self._lock.release()
+
+    def _lock_file(self):
+        """Opens the lock file and takes the operating system lock."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # Gave up after ~10 s; keep waiting
+                        continue
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def _unlock_file(self):
+        """Releases the operating system lock and closes the lock file."""
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+@contextmanager
+def atomic_open(path, encoding="utf-8", binary=False):
+    """Opens a temporary file that replaces `path` once closed.
+
+    The file is opened in text mode, or in binary mode with
+    `binary=True`. If the block raises, the temporary file is removed and
+    `path` is left untouched.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if binary:
+            f = open(tmp_path, "wb")  # pylint: disable=R1732
+        else:
+            f = open(tmp_path, "w", encoding=encoding)  # pylint: disable=R1732
+        with f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
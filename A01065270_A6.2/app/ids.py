@@ -0,0 +1,117 @@
+"""
+ids.py - Allocation of unique record IDs.
+
+This module provides the `IdAllocator` class, which hands out IDs for new
+records from a persisted sequence counter (`FILE_PATH + ".seq"`, e.g.
+`data/Customers.json.seq`) instead of drawing random numbers until one is
+free. The counter file holds the next unreserved ID; a process reserves a
+whole block of IDs (`ID_BLOCK_SIZE` in `app/config.py`) with one locked
+counter update and then hands them out from memory, so allocation costs
+the same however full the collection is. IDs are not limited to 16 bits.
+
+When the counter file does not exist yet, the sequence starts after the
+largest integer ID in the collection. IDs already taken (for example by a
+record created with an explicit ID) are skipped. IDs of a block that are
+never used are simply left as gaps.
+
+Author: José Manuel Romo
+"""
+
+import threading
+
+import app.config as conf
+from app.fileio import FileLock, atomic_open
+
+
+class IdAllocator:
+    """Allocates unique primary keys for the records of one model class."""
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, model):
+        """Initializes an allocator with no reserved block."""
+        self.model = model
+        self.lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._path = None
+
+    @classmethod
+    def for_model(cls, model):
+        """Returns the shared allocator of a model class."""
+        with cls._instances_lock:
+            allocator = cls._instances.get(model)
+            if allocator is None:
+                allocator = cls._instances[model] = cls(model)
+            return allocator
+
+    @classmethod
+    def reset_all(cls):
+        """Drops every allocator, discarding the unused reserved IDs."""
+        with cls._instances_lock:
+            cls._instances.clear()
+
+    @property
+    def path(self):
+        """Returns the path of the sequence counter file."""
+        return self.model.FILE_PATH + ".seq"
+
+    def allocate(self):
+        """Returns a new unique ID."""
+        return self.allocate_many(1)[0]
+
+    def allocate_many(self, count):
+        """Returns `count` new unique IDs, in increasing order."""
+        with self.lock:
+            if self._path != self.path:  # Data file moved: start over
+                self._next = self._end = 0
+                self._path = self.path
+
+            repository = self.model.repository()
+            repository.refresh()
+            taken = repository.records
+
+            ids = []
+            while len(ids) < count:
+                if self._next == self._end:
+                    block = max(count - len(ids), conf.ID_BLOCK_SIZE)
+                    self._next = self._reserve(block)
+                    self._end = self._next + block
+                candidate = self._next
+                self._next += 1
+                if candidate not in taken:
+                    ids.append(candidate)
+            return ids
+
+    def _reserve(self, count):
+        """Advances the counter file by `count`; returns its old value."""
+        with FileLock.for_path(self.path + ".lock"):
+            start = self._read_counter()
+            if start is None:
+                start = self._initial_value()
+            self.model.ensure_data_directory()
+            with atomic_open(self.path) as f:
+                f.write(f"{start + count}\n")
+        return start
+
+    def _read_counter(self):
+        """Returns the value stored in the counter file, or None."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return int(f.read())
+        except FileNotFoundError:
+            return None
+        except (IOError, ValueError) as e:
+            conf.debug_log(f"Error reading {self.path}: {e}")
+            return None
+
+    def _initial_value(self):
+        """Returns the ID following the largest integer ID stored."""
+        repository = self.model.repository()
+        with repository.lock:
+            repository.refresh()
+            ids = list(repository.records)
+        return max(
+            (i for i in ids if isinstance(i, int)), default=0
+        ) + 1
@@ -0,0 +1,157 @@
+"""
+indexes.py - Indexes maintained by the repositories.
+
+A model class lists the indexes of its collection in `INDEXES`, e.g.
+
+    INDEXES = (SecondaryIndex("customer_id"), SecondaryIndex("hotel_id"))
+
+These are prototypes: each `Repository` works on its own empty copies
+(`new()`), rebuilds them whenever it loads the collection and updates them
+with every committed change, so they never have to be scanned for or
+rebuilt on a write.
+
+A `UniqueIndex` also makes the repository reject changes that would give
+two records the same value (see `UniqueViolation`).
+
+Author: José Manuel Romo
+"""
+
+import copy
+
+
+class ConstraintViolation(ValueError):
+    """Raised when the repository rejects a change to a collection."""
+
+
+class UniqueViolation(ConstraintViolation):
+    """Raised when a change would break the constraint of a UniqueIndex."""
+
+
+class Index:
+    """Base class of the indexes over one field of a collection."""
+
+    def __init__(self, field):
+        """Initializes an empty index over `field`."""
+        self.field = field
+        self.clear()
+
+    @property
+    def name(self):
+        """Returns the name the repository registers the index under."""
+        return self.field
+
+    def new(self):
+        """Returns an empty index with the same configuration."""
+        index = copy.copy(self)
+        index.clear()
+        return index
+
+    def clear(self):
+        """Removes every entry."""
+        raise NotImplementedError
+
+    def rebuild(self, records):
+        """Indexes every record of a `{record_id: record}` mapping."""
+        self.clear()
+        for record_id, record in records.items():
+            self.put(record_id, record)
+
+    def put(self, record_id, record):
+        """Indexes a new or changed record."""
+        raise NotImplementedError
+
+    def discard(self, record_id):
+        """Removes a record from the index, if present."""
+        raise NotImplementedError
+
+    def apply(self, changes, key):
+        """Applies a list of `("put", record)` / `("delete", id)` changes."""
+        for op, value in changes:
+            if op == "put":
+                self.put(getattr(value, key), value)
+            else:
+                self.discard(value)
+
+
+class SecondaryIndex(Index):
+    """Maps each value of a field to the keys of the records holding it."""
+
+    def clear(self):
+        self._keys = {}    # value -> {record_id: None}, in insertion order
+        self._values = {}  # record_id -> indexed value
+
+    def put(self, record_id, record):
+        self._put(record_id, getattr(record, self.field))
+
+    def _put(self, record_id, value):
+        """Indexes a record under `value`."""
+        if record_id in self._values:
+            if self._values[record_id] == value:
+                return
+            self.discard(record_id)
+        self._keys.setdefault(value, {})[record_id] = None
+        self._values[record_id] = value
+
+    def discard(self, record_id):
+        if record_id not in self._values:
+            return
+        value = self._values.pop(record_id)
+        keys = self._keys[value]
+        del keys[record_id]
+        if not keys:
+            del self._keys[value]
+
+    def lookup(self, value):
+        """Returns the keys of the records whose field equals `value`."""
+        return list(self._keys.get(value, ()))
+
+    def count(self, value):
+        """Returns the number of records whose field equals `value`."""
+        return len(self._keys.get(value, ()))
+
+
+class UniqueIndex(SecondaryIndex):
+    """A secondary index whose values may belong to one record only.
+
+    Values are compared through `normalize` (e.g. to ignore case), if
+    given. The repository rejects added or changed records whose value
+    already belongs to another record. Stored data that predates the
+    constraint may hold duplicates: they are indexed as they are, and
+    listed by `duplicates()`.
+    """
+
+    def __init__(self, field, normalize=None):
+        """Initializes an empty unique index over `field`."""
+        self.normalize = normalize
+        super().__init__(field)
+
+    @property
+    def name(self):
+        return f"unique_{self.field}"
+
+    def key(self, value):
+        """Returns the normalized form values are compared in."""
+        return self.normalize(value) if self.normalize else value
+
+    def put(self, record_id, record):
+        self._put(record_id, self.key(getattr(record, self.field)))
+
+    def lookup(self, value):
+        return super().lookup(self.key(value))
+
+    def count(self, value):
+        return super().count(self.key(value))
+
+    def conflict(self, record_id, value):
+        """Returns the key of another record holding `value`, or None."""
+        for other in self._keys.get(self.key(value), ()):
+            if other != record_id:
+                return other
+        return None
+
+    def duplicates(self):
+        """Returns `{value: keys}` for the values held by several records."""
+        return {
+            value: list(keys) for value, keys in self._keys.items()
+            if len(keys) > 1
+        }
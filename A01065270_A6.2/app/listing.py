@@ -0,0 +1,244 @@
+"""
+listing.py - Paged, filtered listings of the stored collections.
+
+The `display_*` methods of the model classes use this module to:
+
+- read records either from the in-memory repository or, with
+  `streaming=True`, straight from storage one record at a time
+  (`iter_records` of the storage backend),
+- select a page of them: records matching field filters, starting after a
+  cursor ID, skipping `offset` and stopping after `limit` (reading stops
+  as soon as the page is complete; in memory, the cursor is looked up by
+  key instead of scanning the records before it), and
+- write the page as text, JSON Lines or CSV through one buffered writer,
+  instead of one `print()` call per line.
+
+Author: José Manuel Romo
+"""
+
+import csv
+import itertools
+import json
+import sys
+
+from app.schema import CONVERTERS
+
+FORMATS = ("text", "jsonl", "csv")
+BUFFER_SIZE = 1 << 16  # Characters buffered before each write
+
+
+class BufferedWriter:
+    """Collects output text and writes it to a stream in large pieces."""
+
+    def __init__(self, stream, buffer_size=BUFFER_SIZE):
+        """Initializes an empty buffer in front of `stream`."""
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._parts = []
+        self._size = 0
+
+    def write(self, text):
+        """Buffers `text`, writing the buffer out once it is full."""
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Writes out the buffered text."""
+        if self._parts:
+            self.stream.write("".join(self._parts))
+            self._parts = []
+            self._size = 0
+        self.stream.flush()
+
+
+def parse_filters(model, expressions):
+    """Parses `FIELD=VALUE` expressions into a `{field: value}` dict.
+
+    Values are converted to the field's type in the model's schema.
+    Raises `ValueError` for unknown fields or invalid values.
+    """
+    filters = {}
+    for expression in expressions or ():
+        field, sep, text = expression.partition("=")
+        field = field.strip()
+        if not sep or field not in model.SCHEMA.fields:
+            raise ValueError(
+                f"Invalid filter {expression!r}; expected FIELD=VALUE with "
+                f"FIELD one of {', '.join(model.FIELDS)}."
+            )
+        filters[field] = parse_value(model, field, text)
+    return filters
+
+
+def parse_value(model, field, text):
+    """Converts command line text to the schema type of a field."""
+    return CONVERTERS[model.SCHEMA.fields[field]](text)
+
+
+def iter_records(model, streaming=False):
+    """Yields the records of a model in storage order.
+
+    By default the records come from the model's repository; with
+    `streaming=True` they are read from storage one at a time instead,
+    which suits one-off listings of large collections.
+    """
+    if streaming:
+        # Imported here so parsing the options does not load the backends.
+        from app.storage import get_backend  # pylint: disable=C0415
+
+        return get_backend().iter_records(model)
+    return model.repository().records_after()
+
+
+def page(model, offset=0, limit=None, after=None, filters=None,
+         streaming=False):
+    """Yields one page of the records of a model (see `select`).
+
+    In memory the records start right after the `after` cursor (see
+    `Repository.records_after`); streamed records are scanned for it.
+    """
+    if streaming:
+        return select(
+            iter_records(model, streaming), model.PRIMARY_KEY, offset,
+            limit, after, filters,
+        )
+    return select(
+        model.repository().records_after(after), model.PRIMARY_KEY, offset,
+        limit, None, filters,
+    )
+
+
+def select(records, key, offset=0, limit=None, after=None, filters=None):
+    """Yields one page of `records`.
+
+    Args:
+        records: Iterable of records, in listing order.
+        key: Name of the primary key field.
+        offset: Number of matching records to skip.
+        limit: Maximum number of records to yield (None for all).
+        after: Cursor; only records following the one with this key are
+            considered.
+        filters: `{field: value}` pairs that records must all match.
+    """
+    records = iter(records)
+    if after is not None:
+        for record in records:
+            if getattr(record, key) == after:
+                break
+    if filters:
+        items = list(filters.items())
+        records = (
+            record for record in records
+            if all(getattr(record, field) == value for field, value in items)
+        )
+    stop = None if limit is None else offset + limit
+    return itertools.islice(records, offset, stop)
+
+
+def write_listing(records, fields, output_format="text", text_lines=None,
+                  header=None, stream=None):
+    """Writes records in a listing format and returns how many were written.
+
+    Args:
+        records: Iterable of records to write.
+        fields: Field names, used by the CSV header.
+        output_format: One of `FORMATS`.
+        text_lines: For the text format, a function turning an iterable of
+            records into an iterable of lines.
+        header: For the text format, a title written before the first line.
+        stream: Output stream (default: standard output).
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown listing format: {output_format}")
+    writer = BufferedWriter(stream or sys.stdout)
+    count = 0
+    if output_format == "text":
+        for line in text_lines(records):
+            if count == 0 and header is not None:
+                writer.write(header + "\n")
+            writer.write(line + "\n")
+            count += 1
+    elif output_format == "jsonl":
+        for record in records:
+            writer.write(json.dumps(record.to_dict(), ensure_ascii=False))
+            writer.write("\n")
+            count += 1
+    else:
+        rows = csv.writer(writer, lineterminator="\n")
+        rows.writerow(fields)
+        for record in records:
+            data = record.to_dict()
+            rows.writerow([data[field] for field in fields])
+            count += 1
+    writer.flush()
+    return count
+
+
+def chunked(iterable, size):
+    """Yields lists of up to `size` consecutive items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def add_arguments(parser):
+    """Adds the listing options to a command line parser."""
+    parser.add_argument(
+        "--offset", type=int, default=0,
+        help="Number of matching records to skip."
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None,
+        help="Maximum number of records to show."
+    )
+    parser.add_argument(
+        "--after", default=None, metavar="ID",
+        help="Show only the records following the one with this ID."
+    )
+    parser.add_argument(
+        "--filter", action="append", default=[], metavar="FIELD=VALUE",
+        dest="filters", help="Show only records whose FIELD equals VALUE."
+    )
+    parser.add_argument(
+        "--format", choices=FORMATS, default="text", dest="output_format",
+        help="Output format (default: text)."
+    )
+
+
+def options_from_args(model, args):
+    """Returns the `display_*` keyword arguments of parsed options.
+
+    Raises `ValueError` for invalid options.
+    """
+    return parse_options(
+        model, args.offset, args.limit, args.after, args.filters,
+        args.output_format,
+    )
+
+
+def parse_options(model, offset=0, limit=None, after=None, filters=(),
+                  output_format="text"):
+    """Returns the `display_*` keyword arguments of raw listing options.
+
+    `after` is the text of a primary key and `filters` a list of
+    `FIELD=VALUE` expressions, as given on the command line. Raises
+    `ValueError` for invalid options.
+    """
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("--offset and --limit must not be negative.")
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown listing format: {output_format}")
+    if after is not None:
+        after = parse_value(model, model.PRIMARY_KEY, after)
+    return {
+        "offset": offset,
+        "limit": limit,
+        "after": after,
+        "filters": parse_filters(model, filters),
+        "output_format": output_format,
+    }
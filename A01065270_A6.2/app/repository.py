@@ -0,0 +1,641 @@
+"""
+repository.py - In-memory, indexed access to the stored collections.
+
+This module provides the `Repository` class, which keeps one collection
+(hotels, customers or reservations) loaded in memory and indexed by its
+primary key. The collection is read once through the configured storage
+backend (see `app.storage`) and reused until the stored data changes (the
+backend's file signature differs from the last load or save), so lookups
+and duplicate checks are dictionary operations instead of a file parse
+plus a linear scan. Every mutation is handed to the backend as a list of
+changes, which lets journal-style backends persist it without rewriting
+the collection.
+
+Mutations are safe with several processes writing at once: they run while
+holding the backend's inter-process lock, on a collection reloaded if
+another process changed it. Mutations from concurrent threads are grouped:
+one thread (the leader) applies every queued mutation and commits them
+together, so a burst of writes costs a single rewrite of the file. Setting
+`GROUP_COMMIT_DELAY` in `app/config.py` makes the leader wait a little
+for more writes to join its batch.
+
+The repository hands out copies of its records, and stores copies of the
+records it is given: changing a returned record does not change the
+collection (or its indexes) until it is written back with `update`.
+
+A model may define `check_change(old, new)`, which returns why a record
+must not go from `old` (None for a new record) to `new`, or None. Changes
+that depend on other collections, such as the stay of a reservation
+against the rooms of its hotel, are checked in a `Transaction` over both
+instead, which bypasses the repository's mutations; `check_change` makes
+the repository reject them when they come any other way.
+
+Author: José Manuel Romo
+"""
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+import app.config as conf
+from app.indexes import ConstraintViolation, UniqueIndex, UniqueViolation
+from app.storage import get_backend
+
+MUTATIONS = (
+    "add", "update", "remove", "add_many", "update_many", "remove_many",
+)
+
+BulkResult = namedtuple("BulkResult", ["succeeded", "failed"])
+BulkResult.__doc__ = """Outcome of a bulk operation.
+
+`succeeded` lists the records created, updated or removed; `failed` lists
+a `(record_id, reason)` tuple per rejected item, in input order.
+"""
+
+
+class Repository:
+    """Caches the records of one model class, keyed by primary key."""
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, model):
+        """Initializes an empty repository for `model`.
+
+        The model class must define `FILE_PATH`, `PRIMARY_KEY`,
+        `to_dict()`, `load_from_file()` and `save_to_file(records)`, and
+        may list the indexes to maintain in `INDEXES` (see `app.indexes`).
+        """
+        self.model = model
+        self.records = {}
+        self.indexes = {
+            index.name: index.new() for index in getattr(model, "INDEXES", ())
+        }
+        self.unique_indexes = [
+            index for index in self.indexes.values()
+            if isinstance(index, UniqueIndex)
+        ]
+        self.lock = threading.RLock()
+        self._signature = None
+        self._loaded = False
+        self._queue = []
+        self._queue_lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._deferred = None  # Changes not yet persisted (see `defer`)
+        self._order = None  # Keys in storage order, and their positions
+
+    @classmethod
+    def for_model(cls, model):
+        """Returns the shared repository of a model class."""
+        with cls._instances_lock:
+            repository = cls._instances.get(model)
+            if repository is None:
+                repository = cls._instances[model] = cls(model)
+            return repository
+
+    @classmethod
+    def reset_all(cls):
+        """Drops every cached collection; the next access reloads it."""
+        with cls._instances_lock:
+            cls._instances.clear()
+
+    @property
+    def backend(self):
+        """Returns the storage backend selected in the configuration."""
+        return get_backend()
+
+    def invalidate(self):
+        """Forces the next access to reload the collection."""
+        with self.lock:
+            self._loaded = False
+
+    def refresh(self):
+        """Reloads the collection if the backing file has changed."""
+        with self.lock:
+            if self._loaded and self._signature == self.backend.signature(
+                self.model
+            ):
+                return
+            with self.backend.lock(self.model):
+                self.backend.recover(self.model)
+                signature = self.backend.signature(self.model)
+                key = self.model.PRIMARY_KEY
+                self.records = {
+                    getattr(record, key): record
+                    for record in self.backend.load(self.model)
+                }
+                for index in self.indexes.values():
+                    index.rebuild(self.records)
+                self._order = None
+            self._signature = signature
+            self._loaded = True
+
+    def persist(self, changes):
+        """Hands applied changes to the storage backend.
+
+        `changes` is a list of `("put", record)` and
+        `("delete", record_id)` tuples already applied to `records`. While
+        persistence is deferred, they are kept for the next checkpoint.
+        """
+        with self.lock:
+            if self._deferred is not None:
+                self._deferred.extend(changes)
+                return
+            self.backend.commit(self.model, self.records, changes)
+            self._signature = self.backend.signature(self.model)
+
+    def install(self, records, changes):
+        """Replaces the cached collection with one just committed.
+
+        `records` maps primary keys to records and `changes` lists the
+        changes that led to it; used by transactions, which commit through
+        the backend themselves (or, while persistence is deferred, leave
+        the changes for the next checkpoint).
+        """
+        with self.lock:
+            self.records = records
+            self._index(changes)
+            self._loaded = True
+            if self._deferred is not None:
+                self._deferred.extend(changes)
+            else:
+                self._signature = self.backend.signature(self.model)
+
+    @property
+    def deferring(self):
+        """Whether committed changes are kept in memory only."""
+        return self._deferred is not None
+
+    def defer(self):
+        """Starts keeping committed changes in memory only.
+
+        The caller must hold `lock` and the backend's lock of the
+        collection until `end_deferral()`, so that no other process writes
+        the collection in the meantime; `app.batch.Batch` does this.
+        """
+        with self.lock:
+            self.refresh()
+            self._deferred = []
+
+    def take_deferred(self):
+        """Returns the changes kept since the last call, and forgets them."""
+        with self.lock:
+            changes = self._deferred or []
+            if self._deferred is not None:
+                self._deferred = []
+            return changes
+
+    def persisted(self):
+        """Records that the changes taken were written by the caller."""
+        with self.lock:
+            self._signature = self.backend.signature(self.model)
+
+    def end_deferral(self, discard=False):
+        """Stops deferring; with `discard=True`, drops unpersisted changes.
+
+        Dropped changes are still in the cached collection, so it is
+        reloaded on its next access.
+        """
+        with self.lock:
+            if discard and self._deferred:
+                self._loaded = False
+            self._deferred = None
+
+    def submit(self, apply):
+        """Runs a mutation with group commit and returns its result.
+
+        `apply()` is called with the collection up to date and locked
+        against other processes; it changes `records` and returns a
+        `(result, changes)` tuple. Mutations queued by other threads in
+        the meantime are committed in the same backend write.
+        """
+        future = self.enqueue(apply)
+        self.commit_pending([future])
+        return future.result()
+
+    def enqueue(self, apply):
+        """Queues a mutation for the next commit; returns its `Future`."""
+        future = Future()
+        with self._queue_lock:
+            self._queue.append((apply, future))
+        return future
+
+    def commit_pending(self, futures):
+        """Commits the queued mutations unless `futures` are all done.
+
+        Returns once every future in `futures` is done: either another
+        thread (the leader of a batch) committed them in the meantime, or
+        this thread commits every queued mutation. Errors are reported
+        through the futures.
+        """
+        with self._commit_lock:
+            if not all(future.done() for future in futures):
+                try:
+                    self._commit_batch()
+                except Exception:  # pylint: disable=broad-except
+                    pass  # Set on the futures of the batch
+
+    def mutation(self, name, /, *args, **kwargs):
+        """Returns the `apply` function of a named mutation, for `enqueue`.
+
+        `name` is one of `MUTATIONS` and the arguments are those of the
+        method of the same name, e.g. `mutation("add", record)`.
+        """
+        if name not in MUTATIONS:
+            raise ValueError(f"Unknown mutation: {name}")
+        return getattr(self, f"_{name}")(*args, **kwargs)
+
+    def _commit_batch(self):
+        """Applies every queued mutation and commits them together."""
+        if conf.GROUP_COMMIT_DELAY:
+            time.sleep(conf.GROUP_COMMIT_DELAY)
+        with self.lock, self.backend.lock(self.model):
+            with self._queue_lock:
+                batch, self._queue = self._queue, []
+            done = []
+            changes = []
+            try:
+                self.backend.recover(self.model)
+                self.refresh()
+                for apply, future in batch:
+                    try:
+                        result, applied = apply()
+                    except Exception as e:  # pylint: disable=broad-except
+                        future.set_exception(e)
+                        continue
+                    self._index(applied)
+                    changes.extend(applied)
+                    done.append((future, result))
+                if changes:
+                    self.persist(changes)
+            except BaseException as e:
+                self._loaded = False  # Memory may be ahead of the storage
+                for future, _ in done:
+                    future.set_exception(e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                raise
+        for future, result in done:
+            future.set_result(result)
+
+    def _index(self, changes):
+        """Updates the indexes with a list of applied changes."""
+        self._order = None
+        for index in self.indexes.values():
+            index.apply(changes, self.model.PRIMARY_KEY)
+
+    def _rejected(self, old, new):
+        """Returns why the model rejects a change of a record, or None."""
+        check = getattr(self.model, "check_change", None)
+        return None if check is None else check(old, new)
+
+    def _unique_conflict(self, record_id, values, claimed=None):
+        """Returns why a record's new values break a unique index, or None.
+
+        `values` maps fields to the values the record would get. In bulk
+        mutations, `claimed` maps each unique index's name to the
+        `{key: record_id}` values taken earlier in the batch, which are
+        not indexed yet; the record's values are added to it.
+        """
+        keys = []
+        for index in self.unique_indexes:
+            if index.field not in values:
+                continue
+            value = values[index.field]
+            key = index.key(value)
+            other = index.conflict(record_id, value)
+            if other is None and claimed is not None:
+                other = claimed.get(index.name, {}).get(key)
+                other = None if other == record_id else other
+            if other is not None:
+                return f"{index.field} {value!r} already used by {other}"
+            keys.append((index.name, key))
+        if claimed is not None:
+            for name, key in keys:
+                claimed.setdefault(name, {})[key] = record_id
+        return None
+
+    def find_by(self, field, value):
+        """Returns the records whose `field` equals `value`.
+
+        Uses the index over `field` if the model has one, and scans the
+        collection otherwise.
+        """
+        with self.lock:
+            self.refresh()
+            index = self.indexes.get(field)
+            if index is not None:
+                return [
+                    copy_record(self.records[key])
+                    for key in index.lookup(value)
+                ]
+            return [
+                copy_record(record) for record in self.records.values()
+                if getattr(record, field) == value
+            ]
+
+    def search(self, query, fields=None, prefix=True):
+        """Returns the records matching a text query, by primary key.
+
+        Uses the model's `TextIndex` (see `app.search`); raises
+        `ValueError` if the model has none.
+        """
+        with self.lock:
+            self.refresh()
+            index = self.indexes.get("text")
+            if index is None:
+                raise ValueError(
+                    f"{self.model.__name__} has no text index."
+                )
+            return [
+                copy_record(self.records[key])
+                for key in index.search(query, fields, prefix)
+            ]
+
+    def compact(self):
+        """Rewrites the stored collection in one piece."""
+        with self.lock, self.backend.lock(self.model):
+            self.refresh()
+            self.backend.compact(self.model, self.records)
+            self._signature = self.backend.signature(self.model)
+
+    def get(self, record_id):
+        """Returns a copy of the record with the given key, or None."""
+        with self.lock:
+            self.refresh()
+            record = self.records.get(record_id)
+            return None if record is None else copy_record(record)
+
+    def contains(self, record_id):
+        """Checks whether a record with the given primary key exists."""
+        with self.lock:
+            self.refresh()
+            return record_id in self.records
+
+    def records_after(self, record_id=None):
+        """Yields copies of the records following a key, in storage order.
+
+        With `record_id=None` every record is yielded; with a key that
+        does not exist, none. The key's position comes from a map built
+        once per change of the collection, so paging through it with a
+        cursor does not rescan the records before the page.
+        """
+        with self.lock:
+            self.refresh()
+            if self._order is None:
+                keys = list(self.records)
+                self._order = (keys, {key: i for i, key in enumerate(keys)})
+            keys, positions = self._order
+            records = self.records
+        if record_id is None:
+            start = 0
+        elif record_id in positions:
+            start = positions[record_id] + 1
+        else:
+            return
+        for position in range(start, len(keys)):
+            record = records.get(keys[position])
+            if record is not None:
+                yield copy_record(record)
+
+    def all(self):
+        """Returns a copy of every record, in storage order."""
+        with self.lock:
+            self.refresh()
+            return [copy_record(record) for record in self.records.values()]
+
+    def add(self, record):
+        """Adds and persists a record; False if its key already exists.
+
+        Raises `UniqueViolation` if one of its values belongs to another
+        record (see `app.indexes.UniqueIndex`), and `ConstraintViolation`
+        if the model rejects it (see `check_change`).
+        """
+        return self.submit(self._add(record))
+
+    def _add(self, record):
+        """Returns the mutation of `add`."""
+        record_id = getattr(record, self.model.PRIMARY_KEY)
+
+        def apply():
+            if record_id in self.records:
+                return False, []
+            conflict = self._unique_conflict(record_id, vars(record))
+            if conflict:
+                raise UniqueViolation(conflict)
+            reason = self._rejected(None, record)
+            if reason:
+                raise ConstraintViolation(reason)
+            stored = self.records[record_id] = copy_record(record)
+            return True, [("put", stored)]
+
+        return apply
+
+    def update(self, record_id, **changes):
+        """Applies non-empty field changes to a record and persists them.
+
+        Returns a copy of the updated record, or None if the key does not
+        exist. Raises `UniqueViolation` if a new value belongs to another
+        record, and `ConstraintViolation` if the model rejects the change.
+        """
+        return self.submit(self._update(record_id, **changes))
+
+    def _update(self, record_id, **changes):
+        """Returns the mutation of `update`."""
+        def apply():
+            record = self.records.get(record_id)
+            if record is None:
+                return None, []
+            values = {
+                field: value for field, value in changes.items() if value
+            }
+            conflict = self._unique_conflict(record_id, values)
+            if conflict:
+                raise UniqueViolation(conflict)
+            updated = copy_record(record)
+            for field, value in values.items():
+                setattr(updated, field, value)
+            reason = self._rejected(record, updated)
+            if reason:
+                raise ConstraintViolation(reason)
+            self.records[record_id] = updated
+            return copy_record(updated), [("put", updated)]
+
+        return apply
+
+    def remove(self, record_id):
+        """Removes and persists a record; returns it, or None if absent."""
+        return self.submit(self._remove(record_id))
+
+    def _remove(self, record_id):
+        """Returns the mutation of `remove`."""
+        def apply():
+            record = self.records.pop(record_id, None)
+            if record is None:
+                return None, []
+            return record, [("delete", record_id)]
+
+        return apply
+
+    def _as_record(self, item):
+        """Returns `item` as a model instance (it may be a field dict)."""
+        if isinstance(item, dict):
+            return self.model.from_dict(item)
+        return item
+
+    def add_many(self, items):
+        """Adds many records with a single commit.
+
+        `items` holds model instances or dicts of their fields. Items whose
+        key or unique values already exist (stored or earlier in the batch),
+        whose fields are invalid or that the model rejects are reported in
+        the result instead of being added.
+        """
+        return self.submit(self._add_many(items))
+
+    def _add_many(self, items):
+        """Returns the mutation of `add_many`."""
+        items = list(items)
+        key = self.model.PRIMARY_KEY
+
+        def apply():
+            added, failed, changes = [], [], []
+            claimed = {}
+            for item in items:
+                try:
+                    record = self._as_record(item)
+                except ValueError as e:
+                    failed.append(
+                        (_item_id(item, key), f"invalid fields: {e}")
+                    )
+                    continue
+                record_id = getattr(record, key)
+                if record_id in self.records:
+                    failed.append((record_id, "already exists"))
+                    continue
+                conflict = self._rejected(None, record) or (
+                    self._unique_conflict(record_id, vars(record), claimed)
+                )
+                if conflict:
+                    failed.append((record_id, conflict))
+                    continue
+                stored = self.records[record_id] = copy_record(record)
+                added.append(record)
+                changes.append(("put", stored))
+            return BulkResult(added, failed), changes
+
+        return apply
+
+    def update_many(self, updates):
+        """Applies many field updates with a single commit.
+
+        `updates` maps primary keys to dicts of field changes (or is an
+        iterable of such pairs). As with `update`, empty values are
+        ignored. Missing keys, unknown fields, values that belong to
+        another record and changes the model rejects are reported as
+        failures.
+        """
+        return self.submit(self._update_many(updates))
+
+    def _update_many(self, updates):
+        """Returns the mutation of `update_many`."""
+        if isinstance(updates, dict):
+            updates = updates.items()
+        updates = list(updates)
+        fields = set(self.model.FIELDS) - {self.model.PRIMARY_KEY}
+
+        def apply():
+            updated, failed, applied = [], [], []
+            claimed = {}
+            for record_id, changes in updates:
+                record = self.records.get(record_id)
+                unknown = sorted(set(changes) - fields)
+                values = {
+                    field: value for field, value in changes.items() if value
+                }
+                if record is None:
+                    failed.append((record_id, "not found"))
+                elif unknown:
+                    failed.append(
+                        (record_id, f"unknown fields: {', '.join(unknown)}")
+                    )
+                else:
+                    new = copy_record(record)
+                    for field, value in values.items():
+                        setattr(new, field, value)
+                    conflict = self._rejected(record, new) or (
+                        self._unique_conflict(record_id, values, claimed)
+                    )
+                    if conflict:
+                        failed.append((record_id, conflict))
+                        continue
+                    self.records[record_id] = new
+                    updated.append(copy_record(new))
+                    applied.append(("put", new))
+            return BulkResult(updated, failed), applied
+
+        return apply
+
+    def remove_many(self, record_ids):
+        """Removes many records with a single commit."""
+        return self.submit(self._remove_many(record_ids))
+
+    def _remove_many(self, record_ids):
+        """Returns the mutation of `remove_many`."""
+        record_ids = list(record_ids)
+
+        def apply():
+            removed, failed = [], []
+            for record_id in record_ids:
+                record = self.records.pop(record_id, None)
+                if record is None:
+                    failed.append((record_id, "not found"))
+                else:
+                    removed.append(record)
+            changes = [
+                ("delete", getattr(r, self.model.PRIMARY_KEY)) for r in removed
+            ]
+            return BulkResult(removed, failed), changes
+
+        return apply
+
+
+def copy_record(record):
+    """Returns a shallow copy of a record.
+
+    Cheaper than `copy.copy`, which matters when listing a whole
+    collection.
+    """
+    clone = object.__new__(record.__class__)
+    clone.__dict__.update(record.__dict__)
+    return clone
+
+
+def join(records, field, model):
+    """Pairs each record with the `model` record its `field` refers to.
+
+    Each reference is looked up in the primary-key index of `model`'s
+    repository, so the join is linear in the number of records. Records
+    whose reference does not exist are paired with None; the others with
+    a copy of the referenced record.
+    """
+    repository = model.repository()
+    with repository.lock:
+        repository.refresh()
+        targets = repository.records
+        pairs = []
+        for record in records:
+            target = targets.get(getattr(record, field))
+            pairs.append(
+                (record, None if target is None else copy_record(target))
+            )
+        return pairs
+
+
+def _item_id(item, key):
+    """Returns the primary key of a record or field dict, if any."""
+    if isinstance(item, dict):
+        return item.get(key)
+    return getattr(item, key, None)
@@ -0,0 +1,120 @@
+"""
+schema.py - Field types of the stored records.
+
+Each model class declares a `Schema` listing its fields and their types:
+
+    SCHEMA = Schema(reservation_id=int, customer_id=int, hotel_id=int)
+
+Records read from storage are passed through `SCHEMA.coerce` once, when
+the collection is loaded, so the rest of the application can rely on the
+declared types (older data files store some IDs as strings, e.g.
+`"customer_id": "24773"`, which would never match the integer IDs they
+refer to). The coercion function is generated as Python source when the
+schema is created, with a fast path for values that already have the
+right type, so loading does not pay for a generic per-field loop.
+
+Fields added after data was first stored are declared with a default,
+which records that lack them (or hold null, like new SQLite columns) get:
+
+    SCHEMA = Schema(hotel_id=int, name=str, location=str,
+                    rooms=Field(int, default=1))
+
+Author: José Manuel Romo
+"""
+
+
+class SchemaError(ValueError):
+    """Raised when a record cannot be coerced to its schema."""
+
+
+def _to_int(value):
+    """Converts an integral number or numeric string to an int."""
+    if isinstance(value, bool):
+        raise ValueError(f"expected an integer, got {value!r}")
+    if isinstance(value, str):
+        return int(value.strip())
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"expected an integer, got {value!r}")
+    return int(value)
+
+
+def _to_str(value):
+    """Converts a scalar value to a str."""
+    if value is None or isinstance(value, (dict, list)):
+        raise ValueError(f"expected a string, got {value!r}")
+    return str(value)
+
+
+CONVERTERS = {int: _to_int, str: _to_str}
+
+
+class Field:
+    """A field type with the default value of records that lack it."""
+
+    def __init__(self, type_, default):
+        """Initializes a field of `type_` defaulting to `default`."""
+        self.type = type_
+        self.default = default
+
+
+class Schema:
+    """The ordered fields of a record type and their Python types."""
+
+    def __init__(self, **fields):
+        """Initializes and compiles a schema from `field=type` pairs.
+
+        A type may be given as a `Field` to declare a default value.
+        """
+        self.defaults = {
+            name: field.default for name, field in fields.items()
+            if isinstance(field, Field)
+        }
+        fields = {
+            name: field.type if isinstance(field, Field) else field
+            for name, field in fields.items()
+        }
+        unsupported = [
+            name for name, type_ in fields.items() if type_ not in CONVERTERS
+        ]
+        if unsupported:
+            raise TypeError(f"Unsupported field types: {unsupported}")
+        self.fields = fields
+        self.names = tuple(fields)
+        self._coerce = self._compile()
+
+    def _compile(self):
+        """Generates the function that coerces a record dictionary."""
+        namespace = {}
+        items = []
+        for i, (name, type_) in enumerate(self.fields.items()):
+            namespace[f"_type{i}"] = type_
+            namespace[f"_convert{i}"] = CONVERTERS[type_]
+            if name in self.defaults:
+                namespace[f"_default{i}"] = self.defaults[name]
+                items.append(
+                    f"        {name!r}: (_default{i} if (_v := "
+                    f"data.get({name!r})) is None else _v if _v.__class__ "
+                    f"is _type{i} else _convert{i}(_v)),"
+                )
+                continue
+            items.append(
+                f"        {name!r}: (_v if (_v := data[{name!r}]).__class__ "
+                f"is _type{i} else _convert{i}(_v)),"
+            )
+        source = "\n".join(
+            ["def coerce(data):", "    return {", *items, "    }"]
+        )
+        exec(source, namespace)  # pylint: disable=exec-used
+        return namespace["coerce"]
+
+    def coerce(self, data):
+        """Returns the schema fields of `data`, converted to their types.
+
+        Missing fields with a default get it. Raises `SchemaError` if
+        another field is missing or a value cannot be converted; keys that
+        are not in the schema are dropped.
+        """
+        try:
+            return self._coerce(data)
+        except (KeyError, TypeError, ValueError) as e:
+            raise SchemaError(f"Invalid record {data!r}: {e!r}") from e
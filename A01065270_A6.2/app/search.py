@@ -0,0 +1,247 @@
+"""
+search.py - Full-text search over the text fields of a collection.
+
+A model class adds a `TextIndex` to its `INDEXES` to make some of its
+fields searchable, e.g.
+
+    INDEXES = (TextIndex("name", "location"),)
+
+The index splits each field into words and keeps
+
+- an inverted index from each word to the records containing it, per
+  field, and
+- a trie of every indexed word, to find the words starting with a prefix
+  without scanning the vocabulary. It is built on the first prefix search
+  after the collection is loaded, so loading does not pay for it.
+
+Words are normalized before being indexed or looked up: letters are case
+folded and stripped of their accents, so "cancun" finds "Cancún" (stored
+as "Canc\\u00fan" in the JSON files). Like the other indexes, it is kept
+up to date by the `Repository` with every change (see `app.indexes`).
+
+Example:
+    Hotel.search("playa canc")      # Words starting with "playa", "canc"
+    Customer.search("alice@example.com", fields=["email"])
+
+Author: José Manuel Romo
+"""
+
+import re
+import unicodedata
+
+from app.indexes import Index
+
+WORD = re.compile(r"[^\W_]+")
+END = ""  # Trie key marking the end of a word; words are never empty
+
+
+def normalize(text):
+    """Returns `text` case folded and without accents."""
+    if text.isascii():  # Most text, and much faster to fold
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    """Returns the normalized words of `text`, in order."""
+    return WORD.findall(normalize(text))
+
+
+class Trie:
+    """A set of words that can be listed by prefix."""
+
+    def __init__(self):
+        """Initializes an empty trie."""
+        self._root = {}
+
+    def add(self, word):
+        """Adds a word."""
+        node = self._root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[END] = True
+
+    def remove(self, word):
+        """Removes a word, if present, and the branches left empty."""
+        path = []
+        node = self._root
+        for char in word:
+            if char not in node:
+                return
+            path.append((node, char))
+            node = node[char]
+        node.pop(END, None)
+        for parent, char in reversed(path):
+            if parent[char]:
+                break
+            del parent[char]
+
+    def __contains__(self, word):
+        node = self._find(word)
+        return node is not None and END in node
+
+    def with_prefix(self, prefix):
+        """Yields the words starting with `prefix`."""
+        node = self._find(prefix)
+        if node is None:
+            return
+        stack = [(prefix, node)]
+        while stack:
+            word, node = stack.pop()
+            for char, child in node.items():
+                if char == END:
+                    yield word
+                else:
+                    stack.append((word + char, child))
+
+    def _find(self, prefix):
+        """Returns the node of a prefix, or None."""
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+
+class TextIndex(Index):
+    """Indexes the words of some text fields of a collection.
+
+    `field` holds the tuple of indexed fields; the repository registers
+    the index as "text".
+    """
+
+    def __init__(self, *fields):
+        """Initializes an empty index over the words of `fields`."""
+        super().__init__(fields)
+
+    @property
+    def name(self):
+        return "text"
+
+    def clear(self):
+        self._postings = {f: {} for f in self.field}  # word -> {id: None}
+        self._words = {}   # record_id -> tuple of word sets, one per field
+        self._counts = {}  # word -> number of postings, in any field
+        self._trie = None  # Built on the first prefix search
+
+    def rebuild(self, records):
+        # Indexes every record without comparing with previous words, and
+        # tokenizes each distinct value once.
+        self.clear()
+        columns = []
+        for field in self.field:
+            postings = self._postings[field]
+            tokenized = {}
+            column = []
+            for record_id, record in records.items():
+                value = getattr(record, field)
+                words = tokenized.get(value)
+                if words is None:
+                    words = tokenized[value] = frozenset(tokenize(value))
+                column.append(words)
+                for word in words:
+                    keys = postings.get(word)
+                    if keys is None:
+                        keys = postings[word] = {}
+                    keys[record_id] = None
+            columns.append(column)
+        self._words = dict(zip(records, zip(*columns)))
+        counts = self._counts
+        for postings in self._postings.values():
+            for word, keys in postings.items():
+                counts[word] = counts.get(word, 0) + len(keys)
+
+    def put(self, record_id, record):
+        words = tuple(
+            frozenset(tokenize(getattr(record, field)))
+            for field in self.field
+        )
+        old = self._words.get(record_id)
+        if old == words:
+            return
+        for i, field in enumerate(self.field):
+            before = old[i] if old else frozenset()
+            for word in before - words[i]:
+                self._unpost(field, word, record_id)
+            for word in words[i] - before:
+                self._post(field, word, record_id)
+        self._words[record_id] = words
+
+    def discard(self, record_id):
+        words = self._words.pop(record_id, None)
+        if words is None:
+            return
+        for field, field_words in zip(self.field, words):
+            for word in field_words:
+                self._unpost(field, word, record_id)
+
+    def _post(self, field, word, record_id):
+        """Adds a record to the postings of a word in a field."""
+        self._postings[field].setdefault(word, {})[record_id] = None
+        count = self._counts.get(word, 0)
+        if not count and self._trie is not None:
+            self._trie.add(word)
+        self._counts[word] = count + 1
+
+    def _unpost(self, field, word, record_id):
+        """Removes a record from the postings of a word in a field."""
+        postings = self._postings[field][word]
+        del postings[record_id]
+        if not postings:
+            del self._postings[field][word]
+        count = self._counts[word] - 1
+        if count:
+            self._counts[word] = count
+        else:
+            del self._counts[word]
+            if self._trie is not None:
+                self._trie.remove(word)
+
+    def trie(self):
+        """Returns the trie of the indexed words, building it if needed."""
+        if self._trie is None:
+            trie = Trie()
+            for word in self._counts:
+                trie.add(word)
+            self._trie = trie
+        return self._trie
+
+    def words(self, prefix=""):
+        """Returns the indexed words starting with `prefix`, normalized."""
+        return list(self.trie().with_prefix(normalize(prefix)))
+
+    def search(self, query, fields=None, prefix=True):
+        """Returns the keys of the records matching a text query.
+
+        Every word of the query must appear in one of `fields` (default:
+        all indexed fields) of a matching record; with `prefix=True` a
+        query word also matches the words it starts. Keys are returned in
+        ascending order. Raises `ValueError` for a field that is not
+        indexed.
+        """
+        fields = self.field if fields is None else tuple(fields)
+        unknown = [field for field in fields if field not in self._postings]
+        if unknown:
+            raise ValueError(f"Fields not indexed: {', '.join(unknown)}")
+        terms = tokenize(query)
+        if not terms:
+            return []
+        matches = []
+        for term in dict.fromkeys(terms):
+            words = self.trie().with_prefix(term) if prefix else (
+                [term] if term in self._counts else []
+            )
+            keys = {}
+            for word in words:
+                for field in fields:
+                    keys.update(self._postings[field].get(word, ()))
+            if not keys:
+                return []
+            matches.append(keys)
+        matches.sort(key=len)  # Check the fewest candidates
+        first, others = matches[0], matches[1:]
+        return sorted(
+            key for key in first if all(key in keys for keys in others)
+        )
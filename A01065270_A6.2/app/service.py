@@ -0,0 +1,216 @@
+"""
+service.py - Long-running hotel service and its client.
+
+Every command line script used to start a new interpreter, load the whole
+collections it needs and exit. The hotel service (`hotel_service.py`)
+instead keeps the collections, their indexes and the ID allocators in
+memory and runs the commands of `app.commands` for the scripts, which
+become thin clients: `call()` sends a command to the service when it is
+running and runs it in the calling process when it is not.
+
+The service listens on the Unix socket `SERVICE_SOCKET` (or on localhost
+at `SERVICE_PORT` where Unix sockets are not available). The protocol is
+JSON Lines: a client sends one object per request,
+
+    {"command": "create_hotel", "params": {"name": "...", "location": "..."}}
+
+and reads one object per response, `{"ok": true, "result": ...}` or
+`{"ok": false, "error": "..."}`. A connection may carry any number of
+requests. Besides the commands of `app.commands`, the service answers
+`ping` and `shutdown`.
+
+With the default JSON storage the service persists changes through the
+journal backend (see `app.storage.journal`), so a command appends a line
+instead of rewriting a file. The collections are compacted into plain
+snapshot files when the service starts and stops, which is what the
+scripts read when they work without it.
+
+This module imports `app.commands` (and through it the storage backends)
+only when a command runs in process, so a client starts quickly.
+
+Author: José Manuel Romo
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+
+import app.config as conf
+
+UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+
+_BaseServer = (
+    socketserver.ThreadingUnixStreamServer if UNIX_SOCKETS
+    else socketserver.ThreadingTCPServer
+)
+
+
+class ServiceUnavailable(ConnectionError):
+    """Raised when the hotel service is not running."""
+
+
+class CommandError(Exception):
+    """Raised when a command is unknown or its arguments are invalid."""
+
+
+def address():
+    """Returns the address the hotel service listens on."""
+    if UNIX_SOCKETS:
+        return conf.SERVICE_SOCKET
+    return ("127.0.0.1", conf.SERVICE_PORT)
+
+
+def connect(server_address=None, timeout=None):
+    """Opens a connection to the hotel service.
+
+    Raises `ServiceUnavailable` if nothing listens on the address.
+    """
+    family = socket.AF_UNIX if UNIX_SOCKETS else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout or conf.SERVICE_TIMEOUT)
+    try:
+        sock.connect(server_address or address())
+    except OSError as e:
+        sock.close()
+        raise ServiceUnavailable(f"Hotel service not running: {e}") from e
+    return sock
+
+
+def request(command, server_address=None, **params):
+    """Runs a command in the hotel service and returns its result.
+
+    Raises `ServiceUnavailable` if the service is not running, in which
+    case the command was not run, and `CommandError` if the service
+    rejected the command. Other connection errors (the service stopped
+    while answering) are raised as `ConnectionError`, since the command
+    may have run.
+    """
+    message = json.dumps({"command": command, "params": params})
+    with connect(server_address) as sock:
+        sock.sendall(message.encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("Hotel service closed the connection.")
+    response = json.loads(line)
+    if not response["ok"]:
+        raise CommandError(response["error"])
+    return response["result"]
+
+
+def call(command, **params):
+    """Runs a command in the hotel service, or in process without it.
+
+    Raises `CommandError` if the command is unknown or its arguments are
+    invalid.
+    """
+    try:
+        return request(command, **params)
+    except ServiceUnavailable:
+        pass
+    # Imported here so clients of a running service skip loading it.
+    from app.commands import Dispatcher  # pylint: disable=C0415
+
+    return Dispatcher(streaming=True).execute(command, params)
+
+
+def is_running(server_address=None):
+    """Checks whether the hotel service answers on its address."""
+    try:
+        return request("ping", server_address) == "pong"
+    except (OSError, ValueError):
+        return False
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Answers the requests sent over one client connection."""
+
+    def handle(self):
+        for line in self.rfile:
+            response = self.server.respond(line)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class HotelService(_BaseServer):
+    """Serves the commands of `app.commands` over a socket.
+
+    Each connection is handled in its own thread; the repositories are
+    thread-safe, and concurrent writes are committed together (see
+    `Repository.submit`).
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, server_address=None):
+        """Binds the service to its address (default: configuration)."""
+        # Imported here because the client part of this module is used
+        # without the commands.
+        from app.commands import Dispatcher  # pylint: disable=C0415
+
+        self.dispatcher = Dispatcher()
+        super().__init__(server_address or address(), RequestHandler)
+
+    def respond(self, line):
+        """Runs one JSON request and returns the response object."""
+        try:
+            message = json.loads(line)
+            command = message["command"]
+            params = message.get("params") or {}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return {"ok": False, "error": "Malformed request."}
+
+        if command == "ping":
+            return {"ok": True, "result": "pong"}
+        if command == "shutdown":
+            threading.Thread(target=self.shutdown).start()
+            return {"ok": True, "result": None}
+
+        try:
+            result = self.dispatcher.execute(command, params)
+        except CommandError as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:  # pylint: disable=broad-except
+            conf.debug_log(f"Error running {command}: {e!r}")
+            return {"ok": False, "error": f"Internal error: {e}"}
+        return {"ok": True, "result": result}
+
+    def server_close(self):
+        super().server_close()
+        if UNIX_SOCKETS:
+            try:
+                os.remove(self.server_address)
+            except OSError:
+                pass
+
+
+def serve(server_address=None):
+    """Runs the hotel service until it is shut down.
+
+    Raises `RuntimeError` if the service is already running.
+    """
+    server_address = server_address or address()
+    if is_running(server_address):
+        raise RuntimeError("The hotel service is already running.")
+    if UNIX_SOCKETS and os.path.exists(server_address):
+        os.remove(server_address)  # Left behind by a service that crashed
+
+    if conf.STORAGE_BACKEND == "json":
+        conf.STORAGE_BACKEND = "journal"
+    # Imported here because the client part of this module is used
+    # without the model classes.
+    from app import Customer, Hotel, Reservation  # pylint: disable=C0415
+
+    models = (Hotel, Customer, Reservation)
+    for model in models:  # Loads the collections and folds in old journals
+        model.repository().compact()
+
+    with HotelService(server_address) as server:
+        conf.debug_log(f"Hotel service listening on {server_address}.")
+        try:
+            server.serve_forever()
+        finally:
+            for model in models:
+                model.repository().compact()
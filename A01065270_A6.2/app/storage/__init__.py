@@ -0,0 +1,34 @@
+"""
+Initialization module for the storage backends.
+
+A storage backend decides how a model's collection is persisted. The
+backend in use is selected with `STORAGE_BACKEND` in `app/config.py`.
+"""
+
+import app.config as conf
+
+from .base import StorageBackend
+from .json_backend import JsonFileBackend
+from .journal import JournalBackend
+from .sqlite_backend import SqliteBackend
+
+BACKENDS = {
+    "json": JsonFileBackend(),
+    "journal": JournalBackend(),
+    "sqlite": SqliteBackend(),
+}
+
+
+def get_backend(name=None):
+    """Returns the backend registered under `name` (default: config)."""
+    name = name or conf.STORAGE_BACKEND
+    try:
+        return BACKENDS[name]
+    except KeyError as e:
+        raise ValueError(f"Unknown storage backend: {name}") from e
+
+
+__all__ = [
+    "StorageBackend", "JsonFileBackend", "JournalBackend", "SqliteBackend",
+    "BACKENDS", "get_backend",
+]
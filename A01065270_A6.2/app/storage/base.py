@@ -0,0 +1,142 @@
+"""
+base.py - Interface shared by the storage backends.
+
+Besides single-collection commits, backends commit transactions spanning
+several collections (see `app.transaction`). File-based backends do this
+in two phases:
+
+1. `prepare` writes the new contents of every affected file to a
+   temporary file next to it; a failure here removes the temporary files
+   and leaves the stored data untouched.
+2. An intent log (`transaction-<id>.txn`) listing the temporary files and
+   their targets is written atomically. From then on the transaction is
+   committed: the temporary files are renamed over their targets and the
+   log is removed.
+
+If the process dies between the two steps of phase 2, `recover` finishes
+the renames of a collection the next time it is reloaded or written.
+
+Author: José Manuel Romo
+"""
+
+import glob
+import json
+import os
+import uuid
+
+from app.fileio import FileLock, atomic_open
+
+
+class StorageBackend:
+    """Persists the collections of model classes.
+
+    A model class defines `FILE_PATH`, `PRIMARY_KEY`, `to_dict()`,
+    `load_from_file()` and `save_to_file(records)`. Changes are passed to
+    `commit` as a list of `("put", record)` and `("delete", record_id)`
+    tuples, together with the full, already updated collection.
+    """
+
+    name = None
+
+    def lock(self, model):
+        """Returns the inter-process lock guarding the collection.
+
+        Repositories hold it while reloading and while applying and
+        committing changes, so concurrent writers never lose updates.
+        """
+        return FileLock.for_path(model.FILE_PATH + ".lock")
+
+    def signature(self, model):
+        """Returns a value that changes whenever the stored data changes."""
+        raise NotImplementedError
+
+    def load(self, model):
+        """Returns the stored records of `model` as a list of instances."""
+        raise NotImplementedError
+
+    def iter_records(self, model):
+        """Yields the stored records of `model`, in storage order.
+
+        Backends that can read records one at a time override this, so
+        listings can stop early without loading the whole collection.
+        """
+        yield from self.load(model)
+
+    def commit(self, model, records, changes):
+        """Persists `changes`; `records` maps primary keys to records."""
+        raise NotImplementedError
+
+    def compact(self, model, records):
+        """Rewrites the stored collection from `records` in one piece."""
+        model.save_to_file(list(records.values()))
+
+    def prepare(self, model, records, changes, suffix):
+        """Writes the committed state of a collection to temporary files.
+
+        Returns a list of `(temporary_path, target_path)` pairs; the
+        temporary paths end with `suffix`.
+        """
+        raise NotImplementedError
+
+    def commit_transaction(self, entries):
+        """Commits several collections at once, or none of them.
+
+        `entries` is a list of `(model, records, changes)` tuples, one per
+        changed collection, whose locks are held by the caller.
+        """
+        txn_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        suffix = f".{txn_id}.tmp"
+        renames = []
+        try:
+            for model, records, changes in entries:
+                renames.extend(
+                    (os.path.abspath(tmp_path), os.path.abspath(target))
+                    for tmp_path, target in self.prepare(
+                        model, records, changes, suffix
+                    )
+                )
+        except BaseException:
+            for tmp_path, _ in renames:
+                _remove(tmp_path)
+            raise
+
+        logs = [
+            os.path.join(directory, f"transaction-{txn_id}.txn")
+            for directory in sorted({os.path.dirname(t) for _, t in renames})
+        ]
+        for log_path in logs:
+            with atomic_open(log_path) as f:
+                json.dump(renames, f)
+        for tmp_path, target in renames:
+            os.replace(tmp_path, target)
+        for log_path in logs:
+            _remove(log_path)
+
+    def recover(self, model):
+        """Finishes the interrupted transaction renames of a collection."""
+        prefix = os.path.abspath(model.FILE_PATH)
+        directory = os.path.dirname(prefix)
+        for log_path in glob.glob(os.path.join(directory, "*.txn")):
+            try:
+                with open(log_path, "r", encoding="utf-8") as f:
+                    renames = json.load(f)
+            except (OSError, ValueError):
+                continue
+            pending = False
+            for tmp_path, target in renames:
+                if not os.path.exists(tmp_path):
+                    continue
+                if target.startswith(prefix):
+                    os.replace(tmp_path, target)
+                else:
+                    pending = True
+            if not pending:
+                _remove(log_path)
+
+
+def _remove(path):
+    """Removes a file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
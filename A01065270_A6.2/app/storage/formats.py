@@ -0,0 +1,435 @@
+"""
+formats.py - On-disk formats of the collection files.
+
+A collection file (`data/Hotels.json`, ...) can be stored in any of these
+formats; `DATA_FORMAT` in `app/config.py` selects the one files are
+written in:
+
+- "json": a JSON array indented by four spaces (the original format),
+- "compact": the same JSON array without whitespace,
+- "jsonl": JSON Lines, one record per line, which can be appended to and
+  read back one line at a time,
+- "binary": the HREC record format below, smaller and faster to parse.
+
+Files are read in whatever format they hold: `detect` tells the formats
+apart by their first bytes (`HREC`, `[` or `{`), so switching formats or
+converting the files (`convert_data.py`) never needs a migration step.
+
+HREC files start with a header describing the records: the magic bytes
+`HREC`, a version byte, the number of fields (uint16), per field a type
+code (uint8: 1 for int, 2 for str) and its name (uint16 length plus UTF-8
+bytes), and the number of records (uint64). Then comes one fixed-size row
+per record, holding its int fields (int64) and the lengths in characters
+of its str fields (uint32), and finally the text of every str field,
+concatenated in record order and encoded as UTF-8. All numbers are
+little-endian, and fields keep their header order within each kind. The
+rows are unpacked with `struct.iter_unpack` and the text is decoded in one
+piece, which is what makes this format fast to load.
+
+Author: José Manuel Romo
+"""
+
+import io
+import json
+import struct
+
+import app.config as conf
+from app.fileio import atomic_open
+
+CHUNK_SIZE = 1 << 16  # Characters read at a time when streaming a file
+
+MAGIC = b"HREC"
+VERSION = 1
+TYPE_CODES = {int: 1, str: 2}
+
+
+class FormatError(ValueError):
+    """Raised when a collection file or record does not fit its format."""
+
+
+class DataFormat:
+    """Base class of the formats of the collection files."""
+
+    name = None
+    binary = False  # Whether files are opened in binary mode
+
+    def dump(self, records, f, schema):
+        """Writes a list of record dicts to an open file."""
+        raise NotImplementedError
+
+    def loads(self, data):
+        """Returns the record dicts of a whole file's contents."""
+        raise NotImplementedError
+
+    def iter_file(self, path):
+        """Yields the record dicts of a file, reading it bit by bit."""
+        raise NotImplementedError
+
+
+class JsonFormat(DataFormat):
+    """A JSON array, indented or compact."""
+
+    def __init__(self, name, indent=None):
+        """Initializes the format; no `indent` writes compact JSON.
+
+        Indented files escape non-ASCII characters, as the original
+        format did; compact files store them as UTF-8.
+        """
+        self.name = name
+        self.indent = indent
+        self.separators = None if indent else (",", ":")
+
+    def dump(self, records, f, schema):
+        json.dump(
+            records, f, indent=self.indent, separators=self.separators,
+            ensure_ascii=bool(self.indent),
+        )
+
+    def loads(self, data):
+        records = json.loads(data)
+        if not isinstance(records, list):
+            raise FormatError("Expected a JSON array of records.")
+        return records
+
+    def iter_file(self, path):
+        return iter_json_array(path)
+
+
+class JsonLinesFormat(DataFormat):
+    """JSON Lines: one record object per line."""
+
+    name = "jsonl"
+
+    def dump(self, records, f, schema):
+        encode = json.JSONEncoder(
+            separators=(",", ":"), ensure_ascii=False
+        ).encode
+        for record in records:
+            f.write(encode(record))
+            f.write("\n")
+
+    def loads(self, data):
+        # One parse of the lines as a JSON array is much faster than a
+        # json.loads call per line.
+        lines = [line for line in data.splitlines() if line.strip()]
+        records = json.loads("[" + ",".join(lines) + "]")
+        if len(records) != len(lines):
+            raise FormatError("Expected one JSON value per line.")
+        return records
+
+    def iter_file(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class BinaryFormat(DataFormat):
+    """The HREC binary record format (see the module documentation)."""
+
+    name = "binary"
+    binary = True
+    BATCH = 4096  # Records decoded at a time when streaming a file
+
+    def __init__(self):
+        """Initializes the cache of compiled record layouts."""
+        self._layouts = {}
+
+    @staticmethod
+    def header(fields, count):
+        """Returns the header of a file of `count` records."""
+        parts = [MAGIC, struct.pack("<BH", VERSION, len(fields))]
+        for field, type_ in fields:
+            name = field.encode("utf-8")
+            parts.append(struct.pack("<BH", TYPE_CODES[type_], len(name)))
+            parts.append(name)
+        parts.append(struct.pack("<Q", count))
+        return b"".join(parts)
+
+    @staticmethod
+    def read_header(read):
+        """Parses a header with `read(size)`; returns `(fields, count)`.
+
+        `fields` lists `(name, type)` pairs in header order.
+        """
+        types = {code: type_ for type_, code in TYPE_CODES.items()}
+        try:
+            if read(len(MAGIC)) != MAGIC:
+                raise FormatError("Missing HREC header.")
+            version, n_fields = struct.unpack("<BH", read(3))
+            if version != VERSION:
+                raise FormatError(f"Unsupported HREC version {version}.")
+            fields = []
+            for _ in range(n_fields):
+                code, length = struct.unpack("<BH", read(3))
+                if code not in types:
+                    raise FormatError(f"Unknown HREC field type {code}.")
+                fields.append((read(length).decode("utf-8"), types[code]))
+            (count,) = struct.unpack("<Q", read(8))
+        except (struct.error, UnicodeDecodeError) as e:
+            raise FormatError(f"Invalid HREC header: {e}") from e
+        return fields, count
+
+    def layout(self, fields):
+        """Returns the compiled `Layout` of a list of header fields."""
+        fields = tuple(fields)
+        layout = self._layouts.get(fields)
+        if layout is None:
+            layout = self._layouts[fields] = Layout(fields)
+        return layout
+
+    def dump(self, records, f, schema):
+        fields = list(schema.fields.items())
+        layout = self.layout(fields)
+        try:
+            fixed, text = layout.encode(records)
+        except (KeyError, TypeError, struct.error) as e:
+            raise FormatError(f"Cannot encode records: {e!r}") from e
+        f.write(self.header(fields, len(records)))
+        f.write(fixed)
+        f.write(text.encode("utf-8"))
+
+    def loads(self, data):
+        stream = io.BytesIO(data)
+        fields, count = self.read_header(stream.read)
+        layout = self.layout(fields)
+        fixed = stream.read(count * layout.prefix.size)
+        if len(fixed) < count * layout.prefix.size:
+            raise FormatError("Truncated HREC records.")
+        try:
+            text = stream.read().decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise FormatError(f"Invalid text in HREC file: {e}") from e
+        records, end = layout.decode(layout.prefix.iter_unpack(fixed), text)
+        if end != len(text):
+            raise FormatError("HREC text does not match its records.")
+        return records
+
+    def iter_file(self, path):
+        with open(path, "rb") as f:
+            fields, count = self.read_header(f.read)
+            layout = self.layout(fields)
+            size = layout.prefix.size
+            text_start = f.tell() + count * size
+            with open(path, "rb") as raw:
+                raw.seek(text_start)
+                text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+                while count:
+                    n = min(count, self.BATCH)
+                    fixed = f.read(n * size)
+                    if len(fixed) < n * size:
+                        raise FormatError("Truncated HREC records.")
+                    rows = list(layout.prefix.iter_unpack(fixed))
+                    length = layout.text_length(rows)
+                    try:
+                        chunk = text.read(length)
+                    except UnicodeDecodeError as e:
+                        raise FormatError(
+                            f"Invalid text in HREC file: {e}"
+                        ) from e
+                    if len(chunk) < length:
+                        raise FormatError("Truncated HREC text.")
+                    yield from layout.decode(rows, chunk)[0]
+                    count -= n
+
+
+class Layout:
+    """The compiled record encoder and decoder of a list of HREC fields.
+
+    Like `Schema`, the functions are generated as Python source, one
+    statement per field, so converting a record costs no per-field loop.
+    """
+
+    def __init__(self, fields):
+        """Compiles the layout of `(name, type)` pairs."""
+        self.int_names = [name for name, type_ in fields if type_ is int]
+        self.str_names = [name for name, type_ in fields if type_ is str]
+        self.prefix = struct.Struct(
+            "<" + "q" * len(self.int_names) + "I" * len(self.str_names)
+        )
+        self.encode = self._compile_encode()
+        self.decode = self._compile_decode()
+
+    def text_length(self, rows):
+        """Returns the number of characters of the str fields of rows."""
+        first = len(self.int_names)
+        return sum(sum(row[first:]) for row in rows)
+
+    def _compile(self, source, name):
+        """Compiles generated source and returns the function `name`."""
+        namespace = {"pack": self.prefix.pack}
+        exec("\n".join(source), namespace)  # pylint: disable=exec-used
+        return namespace[name]
+
+    def _compile_encode(self):
+        """Generates `encode(records) -> (fixed_bytes, text)`."""
+        ints = [f"r[{name!r}]" for name in self.int_names]
+        strs = [f"s{i}" for i in range(len(self.str_names))]
+        source = [
+            "def encode(records):",
+            "    fixed = []",
+            "    texts = []",
+            "    for r in records:",
+            *[f"        s{i} = r[{name!r}]"
+              for i, name in enumerate(self.str_names)],
+            "        fixed.append(pack({}))".format(", ".join(
+                ints + [f"len({s})" for s in strs]
+            )),
+            *[f"        texts.append({s})" for s in strs],
+            '    return b"".join(fixed), "".join(texts)',
+        ]
+        return self._compile(source, "encode")
+
+    def _compile_decode(self):
+        """Generates `decode(rows, text) -> (records, end)`."""
+        ints = [f"i{i}" for i in range(len(self.int_names))]
+        lengths = [f"l{i}" for i in range(len(self.str_names))]
+        items = [f"{name!r}: {var}" for name, var in zip(self.int_names, ints)]
+        source = [
+            "def decode(rows, text):",
+            "    records = []",
+            "    append = records.append",
+            "    p0 = 0",
+            f"    for {', '.join(ints + lengths) or '_'}, in rows:",
+        ]
+        for i, name in enumerate(self.str_names):
+            source.append(f"        p{i + 1} = p{i} + l{i}")
+            items.append(f"{name!r}: text[p{i}:p{i + 1}]")
+        source += [
+            f"        append({{{', '.join(items)}}})",
+            *([f"        p0 = p{len(self.str_names)}"]
+              if self.str_names else []),
+            "    return records, p0",
+        ]
+        return self._compile(source, "decode")
+
+
+FORMATS = {
+    "json": JsonFormat("json", indent=4),
+    "compact": JsonFormat("compact"),
+    "jsonl": JsonLinesFormat(),
+    "binary": BinaryFormat(),
+}
+
+
+def get_format(name=None):
+    """Returns the format registered under `name` (default: config)."""
+    name = name or conf.DATA_FORMAT
+    try:
+        return FORMATS[name]
+    except KeyError as e:
+        raise ValueError(f"Unknown data format: {name}") from e
+
+
+def detect(head):
+    """Returns the format of a file from its first bytes.
+
+    Indented and compact JSON read the same way, so both are reported as
+    the "json" format. An empty file is JSON Lines with no records.
+    """
+    if head.startswith(MAGIC):
+        return FORMATS["binary"]
+    if not head or head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"{"):
+        return FORMATS["jsonl"]
+    return FORMATS["json"]
+
+
+def save(path, records, schema, data_format=None):
+    """Replaces the file at `path` with record dicts in a format.
+
+    The format defaults to `DATA_FORMAT`; `schema` describes the fields
+    (used by the binary format).
+    """
+    data_format = get_format(data_format)
+    with atomic_open(path, binary=data_format.binary) as f:
+        data_format.dump(records, f, schema)
+
+
+def write(path, records, schema, data_format=None):
+    """Writes record dicts to a new file at `path` (no atomic replace)."""
+    data_format = get_format(data_format)
+    if data_format.binary:
+        with open(path, "wb") as f:
+            data_format.dump(records, f, schema)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            data_format.dump(records, f, schema)
+
+
+def load(path):
+    """Returns the record dicts stored at `path`, in any format.
+
+    Raises `FormatError` (a `ValueError`, like the JSON decoding errors it
+    wraps) if the file does not fit its format.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    data_format = detect(data[:64])
+    if data_format.binary:
+        return data_format.loads(data)
+    try:
+        return data_format.loads(data.decode("utf-8-sig"))
+    except UnicodeDecodeError as e:
+        raise FormatError(f"{path} is not UTF-8 text: {e}") from e
+
+
+def iter_file(path):
+    """Yields the record dicts stored at `path`, in any format, one at a
+    time (see `DataFormat.iter_file`)."""
+    with open(path, "rb") as f:
+        head = f.read(64)
+    return detect(head).iter_file(path)
+
+
+def iter_json_array(path, chunk_size=CHUNK_SIZE):
+    """Yields the elements of the JSON array stored at `path`.
+
+    The file is read `chunk_size` characters at a time and each element is
+    decoded as soon as it is complete, so memory use does not depend on
+    the length of the array. Raises `ValueError` on malformed JSON.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        started = False
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(buffer) or (
+                not eof and len(buffer) - pos < chunk_size
+            ):
+                # Keep at least a chunk ahead so elements are not cut off.
+                chunk = "" if eof else f.read(chunk_size)
+                if chunk:
+                    buffer = buffer[pos:] + chunk
+                    pos = 0
+                    continue
+                eof = True
+                if pos == len(buffer):
+                    raise ValueError(f"Unexpected end of {path}")
+
+            char = buffer[pos]
+            if not started:
+                if char != "[":
+                    raise ValueError(f"{path} does not hold a JSON array")
+                started = True
+                pos += 1
+            elif char == "]":
+                return
+            elif char == ",":
+                pos += 1
+            else:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    chunk = f.read(chunk_size)  # Element longer than a chunk
+                    eof = not chunk
+                    buffer = buffer[pos:] + chunk
+                    pos = 0
+                    continue
+                yield value
+                pos = end
@@ -0,0 +1,169 @@
+"""
+journal.py - Append-only journal storage with compaction.
+
+With this backend a collection is stored as:
+
+- a snapshot, the usual JSON array at `FILE_PATH`, and
+- a journal next to it (`FILE_PATH + ".journal"`), in JSON Lines format,
+  with one entry per change since the snapshot was written:
+  `{"op": "put", "record": {...}}` or `{"op": "delete", "id": ...}`.
+
+A mutation appends its entries to the journal, so its I/O cost does not
+depend on the size of the collection. Loading reads the snapshot and
+replays the journal on top of it. Once the journal holds more than
+`JOURNAL_COMPACT_THRESHOLD` entries, the snapshot is rewritten from the
+in-memory collection and the journal is removed.
+
+The journal is removed only once the new snapshot has been written, so a
+failed compaction keeps it (and the changes it holds). Replaying is
+idempotent, so a crash between writing a new snapshot and removing the
+journal is harmless, and a partially written last line (a crash during
+an append) is dropped when the journal is next loaded. An entry whose
+record does not match the schema is skipped, like an invalid record of
+the snapshot.
+
+Author: José Manuel Romo
+"""
+
+import json
+import os
+
+import app.config as conf
+from app.schema import SchemaError
+
+from . import formats
+from .base import StorageBackend
+from .json_backend import file_signature
+
+
+class JournalBackend(StorageBackend):
+    """Stores each collection as a snapshot plus an append-only journal."""
+
+    name = "journal"
+
+    def __init__(self):
+        """Initializes the per-collection journal entry counters."""
+        self._entries = {}
+
+    @staticmethod
+    def journal_path(model):
+        """Returns the path of the journal of `model`."""
+        return model.FILE_PATH + ".journal"
+
+    def signature(self, model):
+        """Returns the combined signature of snapshot and journal."""
+        return (
+            file_signature(model.FILE_PATH),
+            file_signature(self.journal_path(model)),
+        )
+
+    def load(self, model):
+        """Loads the snapshot and replays the journal over it."""
+        key = model.PRIMARY_KEY
+        records = {
+            getattr(record, key): record for record in model.load_from_file()
+        }
+        entries = 0
+        try:
+            with open(self.journal_path(model), "rb+") as f:
+                offset = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete line")
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn append: drop it so new entries follow
+                        # the last complete one.
+                        conf.debug_log(f"Dropping torn journal entry {line!r}")
+                        f.truncate(offset)
+                        break
+                    if entry["op"] == "put":
+                        try:
+                            record = model.from_dict(entry["record"])
+                        except SchemaError as e:
+                            conf.debug_log(
+                                f"Skipping invalid journal entry {line!r}: {e}"
+                            )
+                        else:
+                            records[getattr(record, key)] = record
+                    else:
+                        records.pop(entry["id"], None)
+                    offset += len(line)
+                    entries += 1
+        except FileNotFoundError:
+            pass
+        except IOError as e:
+            conf.debug_log(f"Error reading journal: {e}")
+
+        self._entries[model.FILE_PATH] = entries
+        return list(records.values())
+
+    @staticmethod
+    def encode(changes):
+        """Serializes a list of changes as journal lines."""
+        lines = []
+        for op, value in changes:
+            if op == "put":
+                entry = {"op": "put", "record": value.to_dict()}
+            else:
+                entry = {"op": "delete", "id": value}
+            lines.append(json.dumps(entry) + "\n")
+        return "".join(lines)
+
+    def commit(self, model, records, changes):
+        """Appends the changes to the journal, compacting when it is long."""
+        model.ensure_data_directory()
+        with open(self.journal_path(model), "a", encoding="utf-8") as f:
+            f.write(self.encode(changes))
+            f.flush()
+            if conf.JOURNAL_FSYNC:
+                os.fsync(f.fileno())
+
+        entries = self._entries.get(model.FILE_PATH, 0) + len(changes)
+        self._entries[model.FILE_PATH] = entries
+        if entries > conf.JOURNAL_COMPACT_THRESHOLD:
+            try:
+                self.compact(model, records)
+            except (IOError, formats.FormatError) as e:
+                # The changes are already in the journal.
+                conf.debug_log(f"Error compacting {model.FILE_PATH}: {e}")
+
+    def prepare(self, model, records, changes, suffix):
+        """Writes the journal with the changes appended to a temporary file.
+
+        The journal is at most `JOURNAL_COMPACT_THRESHOLD` entries long, so
+        copying it keeps the cost independent of the collection size.
+        """
+        model.ensure_data_directory()
+        journal_path = self.journal_path(model)
+        tmp_path = journal_path + suffix
+        with open(tmp_path, "wb") as f:
+            try:
+                with open(journal_path, "rb") as journal:
+                    f.write(journal.read())
+            except FileNotFoundError:
+                pass
+            f.write(self.encode(changes).encode("utf-8"))
+        self._entries[model.FILE_PATH] = (
+            self._entries.get(model.FILE_PATH, 0) + len(changes)
+        )
+        return [(tmp_path, journal_path)]
+
+    def compact(self, model, records):
+        """Rewrites the snapshot and drops the journal.
+
+        Raises `IOError` or `FormatError` if the snapshot cannot be
+        written, in which case the journal is kept.
+        """
+        model.ensure_data_directory()
+        formats.save(
+            model.FILE_PATH, [record.to_dict() for record in records.values()],
+            model.SCHEMA,
+        )
+        try:
+            os.remove(self.journal_path(model))
+        except FileNotFoundError:
+            pass
+        self._entries[model.FILE_PATH] = 0
+        conf.debug_log(f"Compacted {model.FILE_PATH}.")
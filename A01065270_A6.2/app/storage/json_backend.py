@@ -0,0 +1,107 @@
+"""
+json_backend.py - Whole-file JSON storage.
+
+This is the original storage backend: each collection is one file
+(`data/Hotels.json`, ...), in the format selected by `DATA_FORMAT` (see
+`app.storage.formats`), that is rewritten on every change through the
+model's `save_to_file()`, which replaces the file atomically.
+
+A journal left next to a collection file by the journal backend (the
+hotel service uses it, and a crash skips its final compaction) is folded
+into the file before the collection is loaded or written, so its changes
+are neither ignored nor overwritten.
+
+Author: José Manuel Romo
+"""
+
+import os
+
+import app.config as conf
+from app.schema import SchemaError
+
+from . import formats
+from .base import StorageBackend
+
+
+def file_signature(path):
+    """Returns the (path, inode, mtime, size) signature of a file.
+
+    The inode changes whenever the file is replaced by an atomic write.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (path, None, None, None)
+    return (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class JsonFileBackend(StorageBackend):
+    """Stores each collection as a single JSON file."""
+
+    name = "json"
+
+    def signature(self, model):
+        """Returns the signature of the collection file.
+
+        A journal appearing next to it also changes the signature, so the
+        journal is folded in (see `recover`) before the next access.
+        """
+        return (
+            file_signature(model.FILE_PATH),
+            file_signature(model.FILE_PATH + ".journal"),
+        )
+
+    def recover(self, model):
+        """Finishes interrupted transactions and folds in a left journal.
+
+        Raises `IOError` or `FormatError` if the journal cannot be folded
+        in; the journal is then kept.
+        """
+        super().recover(model)
+        # Imported here because the journal backend uses this module.
+        from .journal import JournalBackend  # pylint: disable=C0415
+
+        journal = JournalBackend()
+        if file_signature(journal.journal_path(model))[1] is None:
+            return
+        key = model.PRIMARY_KEY
+        journal.compact(model, {
+            getattr(record, key): record for record in journal.load(model)
+        })
+
+    def load(self, model):
+        """Loads the collection through the model."""
+        return model.load_from_file()
+
+    def iter_records(self, model):
+        """Streams the collection file one record at a time.
+
+        Like `load_from_file`, a record that does not match the schema is
+        logged and skipped.
+        """
+        if not os.path.exists(model.FILE_PATH):
+            return
+        try:
+            for data in formats.iter_file(model.FILE_PATH):
+                try:
+                    record = model.from_dict(data)
+                except SchemaError as e:
+                    conf.debug_log(f"Skipping invalid record {data!r}: {e}")
+                    continue
+                yield record
+        except (IOError, ValueError) as e:
+            conf.debug_log(f"Error reading {model.FILE_PATH}: {e}")
+
+    def commit(self, model, records, changes):
+        """Rewrites the whole collection file."""
+        model.save_to_file(list(records.values()))
+
+    def prepare(self, model, records, changes, suffix):
+        """Writes the whole collection to a temporary file."""
+        model.ensure_data_directory()
+        tmp_path = model.FILE_PATH + suffix
+        formats.write(
+            tmp_path, [record.to_dict() for record in records.values()],
+            model.SCHEMA,
+        )
+        return [(tmp_path, model.FILE_PATH)]
@@ -0,0 +1,211 @@
+"""
+sqlite_backend.py - SQLite storage.
+
+All collections live in one SQLite database (`SQLITE_PATH` in
+`app/config.py`), one table per model:
+
+- the model's `TABLE_NAME`, with one column per entry of `FIELDS`,
+- its `PRIMARY_KEY` as the table's primary key,
+- an index for every field in the model's `INDEXED_FIELDS`.
+
+Columns are declared without a type, so values keep the exact type they
+had in the JSON files. Tables, columns and indexes are created when the
+database is opened, so new model fields are added to existing databases.
+
+The database runs in WAL mode, which lets other processes keep reading
+while a change is committed. Changes are applied with parameterized
+statements (cached by `sqlite3`) inside a single transaction per commit.
+
+Author: José Manuel Romo
+"""
+
+import sqlite3
+import threading
+
+import app.config as conf
+
+from .base import StorageBackend
+
+
+class SqliteBackend(StorageBackend):
+    """Stores each collection as a table of a SQLite database."""
+
+    name = "sqlite"
+
+    def __init__(self):
+        """Initializes the backend without opening the database yet."""
+        self._lock = threading.RLock()
+        self._connection = None
+        self._path = None
+        self._synced = set()
+
+    def connection(self):
+        """Returns the connection to the configured database."""
+        with self._lock:
+            if self._connection is None or self._path != conf.SQLITE_PATH:
+                self.close()
+                self._connection = sqlite3.connect(
+                    conf.SQLITE_PATH, check_same_thread=False,
+                    isolation_level=None, timeout=30,
+                )
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute("PRAGMA synchronous=NORMAL")
+                self._path = conf.SQLITE_PATH
+            return self._connection
+
+    def close(self):
+        """Closes the database connection, if open."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = None
+            self._synced.clear()
+
+    def ensure_table(self, model):
+        """Creates the table, missing columns and indexes of `model`."""
+        connection = self.connection()
+        if model in self._synced:
+            return connection
+
+        table = model.TABLE_NAME
+        key = model.PRIMARY_KEY
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ({key} PRIMARY KEY)"
+        )
+        columns = {
+            row[1] for row in connection.execute(f"PRAGMA table_info({table})")
+        }
+        for field in model.FIELDS:
+            if field not in columns:
+                connection.execute(f"ALTER TABLE {table} ADD COLUMN {field}")
+        for field in getattr(model, "INDEXED_FIELDS", ()):
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_{field} "
+                f"ON {table} ({field})"
+            )
+        self._synced.add(model)
+        return connection
+
+    def signature(self, model):
+        """Returns the database's data version.
+
+        `PRAGMA data_version` changes whenever another connection commits,
+        so a repository reloads after writes by other processes.
+        """
+        with self._lock:
+            connection = self.ensure_table(model)
+            version = connection.execute("PRAGMA data_version").fetchone()[0]
+            return (self._path, version)
+
+    def load(self, model):
+        """Loads every row of the model's table, in insertion order."""
+        with self._lock:
+            connection = self.ensure_table(model)
+            fields = ", ".join(model.FIELDS)
+            cursor = connection.execute(
+                f"SELECT {fields} FROM {model.TABLE_NAME} ORDER BY rowid"
+            )
+            return [
+                model.from_dict(dict(zip(model.FIELDS, row)))
+                for row in cursor
+            ]
+
+    def iter_records(self, model, batch_size=1000):
+        """Yields the rows of the model's table in batches.
+
+        Each batch is a separate query continuing after the last rowid
+        read, so the database is not kept busy between batches.
+        """
+        fields = ", ".join(model.FIELDS)
+        query = (
+            f"SELECT rowid, {fields} FROM {model.TABLE_NAME} "
+            f"WHERE rowid > ? ORDER BY rowid LIMIT ?"
+        )
+        last = -1
+        while True:
+            with self._lock:
+                rows = self.ensure_table(model).execute(
+                    query, (last, batch_size)
+                ).fetchall()
+            for row in rows:
+                yield model.from_dict(dict(zip(model.FIELDS, row[1:])))
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][0]
+
+    def commit(self, model, records, changes):
+        """Applies the changes in one transaction."""
+        self.commit_transaction([(model, records, changes)])
+
+    def commit_transaction(self, entries):
+        """Applies the changes of several tables in one transaction."""
+        with self._lock:
+            connection = self.connection()
+            for model, _, _ in entries:
+                self.ensure_table(model)
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for model, _, changes in entries:
+                    self._apply(connection, model, changes)
+                connection.execute("COMMIT")
+            except BaseException:
+                # Not only sqlite3.Error: an OverflowError from a value or
+                # a KeyboardInterrupt must not leave the transaction open.
+                connection.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _apply(connection, model, changes):
+        """Executes the statements of a list of changes."""
+        table = model.TABLE_NAME
+        key = model.PRIMARY_KEY
+        fields = ", ".join(model.FIELDS)
+        placeholders = ", ".join("?" for _ in model.FIELDS)
+        assignments = ", ".join(
+            f"{field} = excluded.{field}"
+            for field in model.FIELDS if field != key
+        )
+        upsert = (
+            f"INSERT INTO {table} ({fields}) VALUES ({placeholders}) "
+            f"ON CONFLICT({key}) DO UPDATE SET {assignments}"
+        )
+        delete = f"DELETE FROM {table} WHERE {key} = ?"
+        for op, value in changes:
+            if op == "put":
+                row = value.to_dict()
+                connection.execute(
+                    upsert, [row.get(field) for field in model.FIELDS]
+                )
+            else:
+                connection.execute(delete, (value,))
+
+    def recover(self, model):
+        """Nothing to recover: SQLite transactions are atomic."""
+
+    def replace_all(self, model, records):
+        """Replaces the whole table with `records` in one transaction."""
+        with self._lock:
+            connection = self.ensure_table(model)
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(f"DELETE FROM {model.TABLE_NAME}")
+                connection.executemany(
+                    f"INSERT INTO {model.TABLE_NAME} "
+                    f"({', '.join(model.FIELDS)}) VALUES "
+                    f"({', '.join('?' for _ in model.FIELDS)})",
+                    (
+                        [record.to_dict().get(field) for field in model.FIELDS]
+                        for record in records
+                    ),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def compact(self, model, records):
+        """Checkpoints the write-ahead log into the database file."""
+        with self._lock:
+            self.ensure_table(model).execute(
+                "PRAGMA wal_checkpoint(TRUNCATE)"
+            )
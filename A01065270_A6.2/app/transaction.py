@@ -0,0 +1,228 @@
+"""
+transaction.py - Atomic changes spanning several collections.
+
+This module provides the `Transaction` context manager. It locks the
+collections it is given (in a fixed order, so transactions never deadlock
+each other), loads each of them once, and stages every change in memory.
+When the block exits normally, all staged changes are committed together
+through the storage backend, with one write per changed collection, and
+either every collection is updated or none is. If the block raises, the
+staged changes are discarded. Inside a batch (see `app.batch`), committed
+changes are kept in memory until the batch's next checkpoint instead.
+
+Example:
+    with Transaction(Hotel, Reservation) as tx:
+        tx.remove(Hotel, hotel_id)
+        for reservation in tx.find_by(Reservation, "hotel_id", hotel_id):
+            tx.remove(Reservation, reservation.reservation_id)
+
+Inside the block, read and write the collections through the transaction
+only; the model methods (`create_hotel`, ...) would commit on their own.
+
+Author: José Manuel Romo
+"""
+
+import copy
+import os
+from contextlib import ExitStack
+
+from app.indexes import UniqueViolation
+from app.storage import get_backend
+
+
+class Transaction:
+    """Stages changes to several collections and commits them together."""
+
+    def __init__(self, *models):
+        """Initializes a transaction over the given model classes."""
+        self.models = sorted(
+            set(models), key=lambda model: os.path.abspath(model.FILE_PATH)
+        )
+        self.backend = get_backend()
+        self._stack = None
+        self._records = {}
+        self._changes = {}
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    @property
+    def active(self):
+        """Whether the transaction has begun and not yet ended."""
+        return self._stack is not None
+
+    def begin(self):
+        """Locks and loads the collections of the transaction."""
+        if self.active:
+            raise RuntimeError("Transaction already begun.")
+        stack = ExitStack()
+        try:
+            for model in self.models:
+                repository = model.repository()
+                stack.enter_context(repository.lock)
+                stack.enter_context(self.backend.lock(model))
+                self.backend.recover(model)
+                repository.refresh()
+                self._records[model] = dict(repository.records)
+                self._changes[model] = []
+        except BaseException:
+            stack.close()
+            raise
+        self._stack = stack
+
+    def commit(self):
+        """Persists every staged change and releases the collections."""
+        try:
+            entries = [
+                (model, self._records[model], self._changes[model])
+                for model in self.models if self._changes[model]
+            ]
+            deferring = [
+                model.repository().deferring for model, _, _ in entries
+            ]
+            if any(deferring) and not all(deferring):
+                raise RuntimeError(
+                    "Cannot commit collections with deferred persistence "
+                    "together with ones without it."
+                )
+            if entries and not any(deferring):
+                self.backend.commit_transaction(entries)
+            for model, records, changes in entries:
+                model.repository().install(records, changes)
+        finally:
+            self._end()
+
+    def rollback(self):
+        """Discards every staged change and releases the collections."""
+        self._end()
+
+    def _end(self):
+        """Releases the locks held by the transaction."""
+        if self._stack is not None:
+            stack, self._stack = self._stack, None
+            stack.close()
+        self._records = {}
+        self._changes = {}
+
+    def _collection(self, model):
+        """Returns the staged records of a model of the transaction."""
+        if not self.active:
+            raise RuntimeError("Transaction is not active.")
+        try:
+            return self._records[model]
+        except KeyError:
+            raise ValueError(
+                f"{model.__name__} is not part of this transaction."
+            ) from None
+
+    def get(self, model, record_id):
+        """Returns the staged record with the given key, or None."""
+        return self._collection(model).get(record_id)
+
+    def contains(self, model, record_id):
+        """Checks whether a staged record with the given key exists."""
+        return record_id in self._collection(model)
+
+    def all(self, model):
+        """Returns every staged record of a model."""
+        return list(self._collection(model).values())
+
+    def find_by(self, model, field, value):
+        """Returns the staged records whose `field` equals `value`.
+
+        Candidates come from the repository's index over `field` (the
+        repository is locked, so it still holds the state the transaction
+        began with) plus the records staged since.
+        """
+        records = self._collection(model)
+        key = model.PRIMARY_KEY
+        candidates = dict.fromkeys(
+            getattr(record, key)
+            for record in model.repository().find_by(field, value)
+        )
+        candidates.update(
+            (getattr(change, key), None)
+            for op, change in self._changes[model] if op == "put"
+        )
+        return [
+            records[record_id] for record_id in candidates
+            if record_id in records
+            and getattr(records[record_id], field) == value
+        ]
+
+    def _check_unique(self, model, record_id, values):
+        """Raises `UniqueViolation` if staged values break a unique index.
+
+        Holders of a value come from the repository's index (the state
+        the transaction began with) plus the records staged since, and
+        are checked against their staged version.
+        """
+        records = self._collection(model)
+        key = model.PRIMARY_KEY
+        staged = [
+            getattr(change, key)
+            for op, change in self._changes[model] if op == "put"
+        ]
+        for index in model.repository().unique_indexes:
+            if index.field not in values:
+                continue
+            value = values[index.field]
+            normalized = index.key(value)
+            for other in index.lookup(value) + staged:
+                holder = records.get(other)
+                if (other != record_id and holder is not None
+                        and index.key(getattr(holder, index.field))
+                        == normalized):
+                    raise UniqueViolation(
+                        f"{index.field} {value!r} already used by {other}"
+                    )
+
+    def add(self, record):
+        """Stages a new record; False if its key already exists.
+
+        Raises `UniqueViolation` if one of its values belongs to another
+        record (see `app.indexes.UniqueIndex`).
+        """
+        model = type(record)
+        records = self._collection(model)
+        record_id = getattr(record, model.PRIMARY_KEY)
+        if record_id in records:
+            return False
+        self._check_unique(model, record_id, vars(record))
+        records[record_id] = record
+        self._changes[model].append(("put", record))
+        return True
+
+    def update(self, model, record_id, **changes):
+        """Stages non-empty field changes to a record.
+
+        Returns the updated record, or None if the key does not exist;
+        raises `UniqueViolation` if a new value belongs to another record.
+        The cached record is copied, so a rollback leaves it unchanged.
+        """
+        records = self._collection(model)
+        record = records.get(record_id)
+        if record is None:
+            return None
+        values = {field: value for field, value in changes.items() if value}
+        self._check_unique(model, record_id, values)
+        record = copy.copy(record)
+        for field, value in values.items():
+            setattr(record, field, value)
+        records[record_id] = record
+        self._changes[model].append(("put", record))
+        return record
+
+    def remove(self, model, record_id):
+        """Stages the removal of a record; returns it, or None if absent."""
+        record = self._collection(model).pop(record_id, None)
+        if record is not None:
+            self._changes[model].append(("delete", record_id))
+        return record
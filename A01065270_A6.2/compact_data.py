@@ -0,0 +1,20 @@
+"""
+compact_data.py
+
+This script compacts the stored hotels, customers and reservations: each
+collection is rewritten as a single snapshot file and, with the journal
+storage backend, its journal of pending changes is removed.
+
+Usage:
+    python compact_data.py
+
+Author: José Manuel Romo
+"""
+
+from app import Customer, Hotel, Reservation
+
+
+if __name__ == "__main__":
+    for model in (Hotel, Customer, Reservation):
+        model.repository().compact()
+        print(f"Compacted {model.FILE_PATH}.")
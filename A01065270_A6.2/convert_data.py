@@ -0,0 +1,55 @@
+"""
+convert_data.py
+
+This script rewrites the hotel, customer and reservation data files in another
+on-disk format (see app/storage/formats.py). The files are read in whatever
+format they hold.
+
+Usage:
+    python convert_data.py {json,compact,jsonl,binary}
+
+Set `DATA_FORMAT` in `app/config.py` to the same format afterwards, so that
+later changes keep writing it.
+
+Author: José Manuel Romo
+"""
+
+import argparse
+import os
+
+from app import Customer, Hotel, Reservation
+from app.storage import formats, get_backend
+
+
+def convert(model, data_format):
+    """Rewrites the data file of a model class in `data_format`.
+
+    Returns the file sizes before and after, in bytes.
+    """
+    with get_backend("json").lock(model):
+        before = os.path.getsize(model.FILE_PATH)
+        records = [
+            model.SCHEMA.coerce(data) for data in formats.load(model.FILE_PATH)
+        ]
+        formats.save(model.FILE_PATH, records, model.SCHEMA, data_format)
+        return before, os.path.getsize(model.FILE_PATH)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert the data files to another format."
+    )
+    parser.add_argument("format", choices=sorted(formats.FORMATS))
+    args = parser.parse_args()
+
+    for model in (Hotel, Customer, Reservation):
+        if not os.path.exists(model.FILE_PATH):
+            print(f"Skipped {model.FILE_PATH}: not found.")
+            continue
+        try:
+            size_before, size_after = convert(model, args.format)
+        except (IOError, ValueError) as e:
+            print(f"Error converting {model.FILE_PATH}: {e}")
+            continue
+        print(f"Converted {model.FILE_PATH} to {args.format}: "
+              f"{size_before} -> {size_after} bytes.")
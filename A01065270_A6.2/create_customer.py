@@ -6,29 +6,14 @@ This script creates a new customer with a unique ID in the hotel management syst
 Usage:
     python create_customer.py "<Customer Name>" "<Email>"
 
+The customer is created by the hotel service when it is running (see
+hotel_service.py), and directly in the data files otherwise.
+
 Author: José Manuel Romo
 """
 
 import sys
-import random
-from app.base_classes.customer import Customer
-
-
-def generate_unique_id():
-    """
-    Generate a random uint16 ID and ensure it is unique in the database.
-
-    Returns:
-        int: A unique 16-bit integer ID.
-    """
-    existing_customers = Customer.load_from_file()
-    existing_ids = {cust.customer_id for cust in existing_customers}
-
-    while True:
-        new_id = random.randint(0, 65535)
-        if new_id not in existing_ids:
-            return new_id
-
+from app.service import call
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
@@ -38,11 +23,12 @@ if __name__ == "__main__":
     customer_name = sys.argv[1]
     customer_email = sys.argv[2]
 
-    customer_id = generate_unique_id()
-
-    new_customer = Customer.create_customer(customer_id, customer_name, customer_email)
+    new_customer = call(
+        "create_customer", name=customer_name, email=customer_email
+    )
 
     if new_customer:
-        print(f"Customer '{customer_name}' created successfully with ID {customer_id}.")
+        print(f"Customer '{customer_name}' created successfully "
+              f"with ID {new_customer['customer_id']}.")
     else:
         print("Failed to create customer.")
@@ -4,45 +4,42 @@ create_hotel.py
 This script creates a new hotel with a unique ID in the hotel management system.
 
 Usage:
-    python create_hotel.py "<Hotel Name>" "<Location>"
+    python create_hotel.py "<Hotel Name>" "<Location>" [<Rooms>]
+
+The hotel is created by the hotel service when it is running (see
+hotel_service.py), and directly in the data files otherwise. It has one room
+unless <Rooms> says otherwise.
 
 Author: José Manuel Romo
 """
 
 import sys
-import random
-from app.base_classes.hotel import Hotel
-
-
-def generate_unique_id():
-    """
-    Generate a random uint16 ID and ensure it is unique in the database.
-
-    Returns:
-        int: A unique 16-bit integer ID.
-    """
-    existing_hotels = Hotel.load_from_file()
-    existing_ids = {hotel.hotel_id for hotel in existing_hotels}
-
-    while True:
-        new_id = random.randint(0, 65535)
-        if new_id not in existing_ids:
-            return new_id
-
+from app.service import CommandError, call
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python create_hotel.py <Hotel Name> <Location>")
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python create_hotel.py <Hotel Name> <Location> "
+              "[<Rooms>]")
         sys.exit(1)
 
     hotel_name = sys.argv[1]
     hotel_location = sys.argv[2]
-
-    hotel_id = generate_unique_id()
-
-    new_hotel = Hotel.create_hotel(hotel_id, hotel_name, hotel_location)
+    params = {"name": hotel_name, "location": hotel_location}
+    if len(sys.argv) == 4:
+        try:
+            params["rooms"] = int(sys.argv[3])
+        except ValueError:
+            print("Error: Rooms must be an integer.")
+            sys.exit(1)
+
+    try:
+        new_hotel = call("create_hotel", **params)
+    except CommandError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
     if new_hotel:
-        print(f"Hotel '{hotel_name}' created successfully with ID {hotel_id}.")
+        print(f"Hotel '{hotel_name}' created successfully "
+              f"with ID {new_hotel['hotel_id']}.")
     else:
         print("Failed to create hotel.")
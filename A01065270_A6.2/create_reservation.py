@@ -5,34 +5,24 @@ This script creates a new reservation with a unique ID in the hotel management s
 
 Usage:
     python create_reservation.py <Customer ID> <Hotel ID>
+        [<Check-in> <Check-out>]
+
+Dates are given as YYYY-MM-DD. A reservation with dates is only created if the
+hotel has a room free for every night of the stay.
+
+The reservation is created by the hotel service when it is running (see
+hotel_service.py), and directly in the data files otherwise.
 
 Author: José Manuel Romo
 """
 
 import sys
-import random
-from app.base_classes.reservation import Reservation
-
-
-def generate_unique_id():
-    """
-    Generate a random uint16 ID and ensure it is unique in the database.
-
-    Returns:
-        int: A unique 16-bit integer ID.
-    """
-    existing_reservations = Reservation.load_from_file()
-    existing_ids = {res.reservation_id for res in existing_reservations}  # Set of existing IDs
-
-    while True:
-        new_id = random.randint(0, 65535)  # Generate a 16-bit integer ID
-        if new_id not in existing_ids:  # Ensure uniqueness
-            return new_id
-
+from app.service import CommandError, call
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python create_reservation.py <Customer ID> <Hotel ID>")
+    if len(sys.argv) not in (3, 5):
+        print("Usage: python create_reservation.py <Customer ID> <Hotel ID> "
+              "[<Check-in> <Check-out>]")
         sys.exit(1)
 
     try:
@@ -42,12 +32,19 @@ if __name__ == "__main__":
         print("Error: Customer ID and Hotel ID must be integers.")
         sys.exit(1)
 
-    reservation_id = generate_unique_id()  # Generate unique ID
+    params = {"customer_id": customer_id, "hotel_id": hotel_id}
+    if len(sys.argv) == 5:
+        params.update(check_in=sys.argv[3], check_out=sys.argv[4])
 
-    new_reservation = Reservation.create_reservation(reservation_id, customer_id, hotel_id)
+    try:
+        new_reservation = call("create_reservation", **params)
+    except CommandError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
     if new_reservation:
-        print(f"Reservation created successfully with ID {reservation_id} "
+        print("Reservation created successfully with ID "
+              f"{new_reservation['reservation_id']} "
               f"for Customer {customer_id} at Hotel {hotel_id}.")
     else:
         print("Failed to create reservation.")
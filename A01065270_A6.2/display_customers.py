@@ -4,16 +4,30 @@ display_customers.py
 This script displays all customers stored in the hotel management system.
 
 Usage:
-    python display_customers.py
+    python display_customers.py [--offset N] [--limit N] [--after ID]
+        [--filter FIELD=VALUE ...] [--format {text,jsonl,csv}]
+
+The listing is produced by the hotel service when it is running (see
+hotel_service.py). Otherwise the customers are read from the data file one at a
+time, so a page is shown without loading the whole collection.
 
 Author: José Manuel Romo
 """
 
-from app.base_classes.customer import Customer
+import argparse
+import sys
 
+from app import listing
+from app.service import CommandError, call
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Display the stored customers."
+    )
+    listing.add_arguments(parser)
+    args = parser.parse_args()
+
     try:
-        Customer.display_customers()
-    except AttributeError:
-        print("Error: The Customer class is not properly loaded.")
+        sys.stdout.write(call("display", collection="customers", **vars(args)))
+    except CommandError as e:
+        parser.error(str(e))
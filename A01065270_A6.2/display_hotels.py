@@ -4,15 +4,28 @@ display_hotels.py
 This script displays all hotels stored in the hotel management system.
 
 Usage:
-    python display_hotels.py
+    python display_hotels.py [--offset N] [--limit N] [--after ID]
+        [--filter FIELD=VALUE ...] [--format {text,jsonl,csv}]
+
+The listing is produced by the hotel service when it is running (see
+hotel_service.py). Otherwise the hotels are read from the data file one at a
+time, so a page is shown without loading the whole collection.
 
 Author: José Manuel Romo
 """
 
-from app.base_classes.hotel import Hotel
+import argparse
+import sys
+
+from app import listing
+from app.service import CommandError, call
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Display the stored hotels.")
+    listing.add_arguments(parser)
+    args = parser.parse_args()
+
     try:
-        Hotel.display_hotels()
-    except AttributeError:
-        print("Error: The Hotel class is not properly loaded.")
+        sys.stdout.write(call("display", collection="hotels", **vars(args)))
+    except CommandError as e:
+        parser.error(str(e))
@@ -4,15 +4,32 @@ display_reservations.py
 This script displays all reservations stored in the hotel management system.
 
 Usage:
-    python display_reservations.py
+    python display_reservations.py [--offset N] [--limit N] [--after ID]
+        [--filter FIELD=VALUE ...] [--format {text,jsonl,csv}]
+
+The listing is produced by the hotel service when it is running (see
+hotel_service.py). Otherwise the reservations are read from the data file one
+at a time, so a page is shown without loading the whole collection.
 
 Author: José Manuel Romo
 """
 
-from app.base_classes.reservation import Reservation
+import argparse
+import sys
+
+from app import listing
+from app.service import CommandError, call
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Display the stored reservations."
+    )
+    listing.add_arguments(parser)
+    args = parser.parse_args()
+
     try:
-        Reservation.display_reservations()
-    except AttributeError:
-        print("Error: The Reservation class is not properly loaded.")
+        sys.stdout.write(
+            call("display", collection="reservations", **vars(args))
+        )
+    except CommandError as e:
+        parser.error(str(e))
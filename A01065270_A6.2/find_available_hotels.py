@@ -0,0 +1,40 @@
+"""
+find_available_hotels.py
+
+This script lists the hotels at a location with a room free for a stay.
+
+Usage:
+    python find_available_hotels.py "<Location>" <Check-in> <Check-out>
+
+Dates are given as YYYY-MM-DD; the stay covers the nights from check-in up to,
+but not including, check-out. The search is run by the hotel service when it
+is running (see hotel_service.py), and directly on the data files otherwise.
+
+Author: José Manuel Romo
+"""
+
+import argparse
+
+from app.service import CommandError, call
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="List the hotels at a location with a room free "
+                    "for a stay."
+    )
+    parser.add_argument("location")
+    parser.add_argument("check_in", help="Check-in date (YYYY-MM-DD).")
+    parser.add_argument("check_out", help="Check-out date (YYYY-MM-DD).")
+    args = parser.parse_args()
+
+    try:
+        hotels = call("find_available", **vars(args))
+    except CommandError as e:
+        parser.error(str(e))
+
+    if not hotels:
+        print(f"No hotels in {args.location} have rooms free "
+              f"from {args.check_in} to {args.check_out}.")
+    for hotel in hotels:
+        print(f"ID: 0x{hotel['hotel_id']:04X} | Name: {hotel['name']} "
+              f"| Rooms: {hotel['rooms']}")
@@ -0,0 +1,88 @@
+"""
+benchmark_formats.py
+
+Script to compare the on-disk formats of the data files: for each format, the
+file size and the time to save and to load a collection of generated
+reservations and customers. The files are written to a temporary directory;
+the data files are not touched.
+
+Usage:
+    python helper_scripts/benchmark_formats.py [<num_records>] [--repeat N]
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import Customer, Reservation  # noqa: E402
+from app.storage import formats  # noqa: E402
+
+
+def sample_records(model, count):
+    """Returns `count` generated record dicts of a model class.
+
+    The records are built by the model, so they always match its schema.
+    """
+    if model is Reservation:
+        first = datetime.date(2024, 1, 1)
+        return [
+            Reservation(
+                i, i * 7 % 100003, i * 13 % 10007,
+                (first + datetime.timedelta(i % 365)).isoformat(),
+                (first + datetime.timedelta(i % 365 + 1 + i % 7)).isoformat(),
+            ).to_dict()
+            for i in range(count)
+        ]
+    return [
+        Customer(
+            i, f"Customer Número {i}", f"customer{i}@example.com"
+        ).to_dict()
+        for i in range(count)
+    ]
+
+
+def best_time(function, repeat):
+    """Returns the fastest of `repeat` runs of `function`, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark(model, count, repeat):
+    """Prints the size and save/load times of each format for a model."""
+    records = sample_records(model, count)
+    print(f"\n=== {count} {model.__name__} records ===")
+    print(f"{'format':<8} {'size (KiB)':>11} "
+          f"{'save (ms)':>10} {'load (ms)':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in formats.FORMATS:
+            path = os.path.join(tmp_dir, f"{model.__name__}.{name}")
+            save = best_time(
+                lambda: formats.save(path, records, model.SCHEMA, name), repeat
+            )
+            load = best_time(
+                lambda: [model.from_dict(data) for data in formats.load(path)],
+                repeat,
+            )
+            size = os.path.getsize(path) / 1024
+            print(f"{name:<8} {size:>11.1f} "
+                  f"{save * 1000:>10.1f} {load * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the data file formats."
+    )
+    parser.add_argument("num_records", type=int, nargs="?", default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for benchmarked in (Reservation, Customer):
+        benchmark(benchmarked, args.num_records, args.repeat)
@@ -0,0 +1,108 @@
+"""
+dedupe_customers.py
+
+Script to remove the customers whose email duplicates an earlier customer's,
+so that the customer file satisfies the unique email constraint. Emails are
+compared as `normalize_email` does (ignoring case and surrounding spaces), and
+the first customer with each email is kept. Reservations of the removed
+customers are moved to the kept customer with the same email.
+
+Each file is read once, one record at a time, and rewritten in the configured
+`DATA_FORMAT`; only the kept customers and the set of emails seen are held in
+memory.
+
+Usage:
+    python helper_scripts/dedupe_customers.py [--dry-run]
+
+With the journal storage backend, run compact_data.py first; the SQLite
+backend is not supported.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.config as conf  # noqa: E402
+from app import Customer, Reservation  # noqa: E402
+from app.base_classes.customer import normalize_email  # noqa: E402
+from app.storage import formats, get_backend  # noqa: E402
+
+
+def dedupe(records):
+    """Returns the customer dicts to keep and `{removed_id: kept_id}`."""
+    kept = []
+    owners = {}
+    replaced = {}
+    for data in records:
+        data = Customer.SCHEMA.coerce(data)
+        email = normalize_email(data["email"])
+        owner = owners.get(email)
+        if owner is None:
+            owners[email] = data["customer_id"]
+            kept.append(data)
+        else:
+            replaced[data["customer_id"]] = owner
+    return kept, replaced
+
+
+def remap_reservations(replaced):
+    """Moves the reservations of removed customers; returns how many."""
+    moved = 0
+    reservations = []
+    for data in formats.iter_file(Reservation.FILE_PATH):
+        data = Reservation.SCHEMA.coerce(data)
+        if data["customer_id"] in replaced:
+            data["customer_id"] = replaced[data["customer_id"]]
+            moved += 1
+        reservations.append(data)
+    if moved:
+        formats.save(Reservation.FILE_PATH, reservations, Reservation.SCHEMA)
+    return moved
+
+
+def main(dry_run=False):
+    """Deduplicates the customer file; returns a summary line."""
+    backend = get_backend()
+    with backend.lock(Customer), backend.lock(Reservation):
+        kept, replaced = dedupe(formats.iter_file(Customer.FILE_PATH))
+        summary = (f"{len(kept) + len(replaced)} customers read, "
+                   f"{len(replaced)} duplicates")
+        if dry_run or not replaced:
+            return summary + " found."
+        moved = 0
+        if os.path.exists(Reservation.FILE_PATH):
+            moved = remap_reservations(replaced)
+        formats.save(Customer.FILE_PATH, kept, Customer.SCHEMA)
+    return summary + f" removed, {moved} reservations moved."
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Remove duplicate customer emails."
+    )
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only count the duplicates.")
+    args = parser.parse_args()
+
+    if conf.STORAGE_BACKEND == "sqlite":
+        print("Error: the SQLite backend is not supported.")
+        sys.exit(1)
+    journals = [
+        path for path in (Customer.FILE_PATH + ".journal",
+                          Reservation.FILE_PATH + ".journal")
+        if os.path.exists(path)
+    ]
+    if journals:
+        print(f"Error: pending journal {journals[0]}; "
+              "run compact_data.py first.")
+        sys.exit(1)
+    if not os.path.exists(Customer.FILE_PATH):
+        print(f"Error: {Customer.FILE_PATH} not found.")
+        sys.exit(1)
+
+    try:
+        print(main(args.dry_run))
+    except (IOError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
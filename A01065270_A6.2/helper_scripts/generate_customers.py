@@ -2,11 +2,24 @@
 generate_customers.py
 
 Script to generate random customers and add them to the system.
+
+By default all customers are created in this process with a single
+`Customer.bulk_create` call. With `--processes`, one `create_customer.py`
+process is started per customer instead, which exercises concurrent
+writers.
+
+Usage:
+    python helper_scripts/generate_customers.py <num_customers> [--processes]
 """
+import os
 import sys
 import random
 import subprocess
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.base_classes.customer import Customer  # noqa: E402
+
 FIRST_NAMES = [
     "Alice", "Michael", "Sophie",
     "Daniel", "Emma", "James",
@@ -25,10 +38,16 @@ EMAIL_DOMAINS = [
 ]
 
 def generate_random_customer():
-    """Generates a random customer name and email."""
+    """Generates a random customer name and email.
+
+    Emails must be unique, so they get a random number: only 500 name and
+    domain combinations exist. The rare repeats are rejected on creation.
+    """
     first_name = random.choice(FIRST_NAMES)
     last_name = random.choice(LAST_NAMES)
-    email = f"{first_name.lower()}.{last_name.lower()}@{random.choice(EMAIL_DOMAINS)}"
+    number = random.randrange(1000000)
+    email = (f"{first_name.lower()}.{last_name.lower()}{number}"
+             f"@{random.choice(EMAIL_DOMAINS)}")
     return f"{first_name} {last_name}", email
 
 def generate_customers(num_customers=10):
@@ -36,17 +55,29 @@ def generate_customers(num_customers=10):
     commands = []
     for _ in range(num_customers):
         name, email = generate_random_customer()
-        cmd = [sys.executable, "createCustomer.py", name, email]
+        cmd = [sys.executable, "create_customer.py", name, email]
         commands.append(cmd)
     return commands
 
+def bulk_create_customers(num_customers=10):
+    """Creates random customers in-process with a single save."""
+    customer_ids = Customer.id_allocator().allocate_many(num_customers)
+    customers = [
+        Customer(customer_id, *generate_random_customer())
+        for customer_id in customer_ids
+    ]
+    result = Customer.bulk_create(customers)
+    for customer_id, reason in result.failed:
+        print(f"Customer ID {customer_id} not created: {reason}.")
+    return len(result.succeeded)
+
 def execute_customer_creation(commands):
     """Executes the generated customer creation commands in parallel."""
     processes = []
 
+    # Arguments are passed without a shell, so names with spaces need no
+    # quoting; concurrent writes are serialized by the customer file lock.
     for cmd in commands:
-        # Ensure names with spaces are properly quoted
-        cmd[1] = f'"{cmd[1]}"'
         process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
         processes.append(process)
 
@@ -59,22 +90,25 @@ def execute_customer_creation(commands):
             print(stderr.strip())
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python generateCustomers.py <num_customers>")
+    args = [arg for arg in sys.argv[1:] if arg != "--processes"]
+    if len(args) != 1:
+        print(
+            "Usage: python generate_customers.py <num_customers> [--processes]"
+        )
         sys.exit(1)
 
     try:
-        n_customers = int(sys.argv[1])
+        n_customers = int(args[0])
         if n_customers <= 0:
             raise ValueError
     except ValueError:
         print("Error: <n_customers> must be a positive integer.")
         sys.exit(1)
 
-    commands = generate_customers(n_customers)
-
-    if commands:
+    if "--processes" in sys.argv:
+        commands = generate_customers(n_customers)
         execute_customer_creation(commands)
         print(f"{n_customers} customers created successfully.")
     else:
-        print("No valid customers could be created.")
+        created = bulk_create_customers(n_customers)
+        print(f"{created} customers created successfully.")
@@ -1,56 +1,58 @@
-import json
-import random
+"""
+generate_reservations.py
+
+Script to generate random reservations between the existing customers and
+hotels. All reservations are created in this process with a single
+`Reservation.bulk_create` call.
+
+Usage:
+    python helper_scripts/generate_reservations.py [<num_reservations>]
+"""
 import os
-import subprocess
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import Customer, Hotel, Reservation  # noqa: E402
 
-def load_json(file_path):
-    """Loads data from a JSON file if it exists."""
-    if not os.path.exists(file_path):
-        return []
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (IOError, json.JSONDecodeError) as e:
-        print(f"Error loading {file_path}: {e}")
-        return []
 
 def generate_reservations(num_reservations=10):
-    """Generates reservation creation commands using real customer and hotel IDs."""
-    customers = load_json("data/Customers.json")
-    hotels = load_json("data/Hotels.json")
-    
+    """Generates reservations using real customer and hotel IDs."""
+    customers = Customer.repository().all()
+    hotels = Hotel.repository().all()
+
     if not customers or not hotels:
         print("No customers or hotels found. Ensure data/Customers.json and data/Hotels.json exist.")
-        return
-    
-    commands = []
-    for _ in range(num_reservations):
-        customer = random.choice(customers)
-        hotel = random.choice(hotels)
-        
-        customer_id = customer.get("customer_id")
-        hotel_id = hotel.get("hotel_id")
-        
-        if customer_id is None or hotel_id is None:
-            continue  # Skip invalid entries
-        
-        cmd = ["python3", "createReservation.py", str(customer_id), str(hotel_id)]
-        commands.append(cmd)
-    
-    return commands
-
-def execute_reservation_creation(commands):
-    """Executes the generated reservation creation commands."""
-    for cmd in commands:
-        subprocess.run(cmd)
+        return []
+
+    reservation_ids = Reservation.id_allocator().allocate_many(
+        num_reservations
+    )
+    return [
+        Reservation(
+            reservation_id,
+            random.choice(customers).customer_id,
+            random.choice(hotels).hotel_id,
+        )
+        for reservation_id in reservation_ids
+    ]
 
 if __name__ == "__main__":
-    num_reservations = 10  # Change this number to generate more or fewer reservations
-    commands = generate_reservations(num_reservations)
-    
-    if commands:
-        execute_reservation_creation(commands)
-        print(f"{num_reservations} reservations created successfully.")
+    num_reservations = 10  # Default number of reservations to generate
+    if len(sys.argv) > 1:
+        try:
+            num_reservations = int(sys.argv[1])
+            if num_reservations <= 0:
+                raise ValueError
+        except ValueError:
+            print("Error: <num_reservations> must be a positive integer.")
+            sys.exit(1)
+
+    reservations = generate_reservations(num_reservations)
+
+    if reservations:
+        result = Reservation.bulk_create(reservations)
+        print(f"{len(result.succeeded)} reservations created successfully.")
     else:
         print("No valid reservations could be created.")
-
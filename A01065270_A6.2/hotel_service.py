@@ -0,0 +1,54 @@
+"""
+hotel_service.py
+
+This script runs, stops or checks the hotel service, a long-running process
+that keeps the hotels, customers and reservations in memory and runs the
+commands of the other scripts for them (see app/service.py).
+
+Usage:
+    python hotel_service.py start     # Runs in the foreground until stopped
+    python hotel_service.py stop
+    python hotel_service.py status
+
+Author: José Manuel Romo
+"""
+
+import argparse
+import signal
+import sys
+
+from app import service
+
+
+def _interrupt(_signum, _frame):
+    """Stops the service on SIGTERM as on Ctrl+C."""
+    raise KeyboardInterrupt
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the hotel service.")
+    parser.add_argument("action", choices=("start", "stop", "status"))
+    args = parser.parse_args()
+
+    if args.action == "start":
+        signal.signal(signal.SIGTERM, _interrupt)
+        print(f"Hotel service listening on {service.address()}.")
+        try:
+            service.serve()
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        except KeyboardInterrupt:
+            pass
+        print("Hotel service stopped.")
+    elif args.action == "stop":
+        try:
+            service.request("shutdown")
+            print("Hotel service stopped.")
+        except service.ServiceUnavailable:
+            print("Hotel service is not running.")
+    elif service.is_running():
+        print(f"Hotel service is running on {service.address()}.")
+    else:
+        print("Hotel service is not running.")
+        sys.exit(1)
@@ -0,0 +1,49 @@
+"""
+migrate_to_sqlite.py
+
+This script copies the hotels, customers and reservations stored in the
+JSON data files (`data/*.json`, including any pending journal entries)
+into the SQLite database used by the "sqlite" storage backend. Existing
+rows of the migrated tables are replaced.
+
+Usage:
+    python migrate_to_sqlite.py [--db data/hotel.db]
+
+Set `STORAGE_BACKEND = "sqlite"` in `app/config.py` afterwards to use it.
+
+Author: José Manuel Romo
+"""
+
+import argparse
+
+import app.config as conf
+from app import Customer, Hotel, Reservation
+from app.storage import get_backend
+
+
+def migrate(db_path):
+    """Copies every JSON collection into the SQLite database at db_path."""
+    source = get_backend("journal")  # Snapshot plus any pending journal
+    target = get_backend("sqlite")
+    conf.SQLITE_PATH = db_path
+
+    counts = {}
+    for model in (Hotel, Customer, Reservation):
+        records = source.load(model)
+        target.replace_all(model, records)
+        counts[model.TABLE_NAME] = len(records)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Migrate the JSON data files to SQLite."
+    )
+    parser.add_argument(
+        "--db", default=conf.SQLITE_PATH,
+        help=f"SQLite database to write (default: {conf.SQLITE_PATH})."
+    )
+    args = parser.parse_args()
+
+    for table, count in migrate(args.db).items():
+        print(f"Migrated {count} rows into {table}.")
@@ -0,0 +1,60 @@
+"""
+run_commands.py
+
+This script runs many hotel management commands in one process, reading them
+from a file or from standard input (interactively when it is a terminal). The
+collections are loaded once, and the changes are written at the end, or every
+N commands with --checkpoint (see app/batch.py for the command syntax).
+
+Usage:
+    python run_commands.py [FILE] [--checkpoint N]
+
+Example:
+    python run_commands.py commands.txt --checkpoint 1000
+
+Author: José Manuel Romo
+"""
+
+import argparse
+import sys
+
+from app import Customer, Hotel, Reservation
+from app.batch import Batch, CommandShell
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run hotel management commands."
+    )
+    parser.add_argument(
+        "file", nargs="?",
+        help="File of commands (default: standard input)."
+    )
+    parser.add_argument(
+        "--checkpoint", type=int, default=0, metavar="N",
+        help="Write the changes every N commands (default: only at the end)."
+    )
+    args = parser.parse_args()
+    if args.checkpoint < 0:
+        parser.error("--checkpoint must not be negative.")
+
+    commands = None
+    if args.file:
+        # pylint: disable-next=consider-using-with
+        commands = open(args.file, "r", encoding="utf-8")
+    elif not sys.stdin.isatty():
+        commands = sys.stdin
+
+    try:
+        with Batch(Hotel, Customer, Reservation) as batch:
+            shell = CommandShell(batch, args.checkpoint, stdin=commands)
+            shell.cmdloop()
+    except KeyboardInterrupt:
+        print("\nInterrupted; changes since the last checkpoint "
+              "were discarded.")
+        sys.exit(1)
+    finally:
+        if args.file:
+            commands.close()
+
+    if shell.errors:
+        sys.exit(1)
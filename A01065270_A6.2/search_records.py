@@ -0,0 +1,45 @@
+"""
+search_records.py
+
+This script finds hotels by name or location, or customers by name or email.
+
+Usage:
+    python search_records.py {hotels,customers} "<Query>" [--field FIELD ...]
+        [--exact]
+
+Every word of the query must start a word of the record, ignoring case and
+accents ("cancun" finds "Cancún"); with --exact whole words must match. The
+search is run by the hotel service when it is running (see hotel_service.py),
+and on the data files otherwise.
+
+Author: José Manuel Romo
+"""
+
+import argparse
+import json
+
+from app.service import CommandError, call
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Search hotels or customers by their text fields."
+    )
+    parser.add_argument("collection", choices=["hotels", "customers"])
+    parser.add_argument("query")
+    parser.add_argument(
+        "--field", dest="fields", action="append",
+        help="Field to search (repeatable; default: all text fields).",
+    )
+    parser.add_argument("--exact", action="store_true",
+                        help="Match whole words only.")
+    args = parser.parse_args()
+
+    try:
+        records = call("search", **vars(args))
+    except CommandError as e:
+        parser.error(str(e))
+
+    if not records:
+        print(f"No {args.collection} match '{args.query}'.")
+    for record in records:
+        print(json.dumps(record, ensure_ascii=False))
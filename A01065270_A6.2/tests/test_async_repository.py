@@ -0,0 +1,120 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import app.config as conf
+from app.async_repository import AsyncRepository, run_blocking
+from app.base_classes.customer import Customer
+from app.base_classes.hotel import Hotel
+from app.base_classes.reservation import Reservation
+from app.repository import Repository
+from app.storage import JsonFileBackend
+
+
+class TestAsyncRepository(unittest.IsolatedAsyncioTestCase):
+    """Tests for the asyncio access to the collections."""
+
+    def setUp(self):
+        """Point the model classes at temporary data files."""
+        Repository.reset_all()
+        AsyncRepository.reset_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.patches = [patch.object(conf, "STORAGE_BACKEND", "json")] + [
+            patch.object(
+                model, "FILE_PATH", os.path.join(self.tmp_dir.name, name)
+            )
+            for model, name in (
+                (Hotel, "Hotels.json"),
+                (Customer, "Customers.json"),
+                (Reservation, "Reservations.json"),
+            )
+        ]
+        for p in self.patches:
+            p.start()
+        self.hotels = Hotel.async_repository()
+
+    async def asyncTearDown(self):
+        await self.hotels.close()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+        Repository.reset_all()
+        AsyncRepository.reset_all()
+
+    async def test_reads_and_writes(self):
+        """Test the awaitable counterparts of the repository methods."""
+        self.assertTrue(
+            await self.hotels.add(Hotel(1, "Grand Hotel", "New York"))
+        )
+        self.assertFalse(
+            await self.hotels.add(Hotel(1, "Grand Hotel", "New York"))
+        )
+        updated = await self.hotels.update(1, name="Grand Plaza")
+        self.assertEqual(updated.name, "Grand Plaza")
+        self.assertIsNone(await self.hotels.update(2, name="City Inn"))
+        self.assertTrue(await self.hotels.contains(1))
+        self.assertEqual(
+            [h.hotel_id for h in await self.hotels.find_by(
+                "location", "New York"
+            )],
+            [1],
+        )
+        self.assertEqual((await self.hotels.remove(1)).name, "Grand Plaza")
+        self.assertEqual(await self.hotels.all(), [])
+
+        Repository.reset_all()
+        self.assertEqual(Hotel.load_from_file(), [])
+
+    async def test_concurrent_writes_share_a_commit(self):
+        """Test that writes queued together are committed together."""
+        with patch.object(Repository, "persist", autospec=True,
+                          side_effect=Repository.persist) as persist:
+            results = await asyncio.gather(*(
+                self.hotels.add(Hotel(i, f"Hotel {i}", "Cancún"))
+                for i in range(50)
+            ))
+        self.assertEqual(results, [True] * 50)
+        self.assertEqual(persist.call_count, 1)
+
+        Repository.reset_all()
+        self.assertEqual(len(Hotel.load_from_file()), 50)
+
+    async def test_failed_write_does_not_affect_its_batch(self):
+        """Test that an invalid write fails alone."""
+        results = await asyncio.gather(
+            self.hotels.add(Hotel(1, "Grand Hotel", "New York")),
+            self.hotels.add(object()),
+            self.hotels.add_many([{"hotel_id": "x"}, Hotel(2, "A", "B")]),
+            return_exceptions=True,
+        )
+        self.assertTrue(results[0])
+        self.assertIsInstance(results[1], AttributeError)
+        self.assertEqual([h.hotel_id for h in results[2].succeeded], [2])
+        self.assertEqual(results[2].failed[0][0], "x")
+
+    async def test_concurrent_reads_share_a_load(self):
+        """Test that concurrent readers wait for a single load."""
+        Hotel.save_to_file([Hotel(1, "Grand Hotel", "New York")])
+        with patch.object(JsonFileBackend, "load", autospec=True,
+                          side_effect=JsonFileBackend.load) as load:
+            hotels = await asyncio.gather(
+                *(self.hotels.get(1) for _ in range(20))
+            )
+        self.assertEqual({hotel.name for hotel in hotels}, {"Grand Hotel"})
+        self.assertEqual(load.call_count, 1)
+
+    async def test_run_blocking(self):
+        """Test running a transaction in the shared thread pool."""
+        Customer.create_customer(1, "Alice", "alice@example.com")
+        Hotel.create_hotel(10, "Grand Hotel", "New York")
+        reservation = await run_blocking(Reservation.book, 100, 1, 10)
+        self.assertEqual(reservation.hotel_id, 10)
+        self.assertFalse(await run_blocking(Reservation.book, 101, 2, 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
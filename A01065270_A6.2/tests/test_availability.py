@@ -0,0 +1,256 @@
+import json
+import random
+import unittest
+
+from app.availability import AvailabilityIndex, Occupancy, stay_nights
+from app.base_classes.customer import Customer
+from app.base_classes.hotel import Hotel
+from app.base_classes.reservation import Reservation
+from app.commands import Dispatcher
+from app.indexes import ConstraintViolation
+from app.service import CommandError
+from tests.test_commands import CommandTestCase
+
+
+class TestOccupancy(unittest.TestCase):
+    """Tests for the per-hotel occupancy segment tree."""
+
+    def test_matches_night_counts(self):
+        """Test that peaks match a night-by-night count."""
+        rng = random.Random(7)
+        base = 739000
+        occupancy = Occupancy()
+        nights = [0] * 60
+        stays = []
+        for _ in range(500):
+            if stays and rng.random() < 0.4:
+                start, end = stays.pop(rng.randrange(len(stays)))
+                occupancy.remove(base + start, base + end)
+                step = -1
+            else:
+                start = rng.randrange(59)
+                end = rng.randrange(start + 1, 60)
+                stays.append((start, end))
+                occupancy.add(base + start, base + end)
+                step = 1
+            for night in range(start, end):
+                nights[night] += step
+            start = rng.randrange(59)
+            end = rng.randrange(start + 1, 60)
+            self.assertEqual(
+                occupancy.peak(base + start, base + end),
+                max(nights[start:end]),
+            )
+
+        for start, end in stays:
+            occupancy.remove(base + start, base + end)
+        self.assertFalse(occupancy)
+
+    def test_stay_nights(self):
+        """Test that stays are validated and converted to nights."""
+        start, end = stay_nights("2024-02-28", "2024-03-01")
+        self.assertEqual(end - start, 2)
+        for check_in, check_out in (("2024-03-01", "2024-03-01"),
+                                    ("2024-03-02", "2024-03-01"),
+                                    ("2024-02-30", "2024-03-01"),
+                                    ("", "2024-03-01"), (None, None)):
+            with self.subTest(check_in=check_in, check_out=check_out):
+                with self.assertRaises(ValueError):
+                    stay_nights(check_in, check_out)
+
+
+class TestAvailabilityIndex(unittest.TestCase):
+    """Tests for the availability index of the reservations."""
+
+    def test_put_and_discard(self):
+        """Test that reservations occupy rooms until moved or removed."""
+        index = AvailabilityIndex()
+        index.put(1, Reservation(1, 1, 5, "2024-05-01", "2024-05-04"))
+        index.put(2, Reservation(2, 1, 5, "2024-05-03", "2024-05-06"))
+        index.put(3, Reservation(3, 1, 5))  # Undated
+        self.assertEqual(index.occupied(5, "2024-05-01", "2024-05-10"), 2)
+        self.assertEqual(index.occupied(5, "2024-05-04", "2024-05-10"), 1)
+        self.assertEqual(index.occupied(6, "2024-05-01", "2024-05-10"), 0)
+        self.assertTrue(index.is_available(5, 2, "2024-05-04", "2024-05-05"))
+        self.assertFalse(index.is_available(5, 2, "2024-05-03", "2024-05-04"))
+
+        index.put(2, Reservation(2, 1, 6, "2024-05-03", "2024-05-06"))
+        self.assertEqual(index.occupied(5, "2024-05-01", "2024-05-10"), 1)
+        self.assertEqual(index.occupied(6, "2024-05-01", "2024-05-10"), 1)
+        index.discard(1)
+        index.discard(1)
+        self.assertEqual(index.occupied(5, "2024-05-01", "2024-05-10"), 0)
+
+
+class TestBooking(CommandTestCase):
+    """Tests for dated reservations and the availability search."""
+
+    def setUp(self):
+        super().setUp()
+        Hotel.create_hotel(1, "Grand Hotel", "Cancún", rooms=2)
+        Hotel.create_hotel(2, "Sea View", "Cancún")
+        Hotel.create_hotel(3, "City Inn", "Tulum", rooms=5)
+        Customer.create_customer(1, "Alice", "alice@example.com")
+
+    def test_book_checks_rooms(self):
+        """Test that a hotel is not booked beyond its rooms."""
+        self.assertTrue(Reservation.book(1, 1, 2, "2024-05-01", "2024-05-03"))
+        self.assertFalse(Reservation.book(2, 1, 2, "2024-05-02", "2024-05-04"))
+        self.assertTrue(Reservation.book(3, 1, 2, "2024-05-03", "2024-05-04"))
+        self.assertTrue(Reservation.book(4, 1, 1, "2024-05-01", "2024-05-09"))
+        self.assertTrue(Reservation.book(5, 1, 1, "2024-05-02", "2024-05-04"))
+        self.assertFalse(Reservation.book(6, 1, 1, "2024-05-03", "2024-05-05"))
+        self.assertTrue(Reservation.book(7, 1, 1))  # Undated
+        self.assertEqual(
+            Reservation.rooms_occupied(1, "2024-05-01", "2024-05-31"), 2
+        )
+        with self.assertRaises(ValueError):
+            Reservation.book(8, 1, 1, "2024-05-03", "2024-05-01")
+
+        Reservation.cancel_reservation(5)
+        self.assertTrue(Reservation.book(6, 1, 1, "2024-05-03", "2024-05-05"))
+
+    def test_find_available(self):
+        """Test that only hotels with a free room are found."""
+        Reservation.book(1, 1, 2, "2024-05-01", "2024-05-03")
+        found = Hotel.find_available("Cancún", "2024-05-02", "2024-05-04")
+        self.assertEqual([hotel.hotel_id for hotel in found], [1])
+        found = Hotel.find_available("Cancún", "2024-05-03", "2024-05-04")
+        self.assertEqual([hotel.hotel_id for hotel in found], [1, 2])
+        self.assertEqual(
+            Hotel.find_available("Paris", "2024-05-03", "2024-05-04"), []
+        )
+
+    def test_state_survives_reload(self):
+        """Test that the index is rebuilt from the stored reservations."""
+        Reservation.book(1, 1, 2, "2024-05-01", "2024-05-03")
+        Reservation.repository().invalidate()
+        self.assertEqual(
+            Reservation.rooms_occupied(2, "2024-05-02", "2024-05-03"), 1
+        )
+        self.assertEqual(
+            Reservation.find_by_id(1).to_dict()["check_out"], "2024-05-03"
+        )
+
+    def test_legacy_records(self):
+        """Test that records stored without the new fields still load."""
+        with open(Hotel.FILE_PATH, "w", encoding="utf-8") as f:
+            json.dump([{"hotel_id": 9, "name": "Old", "location": "Rome"}], f)
+        with open(Reservation.FILE_PATH, "w", encoding="utf-8") as f:
+            json.dump([{"reservation_id": 1, "customer_id": "1",
+                        "hotel_id": "9"}], f)
+        self.assertEqual(Hotel.find_by_id(9).rooms, Hotel.DEFAULT_ROOMS)
+        self.assertEqual(Reservation.find_by_id(1).check_in, "")
+        self.assertEqual(
+            Reservation.rooms_occupied(9, "2024-05-01", "2024-05-02"), 0
+        )
+
+    def test_bulk_operations_check_rooms(self):
+        """Test that bulk stays count the stays of the same batch."""
+        Reservation.book(1, 1, 1, "2024-05-01", "2024-05-03")
+        created = Reservation.bulk_create([
+            Reservation(2, 1, 1, "2024-05-02", "2024-05-04"),
+            {"reservation_id": 3, "customer_id": 1, "hotel_id": 1,
+             "check_in": "2024-05-02", "check_out": "2024-05-03"},
+            Reservation(4, 1, 1, "2024-05-03", "2024-05-05"),
+            Reservation(5, 1, 9, "2024-05-01", "2024-05-02"),
+            Reservation(6, 1, 1, "2024-05-04", "2024-05-01"),
+            Reservation(7, 1, 9),
+            Reservation(1, 1, 3),
+        ])
+        self.assertEqual(
+            [r.reservation_id for r in created.succeeded], [2, 4, 7]
+        )
+        self.assertEqual(
+            [(i, reason.split(":")[0]) for i, reason in created.failed],
+            [(3, "no room free from 2024-05-02 to 2024-05-03"),
+             (5, "hotel 9 not found"), (6, "invalid stay"),
+             (1, "already exists")],
+        )
+
+        updated = Reservation.bulk_update({
+            7: {"hotel_id": 1, "check_in": "2024-05-02",
+                "check_out": "2024-05-03"},
+            1: {"hotel_id": 3},
+            3: {"hotel_id": 3},
+            4: {"check_in": "2024-05-01"},
+            2: {"stars": 5},
+        })
+        self.assertEqual(
+            [r.reservation_id for r in updated.succeeded], [1, 4]
+        )
+        self.assertEqual(updated.failed, [
+            (7, "no room free from 2024-05-02 to 2024-05-03"),
+            (3, "not found"), (2, "unknown fields: stars"),
+        ])
+        self.assertEqual(
+            Reservation.rooms_occupied(1, "2024-05-01", "2024-05-09"), 2
+        )
+        self.assertEqual(Reservation.find_by_id(7).hotel_id, 9)
+        self.assertEqual(Reservation.find_by_id(4).check_in, "2024-05-01")
+
+    def test_other_paths_cannot_overbook(self):
+        """Test that stays and rooms bypassing the checks are rejected."""
+        Reservation.book(1, 1, 2, "2024-05-01", "2024-05-03")
+        Reservation.create_reservation(2, 1, 2)
+        repository = Reservation.repository()
+        with self.assertRaises(ConstraintViolation):
+            repository.update(2, check_in="2024-05-01",
+                              check_out="2024-05-02")
+        with self.assertRaises(ConstraintViolation):
+            repository.add(Reservation(3, 1, 2, "2024-05-01", "2024-05-02"))
+        self.assertEqual(
+            [r for r, _ in repository.update_many(
+                {1: {"hotel_id": 1}, 2: {"customer_id": 5}}
+            ).failed],
+            [1],
+        )
+        self.assertEqual(
+            Reservation.rooms_occupied(2, "2024-05-01", "2024-05-03"), 1
+        )
+
+        Reservation.book(3, 1, 1, "2024-05-01", "2024-05-03")
+        Reservation.book(4, 1, 1, "2024-05-02", "2024-05-04")
+        with self.assertRaises(ConstraintViolation):
+            Hotel.repository().update(1, rooms=1)
+        self.assertFalse(Hotel(1, "Grand Hotel", "Cancún").update(rooms=1))
+        with self.assertRaises(CommandError):
+            Dispatcher().execute("update_hotel", {"hotel_id": 1, "rooms": 1})
+        self.assertEqual(Hotel.find_by_id(1).rooms, 2)
+        Reservation.cancel_reservation(4)
+        self.assertEqual(Hotel.update_hotel(1, rooms=1).rooms, 1)
+        self.assertEqual(Hotel.update_hotel(1, rooms=3).rooms, 3)
+        self.assertIsNone(Hotel.update_hotel(99, rooms=3))
+
+    def test_commands(self):
+        """Test the dated reservation and search commands."""
+        dispatcher = Dispatcher()
+        reservation = dispatcher.execute("create_reservation", {
+            "customer_id": 1, "hotel_id": 2,
+            "check_in": "2024-05-01", "check_out": "2024-05-03",
+        })
+        self.assertEqual(reservation["check_in"], "2024-05-01")
+        self.assertIsNone(dispatcher.execute("create_reservation", {
+            "customer_id": 1, "hotel_id": 2,
+            "check_in": "2024-05-02", "check_out": "2024-05-03",
+        }))
+        hotels = dispatcher.execute("find_available", {
+            "location": "Cancún",
+            "check_in": "2024-05-01", "check_out": "2024-05-02",
+        })
+        self.assertEqual([hotel["hotel_id"] for hotel in hotels], [1])
+        for command, params in (
+            ("create_reservation", {"customer_id": 1, "hotel_id": 2,
+                                    "check_in": "2024-05-01"}),
+            ("find_available", {"location": "Cancún", "check_in": "May 1",
+                                "check_out": "2024-05-02"}),
+            ("create_hotel", {"name": "Inn", "location": "Rome",
+                              "rooms": 0}),
+        ):
+            with self.subTest(command=command):
+                with self.assertRaises(CommandError):
+                    dispatcher.execute(command, params)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import io
+import os
+import unittest
+from unittest.mock import patch
+
+import app.config as conf
+
+from app.base_classes.customer import Customer
+from app.base_classes.hotel import Hotel
+from app.base_classes.reservation import Reservation
+from app.batch import Batch, CommandShell, parse_line
+from app.commands import Dispatcher
+from app.repository import Repository
+from app.service import CommandError
+from app.storage import get_backend
+
+from tests.test_commands import CommandTestCase
+
+MODELS = (Hotel, Customer, Reservation)
+
+
+class TestBatch(CommandTestCase):
+    """Tests for deferring persistence to the checkpoints of a batch."""
+
+    def setUp(self):
+        super().setUp()
+        self.sqlite_patch = patch.object(
+            conf, "SQLITE_PATH", self.data_path("hotel.db")
+        )
+        self.sqlite_patch.start()
+
+    def tearDown(self):
+        get_backend("sqlite").close()
+        self.sqlite_patch.stop()
+        super().tearDown()
+
+    def stored(self, model):
+        """Returns the records stored for a model, bypassing the cache."""
+        return {
+            getattr(record, model.PRIMARY_KEY): record
+            for record in model.repository().backend.load(model)
+        }
+
+    def test_changes_are_written_at_checkpoints(self):
+        """Test that changes stay in memory until a checkpoint."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        with Batch(*MODELS) as batch:
+            Hotel.create_hotel(2, "City Inn", "Los Angeles")
+            Customer.create_customer(1, "Alice", "alice@example.com")
+            Hotel.repository().update(1, name="Grand Plaza")
+            self.assertIn(2, Hotel.repository().records)
+            self.assertEqual(list(self.stored(Hotel)), [1])
+            self.assertEqual(self.stored(Customer), {})
+
+            self.assertEqual(batch.checkpoint(), 3)
+            self.assertEqual(self.stored(Hotel)[1].name, "Grand Plaza")
+            self.assertIn(1, self.stored(Customer))
+
+            Reservation.create_reservation(100, 1, 2)
+        self.assertIn(100, self.stored(Reservation))
+        self.assertFalse(Hotel.repository().deferring)
+
+    def test_transactions_are_deferred(self):
+        """Test that transactions inside a batch wait for its checkpoint."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        Reservation.create_reservation(100, 1, 1)
+        with Batch(*MODELS):
+            self.assertTrue(Hotel.delete_hotel_with_reservations(1))
+            self.assertIsNone(Reservation.find_by_id(100))
+            self.assertIn(100, self.stored(Reservation))
+        self.assertEqual(self.stored(Hotel), {})
+        self.assertEqual(self.stored(Reservation), {})
+
+    def test_error_discards_changes(self):
+        """Test that a failing batch drops its unwritten changes."""
+        with self.assertRaises(RuntimeError):
+            with Batch(*MODELS) as batch:
+                Hotel.create_hotel(1, "Grand Hotel", "New York")
+                batch.checkpoint()
+                Hotel.create_hotel(2, "City Inn", "Los Angeles")
+                raise RuntimeError("interrupted")
+        self.assertEqual(list(self.stored(Hotel)), [1])
+        self.assertEqual(
+            [h.hotel_id for h in Hotel.repository().all()], [1]
+        )
+
+    def test_shell_runs_command_file(self):
+        """Test running a file of commands with checkpoints."""
+        commands = io.StringIO(
+            '# Setup\n'
+            'create_hotel "Grand Hotel" "New York"\n'
+            'create_customer name=Alice email=alice@example.com\n'
+            '\n'
+            'update_hotel 99 location=Boston\n'
+            'cancel_reservation abc\n'
+            'display hotels --format csv\n'
+        )
+        output = io.StringIO()
+        with Batch(*MODELS) as batch:
+            shell = CommandShell(batch, checkpoint_every=2, stdin=commands,
+                                 stdout=output)
+            shell.cmdloop()
+            self.assertEqual(len(self.stored(Customer)), 1)
+        self.assertEqual((shell.executed, shell.errors), (4, 1))
+        lines = output.getvalue().splitlines()
+        self.assertIn('"name": "Grand Hotel"', lines[0])
+        self.assertEqual(lines[2], "null")
+        self.assertEqual(lines[3], "Error: reservation_id must be an integer.")
+        self.assertEqual(lines[4], "hotel_id,name,location,rooms")
+
+
+class TestJournalBatch(TestBatch):
+    """Runs the batch tests with the journal backend."""
+
+    BACKEND = "journal"
+
+    def test_checkpoint_appends_to_journal(self):
+        """Test that a checkpoint writes the journal, not the snapshot."""
+        with Batch(*MODELS):
+            Hotel.create_hotel(1, "Grand Hotel", "New York")
+        self.assertFalse(os.path.exists(Hotel.FILE_PATH))
+        self.assertTrue(os.path.exists(Hotel.FILE_PATH + ".journal"))
+        Repository.reset_all()
+        self.assertEqual(Hotel.find_by_id(1).name, "Grand Hotel")
+
+
+class TestSqliteBatch(TestBatch):
+    """Runs the batch tests with the SQLite backend."""
+
+    BACKEND = "sqlite"
+
+
+class TestParseLine(unittest.TestCase):
+    """Tests for parsing command lines."""
+
+    def test_parse_line(self):
+        """Test positional, named and display arguments."""
+        dispatcher = Dispatcher()
+        self.assertIsNone(parse_line(dispatcher, "  # comment"))
+        self.assertEqual(
+            parse_line(dispatcher, 'update_hotel 5 location="Los Angeles"'),
+            ("update_hotel", {"hotel_id": 5, "location": "Los Angeles"}),
+        )
+        self.assertEqual(
+            parse_line(dispatcher, "create_customer Bob bob@example.com"),
+            ("create_customer", {"name": "Bob", "email": "bob@example.com"}),
+        )
+        command, params = parse_line(
+            dispatcher, "display hotels --limit 3 --filter location=Boston"
+        )
+        self.assertEqual(command, "display")
+        self.assertEqual(params["limit"], 3)
+        self.assertEqual(params["filters"], ["location=Boston"])
+
+    def test_invalid_lines(self):
+        """Test that invalid lines raise CommandError."""
+        dispatcher = Dispatcher()
+        for line in ('create_hotel "unterminated', "drop hotels",
+                     "cancel_reservation 1 2", "delete_hotel one",
+                     "display rooms", "display hotels --limit x"):
+            with self.subTest(line=line):
+                with self.assertRaises(CommandError):
+                    parse_line(dispatcher, line)
+
+
+if __name__ == "__main__":
+    unittest.main()
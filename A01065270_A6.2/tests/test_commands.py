@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import app.config as conf
+from app.base_classes.customer import Customer
+from app.base_classes.hotel import Hotel
+from app.base_classes.reservation import Reservation
+from app.commands import Dispatcher
+from app.ids import IdAllocator
+from app.repository import Repository
+from app.service import CommandError
+
+
+class CommandTestCase(unittest.TestCase):
+    """Points the model classes at temporary data files."""
+
+    BACKEND = "json"
+
+    def setUp(self):
+        Repository.reset_all()
+        IdAllocator.reset_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.patches = [patch.object(conf, "STORAGE_BACKEND", self.BACKEND)]
+        self.patches += [
+            patch.object(model, "FILE_PATH", self.data_path(name))
+            for model, name in (
+                (Hotel, "Hotels.json"),
+                (Customer, "Customers.json"),
+                (Reservation, "Reservations.json"),
+            )
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+        Repository.reset_all()
+        IdAllocator.reset_all()
+
+    def data_path(self, name):
+        """Returns the path of a file in the temporary data directory."""
+        return os.path.join(self.tmp_dir.name, name)
+
+
+class TestDispatcher(CommandTestCase):
+    """Tests for the commands shared by the scripts and the service."""
+
+    def setUp(self):
+        super().setUp()
+        self.dispatcher = Dispatcher()
+
+    def test_create_and_cancel(self):
+        """Test the create and cancel commands."""
+        hotel = self.dispatcher.execute(
+            "create_hotel", {"name": "Grand Hotel", "location": "New York"}
+        )
+        self.assertEqual(hotel["name"], "Grand Hotel")
+        customer = self.dispatcher.execute(
+            "create_customer", {"name": "Alice", "email": "alice@example.com"}
+        )
+        reservation = self.dispatcher.execute("create_reservation", {
+            "customer_id": customer["customer_id"],
+            "hotel_id": hotel["hotel_id"],
+        })
+        self.assertEqual(
+            Reservation.find_by_id(reservation["reservation_id"]).to_dict(),
+            reservation,
+        )
+
+        params = {"reservation_id": reservation["reservation_id"]}
+        self.assertTrue(self.dispatcher.execute("cancel_reservation", params))
+        self.assertFalse(self.dispatcher.execute("cancel_reservation", params))
+
+    def test_update_and_delete(self):
+        """Test the update and delete commands."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        Customer.create_customer(2, "Alice", "alice@example.com")
+        hotel = self.dispatcher.execute(
+            "update_hotel", {"hotel_id": 1, "location": "Boston"}
+        )
+        self.assertEqual(hotel, {"hotel_id": 1, "name": "Grand Hotel",
+                                 "location": "Boston", "rooms": 1})
+        customer = self.dispatcher.execute(
+            "update_customer", {"customer_id": 2, "email": "a@example.com"}
+        )
+        self.assertEqual(customer["email"], "a@example.com")
+        self.assertIsNone(
+            self.dispatcher.execute("update_hotel", {"hotel_id": 9})
+        )
+        self.assertTrue(
+            self.dispatcher.execute("delete_hotel", {"hotel_id": 1})
+        )
+        self.assertTrue(
+            self.dispatcher.execute("delete_customer", {"customer_id": 2})
+        )
+        self.assertEqual(Hotel.repository().all(), [])
+
+    def test_display(self):
+        """Test that listings are returned as text, streamed or not."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        Hotel.create_hotel(2, "City Inn", "Los Angeles")
+        for dispatcher in (self.dispatcher, Dispatcher(streaming=True)):
+            with self.subTest(streaming=dispatcher.streaming):
+                output = dispatcher.execute("display", {
+                    "collection": "hotels", "after": "1",
+                    "output_format": "csv",
+                })
+                self.assertEqual(
+                    output,
+                    "hotel_id,name,location,rooms\n2,City Inn,Los Angeles,1\n",
+                )
+
+    def test_invalid_commands(self):
+        """Test that invalid commands raise CommandError."""
+        invalid = [
+            ("drop_tables", {}),
+            ("create_hotel", {"name": "Grand Hotel"}),
+            ("create_hotel", ["Grand Hotel", "New York"]),
+            ("cancel_reservation", {"reservation_id": "5"}),
+            ("display", {"collection": "rooms"}),
+            ("display", {"collection": "hotels", "filters": ["stars=5"]}),
+            ("display", {"collection": "hotels", "limit": "ten"}),
+        ]
+        for command, params in invalid:
+            with self.subTest(command=command, params=params):
+                with self.assertRaises(CommandError):
+                    self.dispatcher.execute(command, params)
+
+    def test_commands(self):
+        """Test that the available commands are listed."""
+        self.assertIn("create_hotel", self.dispatcher.commands())
+        self.assertIn("display", self.dispatcher.commands())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,21 @@
+import io
 import unittest
 from unittest.mock import patch, mock_open
 import json
 from app.base_classes.customer import Customer
+from app.repository import Repository
 
 class TestCustomer(unittest.TestCase):
     """Tests for the Customer class."""
 
+    def setUp(self):
+        """Drop cached collections so each test sees its mocked data."""
+        Repository.reset_all()
+
+    @patch("os.replace")
     @patch("builtins.open", new_callable=mock_open, read_data="[]")
     @patch("os.makedirs")
-    def test_create_customer(self, _mock_makedirs, _mock_file):
+    def test_create_customer(self, _mock_makedirs, _mock_file, _mock_replace):
         """Test creating a customer and ensuring it's saved."""
         with patch("app.base_classes.customer.Customer.load_from_file", return_value=[]):
             customer = Customer.create_customer(1, "Alice Johnson", "alice@example.com")
@@ -21,7 +28,7 @@ class TestCustomer(unittest.TestCase):
     def test_load_customers(self, _mock_exists, mock_file):
         """Test loading customers from file."""
         customer_data = json.dumps([{"customer_id": 1, "name": "Alice Johnson", "email": "alice@example.com"}])
-        mock_file.return_value.read.return_value = customer_data
+        mock_file.return_value.read.return_value = customer_data.encode()
 
         customers = Customer.load_from_file()
         self.assertEqual(len(customers), 1)
@@ -31,7 +38,7 @@ class TestCustomer(unittest.TestCase):
     @patch("os.path.exists", return_value=True)
     def test_load_from_file_invalid_json(self, _mock_exists, mock_file):
         """Test handling of invalid JSON when loading customers."""
-        mock_file.return_value.read.return_value = "{invalid_json:}"
+        mock_file.return_value.read.return_value = b"{invalid_json:}"
 
         with patch("app.config.debug_log") as mock_debug_log:
             customers = Customer.load_from_file()
@@ -97,7 +104,8 @@ class TestCustomer(unittest.TestCase):
         CustomerList = [Customer(1, "Alice Johnson", "alice@example.com")]
 
         with patch("app.config.debug_log") as mock_debug_log:
-            Customer.save_to_file(CustomerList)
+            with self.assertRaises(IOError):
+                Customer.save_to_file(CustomerList)
             mock_debug_log.assert_called_with("Error saving customers: Disk full")
 
     @patch("app.base_classes.customer.Customer.load_from_file", return_value=[
@@ -122,13 +130,47 @@ class TestCustomer(unittest.TestCase):
         Customer(1, "Alice Johnson", "alice@example.com"),
         Customer(2, "Bob Smith", "bob@example.com")
     ])
-    @patch("builtins.print")
-    def test_display_customers(self, mock_print, _mock_load):
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_display_customers(self, mock_stdout, _mock_load):
         """Test displaying customers."""
         Customer.display_customers()
-        mock_print.assert_any_call("\n=== Customer List ===")
-        mock_print.assert_any_call("ID: 1 | Name: Alice Johnson | Email: alice@example.com")
-        mock_print.assert_any_call("ID: 2 | Name: Bob Smith | Email: bob@example.com")
+        output = mock_stdout.getvalue()
+        self.assertIn("\n=== Customer List ===\n", output)
+        self.assertIn("ID: 1 | Name: Alice Johnson | Email: alice@example.com\n", output)
+        self.assertIn("ID: 2 | Name: Bob Smith | Email: bob@example.com\n", output)
+
+    @patch("app.base_classes.customer.Customer.load_from_file", return_value=[
+        Customer(1, "Alice Johnson", "alice@example.com")
+    ])
+    @patch("app.base_classes.customer.Customer.save_to_file")
+    @patch("app.config.debug_log")
+    def test_bulk_create(self, mock_debug_log, mock_save, _mock_load):
+        """Test creating many customers with a single save."""
+        result = Customer.bulk_create([
+            Customer(2, "Bob Smith", "bob@example.com"),
+            {"customer_id": 1, "name": "Copy", "email": "copy@example.com"},
+        ])
+        self.assertEqual([c.customer_id for c in result.succeeded], [2])
+        self.assertEqual(result.failed, [(1, "already exists")])
+        mock_save.assert_called_once()
+        mock_debug_log.assert_called_with(
+            "Customer ID 1 not created: already exists."
+        )
+
+    @patch("app.base_classes.customer.Customer.load_from_file", return_value=[
+        Customer(1, "Alice Johnson", "alice@example.com"),
+        Customer(2, "Bob Smith", "bob@example.com")
+    ])
+    @patch("app.base_classes.customer.Customer.save_to_file")
+    def test_bulk_update_and_delete(self, mock_save, _mock_load):
+        """Test updating and deleting many customers."""
+        result = Customer.bulk_update({1: {"email": "alice@mail.com"}})
+        self.assertEqual(result.succeeded[0].email, "alice@mail.com")
+
+        result = Customer.bulk_delete([1, 2, 3])
+        self.assertEqual(len(result.succeeded), 2)
+        self.assertEqual(result.failed, [(3, "not found")])
+        mock_save.assert_called_with([])
 
 
 if __name__ == "__main__":
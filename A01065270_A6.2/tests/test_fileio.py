@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import unittest
+from unittest.mock import patch
+
+from app.base_classes.customer import Customer
+from app.fileio import FileLock, atomic_open
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestFileIO(unittest.TestCase):
+    """Tests for the file locking and atomic write helpers."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "Customers.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_atomic_open_replaces_file(self):
+        """Test that the file is replaced only once the block completes."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("old")
+
+        with atomic_open(self.path) as f:
+            f.write("new")
+            with open(self.path, "r", encoding="utf-8") as current:
+                self.assertEqual(current.read(), "old")
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "new")
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["Customers.json"])
+
+    def test_atomic_open_keeps_file_on_error(self):
+        """Test that a failed write leaves the original file untouched."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("old")
+
+        with self.assertRaises(RuntimeError):
+            with atomic_open(self.path) as f:
+                f.write("partial")
+                raise RuntimeError("interrupted")
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "old")
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["Customers.json"])
+
+    def test_lock_is_shared_and_reentrant(self):
+        """Test that one lock serves a path and can be nested."""
+        lock = FileLock.for_path(self.path + ".lock")
+        self.assertIs(lock, FileLock.for_path(self.path + ".lock"))
+        with lock:
+            with lock:
+                self.assertTrue(os.path.exists(self.path + ".lock"))
+
+    def test_lock_excludes_other_threads(self):
+        """Test that a second thread waits for the lock."""
+        lock = FileLock.for_path(self.path + ".lock")
+        acquired = threading.Event()
+
+        def worker():
+            with lock:
+                acquired.set()
+
+        with lock:
+            thread = threading.Thread(target=worker)
+            thread.start()
+            self.assertFalse(acquired.wait(0.1))
+        thread.join(5)
+        self.assertTrue(acquired.is_set())
+
+    def test_parallel_processes_do_not_lose_writes(self):
+        """Test that customers created by concurrent processes all persist."""
+        script = textwrap.dedent(f"""
+            import sys
+            from app.base_classes.customer import Customer
+            Customer.FILE_PATH = {self.path!r}
+            worker = int(sys.argv[1])
+            for n in range(10):
+                Customer.create_customer(
+                    worker * 100 + n, "Name",
+                    f"name{{worker}}.{{n}}@example.com",
+                )
+        """)
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-c", script, str(worker)], cwd=ROOT_DIR
+            )
+            for worker in range(4)
+        ]
+        for process in processes:
+            self.assertEqual(process.wait(60), 0)
+
+        with patch.object(Customer, "FILE_PATH", self.path):
+            ids = {c.customer_id for c in Customer.load_from_file()}
+        self.assertEqual(
+            ids, {w * 100 + n for w in range(4) for n in range(10)}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import app.config as conf
+from app.base_classes.customer import Customer
+from app.base_classes.reservation import Reservation
+from app.repository import Repository
+from app.storage import formats
+from app.storage.formats import FormatError
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CUSTOMERS = [
+    {"customer_id": 1, "name": "Alice", "email": "alice@example.com"},
+    {"customer_id": 2, "name": "José Núñez", "email": "jose@example.com"},
+    {"customer_id": 3, "name": "", "email": "zoë@example.com"},
+]
+
+
+class TestFormats(unittest.TestCase):
+    """Tests for the on-disk formats of the collection files."""
+
+    def setUp(self):
+        """Create a temporary data directory."""
+        Repository.reset_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "Customers.json")
+
+    def tearDown(self):
+        """Remove the temporary data directory."""
+        self.tmp_dir.cleanup()
+        Repository.reset_all()
+
+    def test_round_trip(self):
+        """Test that every format reads back the records it wrote."""
+        for name in formats.FORMATS:
+            with self.subTest(format=name):
+                formats.save(self.path, CUSTOMERS, Customer.SCHEMA, name)
+                self.assertEqual(formats.load(self.path), CUSTOMERS)
+                self.assertEqual(list(formats.iter_file(self.path)), CUSTOMERS)
+                formats.save(self.path, [], Customer.SCHEMA, name)
+                self.assertEqual(formats.load(self.path), [])
+                self.assertEqual(list(formats.iter_file(self.path)), [])
+
+    def test_binary_streaming(self):
+        """Test that binary files are streamed across several batches."""
+        records = [
+            {"reservation_id": i, "customer_id": -i, "hotel_id": i * 3,
+             "check_in": "2024-05-01", "check_out": ""}
+            for i in range(10)
+        ]
+        formats.save(self.path, records, Reservation.SCHEMA, "binary")
+        with patch.object(formats.BinaryFormat, "BATCH", 3):
+            self.assertEqual(list(formats.iter_file(self.path)), records)
+        formats.save(self.path, CUSTOMERS, Customer.SCHEMA, "binary")
+        with patch.object(formats.BinaryFormat, "BATCH", 2):
+            self.assertEqual(list(formats.iter_file(self.path)), CUSTOMERS)
+
+    def test_detect(self):
+        """Test that formats are told apart by their first bytes."""
+        self.assertIs(formats.detect(b"HREC\x01"), formats.FORMATS["binary"])
+        self.assertIs(formats.detect(b'{"a": 1}\n'), formats.FORMATS["jsonl"])
+        self.assertIs(
+            formats.detect(b"\xef\xbb\xbf{"), formats.FORMATS["jsonl"]
+        )
+        self.assertIs(formats.detect(b"[\n    {"), formats.FORMATS["json"])
+        self.assertIs(formats.detect(b""), formats.FORMATS["jsonl"])
+
+    def test_invalid_files(self):
+        """Test that damaged files raise FormatError."""
+        formats.save(self.path, CUSTOMERS, Customer.SCHEMA, "binary")
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for damaged in (data[:-3], data[:10], data + b"x"):
+            with self.subTest(size=len(damaged)):
+                with open(self.path, "wb") as f:
+                    f.write(damaged)
+                with self.assertRaises(FormatError):
+                    formats.load(self.path)
+        with open(self.path, "wb") as f:
+            f.write(data[:-3])
+        with self.assertRaises(FormatError):
+            list(formats.iter_file(self.path))
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('{"customer_id": 1}\n2, 3\n')
+        with self.assertRaises(ValueError):
+            formats.load(self.path)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('{"customer_id": 1}')
+        with self.assertRaises(FormatError):
+            formats.save(self.path, [{"customer_id": 1}], Customer.SCHEMA,
+                         "binary")
+        with self.assertRaises(ValueError):
+            formats.get_format("xml")
+
+    def test_models(self):
+        """Test that the models save in DATA_FORMAT and load any format."""
+        customers = [Customer.from_dict(data) for data in CUSTOMERS]
+        with patch.object(Customer, "FILE_PATH", self.path):
+            for name in formats.FORMATS:
+                with self.subTest(format=name):
+                    with patch.object(conf, "DATA_FORMAT", name):
+                        Customer.save_to_file(customers)
+                    with open(self.path, "rb") as f:
+                        detected = formats.detect(f.read(64))
+                    self.assertIs(
+                        detected,
+                        formats.FORMATS["json" if name == "compact" else name],
+                    )
+                    self.assertEqual(
+                        [c.to_dict() for c in Customer.load_from_file()],
+                        CUSTOMERS,
+                    )
+
+    def test_benchmark_script(self):
+        """Test that the format benchmark runs on the current schemas."""
+        result = subprocess.run(
+            [sys.executable, os.path.join("helper_scripts",
+                                          "benchmark_formats.py"),
+             "20", "--repeat", "1"],
+            cwd=ROOT_DIR, capture_output=True, text=True, timeout=60,
+            check=False,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("=== 20 Reservation records ===", result.stdout)
+        self.assertIn("=== 20 Customer records ===", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,21 @@
+import io
 import unittest
 from unittest.mock import patch, mock_open
 import json
 from app.base_classes.hotel import Hotel
+from app.repository import Repository
 
 class TestHotel(unittest.TestCase):
     """Tests for the Hotel class."""
 
+    def setUp(self):
+        """Drop cached collections so each test sees its mocked data."""
+        Repository.reset_all()
+
+    @patch("os.replace")
     @patch("builtins.open", new_callable=mock_open, read_data="[]")
     @patch("os.makedirs")
-    def test_create_hotel(self, _mock_makedirs, _mock_file):
+    def test_create_hotel(self, _mock_makedirs, _mock_file, _mock_replace):
         """Test creating a hotel and ensuring it's saved."""
         with patch("app.base_classes.hotel.Hotel.load_from_file", return_value=[]):
             hotel = Hotel.create_hotel(1, "Grand Hotel", "New York")
@@ -21,7 +28,7 @@ class TestHotel(unittest.TestCase):
     def test_load_hotels(self, _mock_exists, mock_file):
         """Test loading hotels from file."""
         hotel_data = json.dumps([{"hotel_id": 1, "name": "Grand Hotel", "location": "New York"}])
-        mock_file.return_value.read.return_value = hotel_data
+        mock_file.return_value.read.return_value = hotel_data.encode()
 
         hotels = Hotel.load_from_file()
         self.assertEqual(len(hotels), 1)
@@ -31,7 +38,7 @@ class TestHotel(unittest.TestCase):
     @patch("os.path.exists", return_value=True)
     def test_load_from_file_invalid_json(self, _mock_exists, mock_file):
         """Test handling of invalid JSON when loading hotels."""
-        mock_file.return_value.read.return_value = "{invalid_json:}"
+        mock_file.return_value.read.return_value = b"{invalid_json:}"
         
         with patch("builtins.print") as MockPrint:
             hotels = Hotel.load_from_file()
@@ -97,7 +104,8 @@ class TestHotel(unittest.TestCase):
         HotelList = [Hotel(1, "Grand Hotel", "New York")]
 
         with patch("builtins.print") as MockPrint:
-            Hotel.save_to_file(HotelList)
+            with self.assertRaises(IOError):
+                Hotel.save_to_file(HotelList)
             MockPrint.assert_called_with("Error saving hotels: Disk full")
 
     @patch("app.base_classes.hotel.Hotel.load_from_file", return_value=[
@@ -122,15 +130,16 @@ class TestHotel(unittest.TestCase):
         Hotel(1, "Grand Hotel", "New York"),
         Hotel(2, "City Inn", "Los Angeles")
     ])
-    @patch("builtins.print")
-    def test_display_hotels(self, mock_print, _mock_load):
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_display_hotels(self, mock_stdout, _mock_load):
         """Test displaying hotels."""
         Hotel.display_hotels()
-        mock_print.assert_any_call("\n=== Available Hotels ===")
-        mock_print.assert_any_call("ID: 0x0001 | Name: Grand Hotel | Location: New York")
-        mock_print.assert_any_call("ID: 0x0002 | Name: City Inn | Location: Los Angeles")
+        output = mock_stdout.getvalue()
+        self.assertIn("\n=== Available Hotels ===\n", output)
+        self.assertIn("ID: 0x0001 | Name: Grand Hotel | Location: New York\n", output)
+        self.assertIn("ID: 0x0002 | Name: City Inn | Location: Los Angeles\n", output)
 
-    @patch("builtins.open", new_callable=mock_open, read_data="{invalid_json}")
+    @patch("builtins.open", new_callable=mock_open, read_data=b"{invalid_json}")
     @patch("os.path.exists", return_value=True)
     def test_load_from_file_json_error(self, _mock_exists, mock_file):
         """Test that load_from_file handles JSONDecodeError."""
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import app.config as conf
+from app.base_classes.hotel import Hotel
+from app.ids import IdAllocator
+from app.repository import Repository
+
+
+class TestIdAllocator(unittest.TestCase):
+    """Tests for the sequence-based ID allocator."""
+
+    def setUp(self):
+        """Point the Hotel class at a temporary data file."""
+        Repository.reset_all()
+        IdAllocator.reset_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.patches = [
+            patch.object(
+                Hotel, "FILE_PATH",
+                os.path.join(self.tmp_dir.name, "Hotels.json")
+            ),
+            patch.object(conf, "ID_BLOCK_SIZE", 10),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+        Repository.reset_all()
+        IdAllocator.reset_all()
+
+    def counter(self):
+        """Returns the value of the persisted sequence counter."""
+        with open(Hotel.FILE_PATH + ".seq", "r", encoding="utf-8") as f:
+            return int(f.read())
+
+    def test_starts_after_largest_id(self):
+        """Test that a new sequence continues after the stored IDs."""
+        Hotel.create_hotel(70000, "Grand Hotel", "New York")
+        Hotel.create_hotel("legacy", "Old Inn", "Boston")
+        allocator = Hotel.id_allocator()
+        self.assertIs(allocator, IdAllocator.for_model(Hotel))
+        self.assertEqual(allocator.allocate(), 70001)
+        self.assertEqual(allocator.allocate(), 70002)
+        self.assertEqual(self.counter(), 70011)
+
+    def test_reserves_blocks(self):
+        """Test that the counter file is updated once per block."""
+        allocator = Hotel.id_allocator()
+        with patch.object(
+            allocator, "_reserve", wraps=allocator._reserve
+        ) as mock_reserve:
+            ids = [allocator.allocate() for _ in range(25)]
+            self.assertEqual(mock_reserve.call_count, 3)
+        self.assertEqual(ids, list(range(1, 26)))
+
+        self.assertEqual(len(set(allocator.allocate_many(50))), 50)
+        self.assertEqual(self.counter(), 76)  # 5 left in block, then 45
+
+    def test_processes_get_disjoint_blocks(self):
+        """Test that a second allocator continues after reserved blocks."""
+        first = Hotel.id_allocator().allocate()
+        IdAllocator.reset_all()  # Same as a new process
+        self.assertEqual(Hotel.id_allocator().allocate(), first + 10)
+
+    def test_skips_taken_ids(self):
+        """Test that IDs created explicitly are not handed out again."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        with open(Hotel.FILE_PATH + ".seq", "w", encoding="utf-8") as f:
+            f.write("1\n")
+        Hotel.create_hotel(2, "City Inn", "Los Angeles")
+        self.assertEqual(Hotel.id_allocator().allocate_many(2), [3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
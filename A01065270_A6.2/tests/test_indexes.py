@@ -0,0 +1,237 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app.base_classes.customer import Customer, normalize_email
+from app.base_classes.hotel import Hotel
+from app.base_classes.reservation import Reservation
+from app.indexes import SecondaryIndex, UniqueIndex, UniqueViolation
+from app.repository import Repository
+from app.transaction import Transaction
+
+
+class TestSecondaryIndex(unittest.TestCase):
+    """Tests for the SecondaryIndex class."""
+
+    def test_put_move_and_discard(self):
+        """Test that entries follow changes of the indexed field."""
+        index = SecondaryIndex("hotel_id")
+        index.rebuild({1: Reservation(1, 5, 10), 2: Reservation(2, 6, 10)})
+        self.assertEqual(index.lookup(10), [1, 2])
+
+        index.put(1, Reservation(1, 5, 11))
+        self.assertEqual(index.lookup(10), [2])
+        self.assertEqual(index.lookup(11), [1])
+
+        index.discard(2)
+        index.discard(99)
+        self.assertEqual(index.lookup(10), [])
+        self.assertEqual(index.count(11), 1)
+
+    def test_new_returns_empty_copy(self):
+        """Test that prototypes are copied without their entries."""
+        prototype = SecondaryIndex("hotel_id")
+        prototype.put(1, Reservation(1, 5, 10))
+        index = prototype.new()
+        self.assertEqual(index.field, "hotel_id")
+        self.assertEqual(index.lookup(10), [])
+        self.assertEqual(prototype.lookup(10), [1])
+
+
+class TestUniqueIndex(unittest.TestCase):
+    """Tests for the UniqueIndex class."""
+
+    def test_conflicts_and_duplicates(self):
+        """Test that normalized values report their other holders."""
+        index = UniqueIndex("email", normalize=normalize_email)
+        index.rebuild({
+            1: Customer(1, "A", "a@x.com"),
+            2: Customer(2, "B", " A@X.com"),
+            3: Customer(3, "C", "c@x.com"),
+        })
+        self.assertEqual(index.name, "unique_email")
+        self.assertEqual(index.lookup("A@x.COM"), [1, 2])
+        self.assertEqual(index.conflict(3, "C@X.COM "), None)
+        self.assertEqual(index.conflict(4, "C@X.COM "), 3)
+        self.assertEqual(index.duplicates(), {"a@x.com": [1, 2]})
+
+        index.put(2, Customer(2, "B", "b@x.com"))
+        self.assertEqual(index.duplicates(), {})
+        self.assertEqual(index.conflict(1, "a@x.com"), None)
+        index.discard(1)
+        self.assertEqual(index.conflict(9, "a@x.com"), None)
+
+
+class TestCustomerEmails(unittest.TestCase):
+    """Tests for the unique email constraint of the customers."""
+
+    def setUp(self):
+        """Point the customers at a temporary data file."""
+        Repository.reset_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp_dir.name, "Customers.json")
+        self.patch = patch.object(Customer, "FILE_PATH", path)
+        self.patch.start()
+        Customer.create_customer(1, "Alice Johnson", "alice@example.com")
+        Customer.create_customer(2, "Bob Smith", "bob@example.com")
+
+    def tearDown(self):
+        self.patch.stop()
+        self.tmp_dir.cleanup()
+        Repository.reset_all()
+
+    def emails(self):
+        """Returns the stored emails by customer ID."""
+        return {c.customer_id: c.email for c in Customer.load_from_file()}
+
+    def test_create_and_update(self):
+        """Test that duplicate emails are rejected, ignoring case."""
+        self.assertFalse(
+            Customer.create_customer(3, "Al", " ALICE@example.com")
+        )
+        self.assertFalse(Customer(3, "Al", "alice@example.com").save())
+        self.assertFalse(
+            Customer(2, "Bob", "").update(email="Alice@Example.com")
+        )
+        self.assertTrue(Customer(2, "Bob", "").update(name="Bobby"))
+        self.assertTrue(
+            Customer(1, "Alice", "").update(email="ALICE@example.com")
+        )
+        with self.assertRaises(UniqueViolation):
+            Customer.repository().update(1, email="bob@example.com")
+        self.assertEqual(
+            self.emails(), {1: "ALICE@example.com", 2: "bob@example.com"}
+        )
+        self.assertEqual(Customer.find_by_email("alice@EXAMPLE.com").name,
+                         "Alice Johnson")
+        self.assertIsNone(Customer.find_by_email("carl@example.com"))
+
+        Customer.delete_customer(1)
+        self.assertTrue(Customer.create_customer(3, "Al", "alice@example.com"))
+
+    def test_bulk_operations(self):
+        """Test that bulk operations report duplicate emails as failures."""
+        added = Customer.bulk_create([
+            Customer(3, "Carl", "carl@example.com"),
+            Customer(4, "Carla", "CARL@example.com"),
+            Customer(5, "Bob", "bob@example.com"),
+        ])
+        self.assertEqual([c.customer_id for c in added.succeeded], [3])
+        self.assertEqual([i for i, _ in added.failed], [4, 5])
+        self.assertIn("already used by 3", added.failed[0][1])
+
+        updated = Customer.bulk_update({
+            1: {"email": "dave@example.com"},
+            2: {"email": "Dave@example.com"},
+            3: {"name": "Carl Jr."},
+        })
+        self.assertEqual([c.customer_id for c in updated.succeeded], [1, 3])
+        self.assertEqual([i for i, _ in updated.failed], [2])
+
+    def test_transactions(self):
+        """Test that staged records are checked against each other."""
+        with Transaction(Customer) as tx:
+            tx.remove(Customer, 1)
+            self.assertTrue(tx.add(Customer(3, "Al", "alice@example.com")))
+            with self.assertRaises(UniqueViolation):
+                tx.add(Customer(4, "Al", "Alice@example.com"))
+            with self.assertRaises(UniqueViolation):
+                tx.update(Customer, 2, email="alice@example.com")
+            tx.update(Customer, 3, name="Alicia")
+        self.assertEqual(
+            self.emails(), {2: "bob@example.com", 3: "alice@example.com"}
+        )
+
+    def test_stored_duplicates_still_load(self):
+        """Test that files written before the constraint still load."""
+        with open(Customer.FILE_PATH, "w", encoding="utf-8") as f:
+            json.dump([
+                {"customer_id": 1, "name": "A", "email": "a@x.com"},
+                {"customer_id": 2, "name": "B", "email": "A@x.com"},
+            ], f)
+        index = Customer.repository().indexes["unique_email"]
+        self.assertEqual(
+            [c.customer_id for c in Customer.repository().all()], [1, 2]
+        )
+        self.assertEqual(index.duplicates(), {"a@x.com": [1, 2]})
+        self.assertTrue(Customer(2, "B", "").update(name="Bea"))
+        self.assertFalse(Customer.create_customer(3, "C", "a@X.com"))
+
+
+class TestReservationIndexes(unittest.TestCase):
+    """Tests for the reservation indexes by customer and by hotel."""
+
+    def setUp(self):
+        """Point the model classes at temporary data files."""
+        Repository.reset_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.patches = [
+            patch.object(
+                model, "FILE_PATH", os.path.join(self.tmp_dir.name, name)
+            )
+            for model, name in (
+                (Hotel, "Hotels.json"),
+                (Customer, "Customers.json"),
+                (Reservation, "Reservations.json"),
+            )
+        ]
+        for p in self.patches:
+            p.start()
+
+        Customer.create_customer(1, "Alice Johnson", "alice@example.com")
+        Hotel.create_hotel(10, "Grand Hotel", "New York")
+        Reservation.bulk_create([
+            Reservation(100, 1, 10),
+            Reservation(101, 1, 11),
+            Reservation(102, 2, 10),
+        ])
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+        Repository.reset_all()
+
+    def ids(self, reservations):
+        """Returns the sorted IDs of a list of reservations."""
+        return sorted(r.reservation_id for r in reservations)
+
+    def test_queries(self):
+        """Test the query methods of the three classes."""
+        self.assertEqual(self.ids(Reservation.find_by_customer(1)), [100, 101])
+        self.assertEqual(self.ids(Reservation.find_by_hotel(10)), [100, 102])
+        self.assertEqual(self.ids(Customer.find_reservations(2)), [102])
+        self.assertEqual(
+            self.ids(Hotel.find_by_id(10).reservations()), [100, 102]
+        )
+        self.assertEqual(Reservation.find_by_hotel(99), [])
+
+    def test_index_is_built_on_load(self):
+        """Test that a fresh repository indexes the stored reservations."""
+        Repository.reset_all()
+        index = Reservation.repository().indexes["hotel_id"]
+        self.assertEqual(self.ids(Reservation.find_by_hotel(10)), [100, 102])
+        self.assertEqual(index.count(11), 1)
+
+    def test_index_follows_mutations(self):
+        """Test that create, cancel, update and bulk operations update it."""
+        Reservation.create_reservation(103, 2, 11)
+        Reservation.cancel_reservation(100)
+        Reservation.bulk_update({101: {"hotel_id": 10}})
+        Reservation.bulk_delete([102])
+
+        self.assertEqual(self.ids(Reservation.find_by_hotel(10)), [101])
+        self.assertEqual(self.ids(Reservation.find_by_hotel(11)), [103])
+        self.assertEqual(self.ids(Reservation.find_by_customer(2)), [103])
+
+    def test_index_follows_transactions(self):
+        """Test that cascading deletes use and update the index."""
+        self.assertTrue(Hotel.delete_hotel_with_reservations(10))
+        self.assertEqual(Reservation.find_by_hotel(10), [])
+        self.assertEqual(self.ids(Reservation.find_by_customer(1)), [101])
+
+
+if __name__ == "__main__":
+    unittest.main()
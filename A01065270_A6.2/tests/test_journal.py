@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import app.config as conf
+from app.base_classes.customer import Customer
+from app.repository import Repository
+from app.storage import JournalBackend, get_backend
+
+
+class TestJournalBackend(unittest.TestCase):
+    """Tests for the append-only journal storage backend."""
+
+    def setUp(self):
+        """Use the journal backend on a temporary data file."""
+        Repository.reset_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "Customers.json")
+        self.patches = [
+            patch.object(Customer, "FILE_PATH", self.path),
+            patch.object(conf, "STORAGE_BACKEND", "journal"),
+            patch.object(conf, "JOURNAL_COMPACT_THRESHOLD", 1000),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+        Repository.reset_all()
+
+    def journal_lines(self):
+        """Returns the lines of the customers journal."""
+        with open(self.path + ".journal", "r", encoding="utf-8") as f:
+            return f.readlines()
+
+    def test_get_backend_uses_config(self):
+        """Test that the configured backend is selected."""
+        self.assertIsInstance(get_backend(), JournalBackend)
+        with self.assertRaises(ValueError):
+            get_backend("missing")
+
+    def test_mutations_append_to_journal(self):
+        """Test that create, update and delete append journal entries."""
+        Customer.create_customer(1, "Alice Johnson", "alice@example.com")
+        Customer.create_customer(2, "Bob Smith", "bob@example.com")
+        Customer(1, "Alice Johnson", "alice@example.com").update(name="Al")
+        Customer.delete_customer(2)
+
+        self.assertEqual(len(self.journal_lines()), 4)
+        self.assertFalse(os.path.exists(self.path))  # No snapshot rewrite
+
+    def test_load_replays_journal(self):
+        """Test that a fresh repository replays snapshot plus journal."""
+        Customer.save_to_file([Customer(1, "Alice", "alice@example.com")])
+        Customer.create_customer(2, "Bob Smith", "bob@example.com")
+        Customer.delete_customer(1)
+        Customer(2, "Bob Smith", "bob@example.com").update(email="b@x.org")
+
+        Repository.reset_all()
+        customers = Customer.repository().all()
+        self.assertEqual(
+            [c.to_dict() for c in customers],
+            [{"customer_id": 2, "name": "Bob Smith", "email": "b@x.org"}],
+        )
+
+    def test_compaction_rewrites_snapshot(self):
+        """Test that exceeding the threshold compacts the journal."""
+        conf.JOURNAL_COMPACT_THRESHOLD = 2
+        for customer_id in range(3):
+            Customer.create_customer(
+                customer_id, "Name", f"mail{customer_id}@test.com"
+            )
+
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        self.assertEqual(len(Customer.load_from_file()), 3)
+
+    def test_failed_compaction_keeps_journal(self):
+        """Test that the journal outlives a snapshot that cannot be written."""
+        Customer.create_customer(1, "Alice Johnson", "alice@example.com")
+        conf.JOURNAL_COMPACT_THRESHOLD = 1
+        with patch.object(conf, "DATA_FORMAT", "binary"):
+            self.assertTrue(
+                Customer.create_customer(2 ** 63, "Bob", "bob@example.com")
+            )
+            with self.assertRaises(ValueError):
+                Customer.repository().compact()
+        self.assertEqual(len(self.journal_lines()), 2)
+        self.assertFalse(os.path.exists(self.path))
+
+        Repository.reset_all()
+        self.assertIsNotNone(Customer.find_by_id(2 ** 63))
+
+    def test_invalid_entry_is_skipped(self):
+        """Test that an entry not matching the schema is skipped."""
+        Customer.create_customer(1, "Alice Johnson", "alice@example.com")
+        with open(self.path + ".journal", "a", encoding="utf-8") as f:
+            f.write('{"op": "put", "record": {"customer_id": "abc"}}\n')
+        Customer.create_customer(2, "Bob Smith", "bob@example.com")
+
+        Repository.reset_all()
+        with patch.object(conf, "debug_log") as mock_log:
+            self.assertEqual(
+                [c.customer_id for c in Customer.repository().all()], [1, 2]
+            )
+        self.assertIn(
+            "Skipping invalid journal entry", mock_log.call_args[0][0]
+        )
+        self.assertEqual(len(self.journal_lines()), 3)
+
+    def test_json_backend_folds_in_journal(self):
+        """Test that the JSON backend applies a journal left behind."""
+        Customer.save_to_file([Customer(1, "Alice", "alice@example.com")])
+        Customer.create_customer(2, "Bob Smith", "bob@example.com")
+        Customer.delete_customer(1)
+
+        conf.STORAGE_BACKEND = "json"
+        Repository.reset_all()
+        self.assertIsNone(Customer.find_by_id(1))
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        Customer.create_customer(3, "Carl", "carl@example.com")
+        self.assertEqual(
+            [c.customer_id for c in Customer.load_from_file()], [2, 3]
+        )
+
+        get_backend("journal").commit(  # By another process
+            Customer, {}, [("put", Customer(4, "Dana", "dana@example.com"))]
+        )
+        self.assertEqual(Customer.find_by_id(4).name, "Dana")
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+
+    def test_torn_entry_is_dropped(self):
+        """Test that a partially written last entry is discarded."""
+        Customer.create_customer(1, "Alice Johnson", "alice@example.com")
+        with open(self.path + ".journal", "a", encoding="utf-8") as f:
+            f.write('{"op": "put", "record": {"customer_id": 2')
+
+        Repository.reset_all()
+        self.assertIsNone(Customer.find_by_id(2))
+        Customer.create_customer(3, "Carl", "carl@example.com")
+
+        Repository.reset_all()
+        self.assertIsNotNone(Customer.find_by_id(1))
+        self.assertIsNotNone(Customer.find_by_id(3))
+        self.assertEqual(len(self.journal_lines()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
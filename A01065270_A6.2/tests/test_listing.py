@@ -0,0 +1,171 @@
+import argparse
+import functools
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import app.config as conf
+from app import listing
+from app.base_classes.hotel import Hotel
+from app.repository import Repository
+from app.storage import get_backend
+from app.storage.formats import iter_json_array
+
+HOTELS = [
+    Hotel(1, "Grand Hotel", "New York"),
+    Hotel(2, "City Inn", "Los Angeles"),
+    Hotel(3, "Sea View", "New York"),
+    Hotel(4, "Old Inn", "Boston"),
+]
+
+
+class TestListing(unittest.TestCase):
+    """Tests for paged, filtered and streamed listings."""
+
+    def setUp(self):
+        """Store a few hotels in a temporary data file."""
+        Repository.reset_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.patches = [
+            patch.object(
+                Hotel, "FILE_PATH",
+                os.path.join(self.tmp_dir.name, "Hotels.json")
+            ),
+            patch.object(
+                conf, "SQLITE_PATH",
+                os.path.join(self.tmp_dir.name, "hotel.db")
+            ),
+        ]
+        for p in self.patches:
+            p.start()
+        Hotel.save_to_file(HOTELS)
+
+    def tearDown(self):
+        get_backend("sqlite").close()
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+        Repository.reset_all()
+
+    def page(self, streaming=True, **options):
+        """Returns the IDs of a page of the stored hotels."""
+        records = listing.page(Hotel, streaming=streaming, **options)
+        return [hotel.hotel_id for hotel in records]
+
+    def test_select(self):
+        """Test offset, limit, cursor and filters."""
+        for streaming in (True, False):
+            with self.subTest(streaming=streaming):
+                page = functools.partial(self.page, streaming)
+                self.assertEqual(page(), [1, 2, 3, 4])
+                self.assertEqual(page(offset=1, limit=2), [2, 3])
+                self.assertEqual(page(after=2), [3, 4])
+                self.assertEqual(page(after=2, offset=1, limit=5), [4])
+                self.assertEqual(page(after=99), [])
+                self.assertEqual(
+                    page(filters={"location": "New York"}), [1, 3]
+                )
+                self.assertEqual(
+                    page(filters={"location": "New York"}, after=1), [3]
+                )
+
+    def test_cursor_after_changes(self):
+        """Test that in-memory cursors follow added and removed records."""
+        self.assertEqual(self.page(False, after=1), [2, 3, 4])
+        Hotel.delete_hotel(2)
+        Hotel.create_hotel(0, "Lake House", "Denver")
+        self.assertEqual(self.page(False, after=1), [3, 4, 0])
+        self.assertEqual(self.page(False, after=4), [0])
+        self.assertEqual(self.page(False, after=2), [])
+
+    def test_select_stops_reading_early(self):
+        """Test that a page does not consume the rest of the records."""
+        records = iter(HOTELS)
+        self.assertEqual(
+            len(list(listing.select(records, "hotel_id", limit=1))), 1
+        )
+        self.assertEqual(next(records).hotel_id, 2)
+
+    def test_streaming_reader(self):
+        """Test that the JSON file is streamed in small chunks."""
+        path = Hotel.FILE_PATH
+        self.assertEqual(
+            list(iter_json_array(path, chunk_size=8)),
+            [hotel.to_dict() for hotel in HOTELS],
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('[{"hotel_id": 1, "name": "A", "location": "B"}, {')
+        with self.assertRaises(ValueError):
+            list(iter_json_array(path, chunk_size=8))
+
+    def test_streaming_skips_invalid_records(self):
+        """Test that a streamed listing skips a record it cannot load."""
+        with open(Hotel.FILE_PATH, "w", encoding="utf-8") as f:
+            f.write(
+                '[{"hotel_id": 1, "name": "Grand Hotel", "location": "NY"},'
+                ' {"hotel_id": "abc", "name": "Bad"},'
+                ' {"hotel_id": 2, "name": "City Inn", "location": "LA"}]'
+            )
+        with patch.object(conf, "debug_log") as mock_log:
+            self.assertEqual(self.page(), [1, 2])
+        self.assertIn("Skipping invalid record", mock_log.call_args[0][0])
+
+    def test_sqlite_streaming(self):
+        """Test that SQLite rows are read in batches."""
+        backend = get_backend("sqlite")
+        backend.replace_all(Hotel, HOTELS)
+        self.assertEqual(
+            [h.hotel_id for h in backend.iter_records(Hotel, batch_size=3)],
+            [1, 2, 3, 4],
+        )
+
+    def test_formats(self):
+        """Test the JSON Lines and CSV outputs."""
+        stream = io.StringIO()
+        Hotel.display_hotels(limit=2, output_format="jsonl", stream=stream)
+        self.assertEqual(
+            [json.loads(line) for line in stream.getvalue().splitlines()],
+            [hotel.to_dict() for hotel in HOTELS[:2]],
+        )
+
+        stream = io.StringIO()
+        Hotel.display_hotels(
+            filters={"location": "Boston"}, output_format="csv", stream=stream
+        )
+        self.assertEqual(
+            stream.getvalue(),
+            "hotel_id,name,location,rooms\n4,Old Inn,Boston,1\n",
+        )
+
+    def test_buffered_writer(self):
+        """Test that output is written in large pieces."""
+        stream = io.StringIO()
+        writer = listing.BufferedWriter(stream, buffer_size=10)
+        writer.write("12345")
+        self.assertEqual(stream.getvalue(), "")
+        writer.write("67890")
+        self.assertEqual(stream.getvalue(), "1234567890")
+
+    def test_options_from_args(self):
+        """Test parsing of the command line listing options."""
+        parser = argparse.ArgumentParser()
+        listing.add_arguments(parser)
+        args = parser.parse_args(
+            ["--after", "2", "--filter", "hotel_id=3", "--format", "csv"]
+        )
+        self.assertEqual(listing.options_from_args(Hotel, args), {
+            "offset": 0, "limit": None, "after": 2,
+            "filters": {"hotel_id": 3}, "output_format": "csv",
+        })
+        for argv in (["--filter", "stars=3"], ["--filter", "hotel_id=x"],
+                     ["--limit", "-1"]):
+            with self.subTest(argv=argv):
+                with self.assertRaises(ValueError):
+                    listing.options_from_args(Hotel, parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import app.config as conf
+from app.base_classes.customer import Customer
+from app.base_classes.hotel import Hotel
+from app.repository import Repository
+from app.storage.formats import FormatError
+
+
+class TestRepository(unittest.TestCase):
+    """Tests for the indexed in-memory Repository."""
+
+    def setUp(self):
+        """Point the Hotel class at a temporary data file."""
+        Repository.reset_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_patch = patch.object(
+            Hotel, "FILE_PATH", os.path.join(self.tmp_dir.name, "Hotels.json")
+        )
+        self.path_patch.start()
+
+    def tearDown(self):
+        self.path_patch.stop()
+        self.tmp_dir.cleanup()
+        Repository.reset_all()
+
+    def test_for_model_returns_shared_instance(self):
+        """Test that each model class gets a single shared repository."""
+        self.assertIs(Repository.for_model(Hotel), Hotel.repository())
+        self.assertIsNot(Hotel.repository(), Customer.repository())
+
+    def test_lookups_load_file_once(self):
+        """Test that repeated lookups reuse the loaded collection."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        Repository.reset_all()
+
+        with patch.object(
+            Hotel, "load_from_file", wraps=Hotel.load_from_file
+        ) as mock_load:
+            self.assertEqual(Hotel.find_by_id(1).name, "Grand Hotel")
+            self.assertIsNone(Hotel.find_by_id(2))
+            self.assertFalse(Hotel.create_hotel(1, "Copy", "Paris"))
+            mock_load.assert_called_once()
+
+    def test_reloads_when_file_changes(self):
+        """Test that an external write invalidates the cached collection."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        self.assertIsNotNone(Hotel.find_by_id(1))
+
+        # Simulate another process rewriting the file.
+        Hotel.save_to_file([Hotel(2, "City Inn", "Los Angeles")])
+        stat = os.stat(Hotel.FILE_PATH)
+        os.utime(Hotel.FILE_PATH, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        self.assertIsNone(Hotel.find_by_id(1))
+        self.assertEqual(Hotel.find_by_id(2).name, "City Inn")
+
+    def test_add_update_remove_persist(self):
+        """Test that mutations are written through to the file."""
+        repository = Hotel.repository()
+        self.assertTrue(repository.add(Hotel(1, "Grand Hotel", "New York")))
+        self.assertFalse(repository.add(Hotel(1, "Copy", "Paris")))
+
+        updated = repository.update(1, name="Renamed", location=None)
+        self.assertEqual(updated.name, "Renamed")
+        self.assertEqual(updated.location, "New York")
+        self.assertIsNone(repository.update(99, name="Missing"))
+
+        self.assertEqual(
+            [h.to_dict() for h in Hotel.load_from_file()],
+            [{"hotel_id": 1, "name": "Renamed", "location": "New York",
+              "rooms": 1}],
+        )
+
+        self.assertEqual(repository.remove(1).hotel_id, 1)
+        self.assertIsNone(repository.remove(1))
+        self.assertEqual(Hotel.load_from_file(), [])
+
+    def test_returned_records_are_copies(self):
+        """Test that changing a returned record leaves the cache intact."""
+        repository = Hotel.repository()
+        hotel = Hotel(1, "Grand Hotel", "New York")
+        repository.add(hotel)
+        hotel.name = "Changed after add"
+
+        for record in (
+            repository.get(1), repository.find_by("location", "New York")[0],
+            repository.search("grand")[0], repository.all()[0],
+            repository.update(1, location="Boston"),
+        ):
+            record.name = "Changed"
+        self.assertEqual(repository.get(1).name, "Grand Hotel")
+        self.assertEqual(len(repository.search("grand")), 1)
+        self.assertEqual(repository.search("changed"), [])
+
+        with patch.object(
+            Customer, "FILE_PATH",
+            os.path.join(self.tmp_dir.name, "Customers.json"),
+        ):
+            Customer.create_customer(1, "Jane", "jane@example.com")
+            Customer.create_customer(2, "John", "john@example.com")
+            Customer.find_by_id(1).email = "john@example.com"
+            self.assertEqual(
+                Customer.find_by_email("jane@example.com").customer_id, 1
+            )
+            self.assertFalse(
+                Customer.create_customer(3, "Copy", "jane@example.com")
+            )
+
+    def test_invalid_record_is_skipped(self):
+        """Test that one invalid record does not empty the collection."""
+        with open(Hotel.FILE_PATH, "w", encoding="utf-8") as f:
+            f.write(
+                '[{"hotel_id": 1, "name": "Grand Hotel", "location": "NY"},'
+                ' {"hotel_id": "abc", "name": "Bad"},'
+                ' {"hotel_id": 2, "name": "City Inn", "location": "LA"}]'
+            )
+        with patch("builtins.print") as mock_print:
+            self.assertEqual(
+                [h.hotel_id for h in Hotel.repository().all()], [1, 2]
+            )
+        self.assertIn("Skipping invalid hotel", mock_print.call_args[0][0])
+
+        Hotel.create_hotel(3, "Sea View", "Miami")
+        self.assertEqual(
+            [h.hotel_id for h in Hotel.load_from_file()], [1, 2, 3]
+        )
+
+    def test_failed_save_fails_the_operation(self):
+        """Test that a record the data format cannot hold is not kept."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        with patch.object(conf, "DATA_FORMAT", "binary"), \
+                patch("builtins.print") as mock_print:
+            with self.assertRaises(FormatError):
+                Hotel.create_hotel(2 ** 63, "Big Hotel", "Paris")
+            self.assertIsNone(Hotel.find_by_id(2 ** 63))
+            mock_print.assert_called_once()
+        self.assertEqual([h.hotel_id for h in Hotel.load_from_file()], [1])
+
+    def test_invalidate_forces_reload(self):
+        """Test that invalidate() makes the next access reload the file."""
+        repository = Hotel.repository()
+        repository.add(Hotel(1, "Grand Hotel", "New York"))
+
+        with patch.object(Hotel, "load_from_file", return_value=[]):
+            repository.invalidate()
+            self.assertFalse(repository.contains(1))
+
+    def test_concurrent_writes_are_grouped(self):
+        """Test that writes from concurrent threads share one commit."""
+        barrier = threading.Barrier(8)
+
+        def worker(hotel_id):
+            barrier.wait()
+            Hotel.create_hotel(hotel_id, f"Hotel {hotel_id}", "Paris")
+
+        with patch.object(conf, "GROUP_COMMIT_DELAY", 0.05), patch.object(
+            Hotel, "save_to_file", wraps=Hotel.save_to_file
+        ) as mock_save:
+            threads = [
+                threading.Thread(target=worker, args=(n,)) for n in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertLess(mock_save.call_count, 8)
+
+        Repository.reset_all()
+        self.assertEqual(
+            sorted(h.hotel_id for h in Hotel.repository().all()),
+            list(range(8)),
+        )
+
+    def test_failed_mutation_does_not_block_batch(self):
+        """Test that an exception in one mutation is raised to its caller."""
+        repository = Hotel.repository()
+
+        def apply():
+            raise KeyError("broken")
+
+        with self.assertRaises(KeyError):
+            repository.submit(apply)
+        self.assertTrue(repository.add(Hotel(1, "Grand Hotel", "New York")))
+
+    def test_bulk_operations_commit_once(self):
+        """Test that bulk operations report failures and save once each."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        repository = Hotel.repository()
+
+        with patch.object(
+            Hotel, "save_to_file", wraps=Hotel.save_to_file
+        ) as mock_save:
+            added = repository.add_many([
+                Hotel(2, "City Inn", "Los Angeles"),
+                {"hotel_id": 3, "name": "Sea View", "location": "Miami"},
+                Hotel(1, "Copy", "Paris"),
+                {"hotel_id": 3, "name": "Copy", "location": "Paris"},
+                {"hotel_id": 4, "name": "No location"},
+            ])
+            self.assertEqual([h.hotel_id for h in added.succeeded], [2, 3])
+            self.assertEqual(
+                [(hotel_id, reason[:14]) for hotel_id, reason in added.failed],
+                [(1, "already exists"), (3, "already exists"),
+                 (4, "invalid fields")],
+            )
+
+            updated = repository.update_many({
+                2: {"name": "City Hotel"}, 9: {"name": "Missing"},
+                3: {"stars": 5},
+            })
+            self.assertEqual([h.name for h in updated.succeeded], ["City Hotel"])
+            self.assertEqual(
+                updated.failed, [(9, "not found"), (3, "unknown fields: stars")]
+            )
+
+            removed = repository.remove_many([1, 9])
+            self.assertEqual([h.hotel_id for h in removed.succeeded], [1])
+            self.assertEqual(removed.failed, [(9, "not found")])
+            self.assertEqual(mock_save.call_count, 3)
+
+        self.assertEqual(
+            [h.to_dict() for h in Hotel.load_from_file()],
+            [{"hotel_id": 2, "name": "City Hotel", "location": "Los Angeles",
+              "rooms": 1},
+             {"hotel_id": 3, "name": "Sea View", "location": "Miami",
+              "rooms": 1}],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
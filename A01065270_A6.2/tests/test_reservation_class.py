@@ -1,15 +1,24 @@
+import io
 import unittest
 from unittest.mock import patch, mock_open
 import json
+from app.base_classes.customer import Customer
+from app.base_classes.hotel import Hotel
 from app.base_classes.reservation import Reservation
+from app.repository import Repository
 
 
 class TestReservation(unittest.TestCase):
     """Tests for the Reservation class."""
 
+    def setUp(self):
+        """Drop cached collections so each test sees its mocked data."""
+        Repository.reset_all()
+
+    @patch("os.replace")
     @patch("builtins.open", new_callable=mock_open, read_data="[]")
     @patch("os.makedirs")
-    def test_create_reservation(self, _mock_makedirs, _mock_file):
+    def test_create_reservation(self, _mock_makedirs, _mock_file, _mock_replace):
         """Test creating a reservation and ensuring it's saved."""
         with patch("app.base_classes.reservation.Reservation.load_from_file", return_value=[]):
             res = Reservation.create_reservation(1, 101, 201)
@@ -23,7 +32,7 @@ class TestReservation(unittest.TestCase):
     def test_load_reservations(self, _mock_exists, mock_file):
         """Test loading reservations from file."""
         reservation_data = json.dumps([{"reservation_id": 1, "customer_id": 101, "hotel_id": 201}])
-        mock_file.return_value.read.return_value = reservation_data
+        mock_file.return_value.read.return_value = reservation_data.encode()
 
         reservations = Reservation.load_from_file()
         self.assertEqual(len(reservations), 1)
@@ -52,19 +61,23 @@ class TestReservation(unittest.TestCase):
     def test_save_to_file_error(self, mock_open, mock_debug_log):
         """Test handling of IOError when saving reservations."""
         reservations = [Reservation(1, 101, 201)]
-        Reservation.save_to_file(reservations)
+        with self.assertRaises(IOError):
+            Reservation.save_to_file(reservations)
 
 
         # Correct assertion
         mock_debug_log.assert_called_with("Error saving reservations: Disk full")
 
+    @patch("os.replace")
     @patch("builtins.open", new_callable=mock_open)
     @patch("os.path.exists", return_value=True)
-    def test_save_to_file(self, _mock_exists, mock_file):
-        """Test saving reservations to file."""
+    def test_save_to_file(self, _mock_exists, mock_file, mock_replace):
+        """Test saving reservations through a temporary file."""
         reservations = [Reservation(1, 101, 201)]
         Reservation.save_to_file(reservations)
-        mock_file.assert_called_once_with(Reservation.FILE_PATH, "w", encoding="utf-8")
+        tmp_path = mock_file.call_args[0][0]
+        mock_file.assert_called_once_with(tmp_path, "w", encoding="utf-8")
+        mock_replace.assert_called_once_with(tmp_path, Reservation.FILE_PATH)
 
     @patch("app.config.debug_log")
     def test_display_reservations_no_data(self, mock_debug_log):
@@ -73,6 +86,28 @@ class TestReservation(unittest.TestCase):
             Reservation.display_reservations()
             mock_debug_log.assert_called_with("No reservations found.")
 
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_display_reservations_joins_names(self, mock_stdout):
+        """Test that string IDs in the data file still resolve names."""
+        with patch("app.base_classes.reservation.Reservation.load_from_file",
+                   return_value=[Reservation.from_dict(
+                       {"reservation_id": 1, "customer_id": "101", "hotel_id": "201"}
+                   ), Reservation(2, 999, 999)]), \
+             patch("app.base_classes.customer.Customer.load_from_file",
+                   return_value=[Customer(101, "Alice Johnson", "alice@example.com")]), \
+             patch("app.base_classes.hotel.Hotel.load_from_file",
+                   return_value=[Hotel(201, "Grand Hotel", "New York")]):
+            Reservation.display_reservations()
+        output = mock_stdout.getvalue()
+        self.assertIn(
+            "Reservation ID: 1 | Customer: Alice Johnson | Hotel: Grand Hotel\n",
+            output,
+        )
+        self.assertIn(
+            "Reservation ID: 2 | Customer: Unknown Customer | Hotel: Unknown Hotel\n",
+            output,
+        )
+
     @patch("os.path.exists", return_value=False)
     def test_load_from_file_no_file(self, mock_exists):
         result = Reservation.load_from_file()
@@ -0,0 +1,82 @@
+import unittest
+
+from app.base_classes.reservation import Reservation
+from app.schema import Field, Schema, SchemaError
+
+
+class TestSchema(unittest.TestCase):
+    """Tests for the compiled record schemas."""
+
+    def setUp(self):
+        self.schema = Schema(record_id=int, name=str)
+
+    def test_names(self):
+        """Test that the field names keep their declaration order."""
+        self.assertEqual(self.schema.names, ("record_id", "name"))
+
+    def test_coerce_converts_types(self):
+        """Test that numeric strings and numbers are converted."""
+        self.assertEqual(
+            self.schema.coerce({"record_id": " 42", "name": 7}),
+            {"record_id": 42, "name": "7"},
+        )
+        self.assertEqual(
+            self.schema.coerce({"record_id": 3.0, "name": "Inn"}),
+            {"record_id": 3, "name": "Inn"},
+        )
+
+    def test_coerce_drops_unknown_keys(self):
+        """Test that keys outside the schema are ignored."""
+        self.assertEqual(
+            self.schema.coerce({"record_id": 1, "name": "A", "extra": 2}),
+            {"record_id": 1, "name": "A"},
+        )
+
+    def test_coerce_rejects_invalid_records(self):
+        """Test that missing fields and bad values raise SchemaError."""
+        for data in (
+            {"name": "A"},
+            {"record_id": "abc", "name": "A"},
+            {"record_id": 1.5, "name": "A"},
+            {"record_id": True, "name": "A"},
+            {"record_id": 1, "name": None},
+            ["not", "a", "dict"],
+        ):
+            with self.subTest(data=data):
+                with self.assertRaises(SchemaError):
+                    self.schema.coerce(data)
+
+    def test_defaults(self):
+        """Test that missing and null fields with a default get it."""
+        schema = Schema(record_id=int, rooms=Field(int, default=1))
+        self.assertEqual(schema.names, ("record_id", "rooms"))
+        self.assertEqual(schema.fields, {"record_id": int, "rooms": int})
+        for data, rooms in (({"record_id": 1}, 1),
+                            ({"record_id": 1, "rooms": None}, 1),
+                            ({"record_id": 1, "rooms": "3"}, 3)):
+            with self.subTest(data=data):
+                self.assertEqual(
+                    schema.coerce(data), {"record_id": 1, "rooms": rooms}
+                )
+        with self.assertRaises(SchemaError):
+            schema.coerce({"rooms": 2})
+
+    def test_unsupported_type(self):
+        """Test that only supported field types can be declared."""
+        with self.assertRaises(TypeError):
+            Schema(created=bytes)
+
+    def test_model_from_dict(self):
+        """Test that stored string IDs are loaded as integers."""
+        reservation = Reservation.from_dict(
+            {"reservation_id": 1, "customer_id": "24773", "hotel_id": "5738"}
+        )
+        self.assertEqual(
+            reservation.to_dict(),
+            {"reservation_id": 1, "customer_id": 24773, "hotel_id": 5738,
+             "check_in": "", "check_out": ""},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
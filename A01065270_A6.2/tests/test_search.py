@@ -0,0 +1,155 @@
+import unittest
+
+from app.base_classes.customer import Customer
+from app.base_classes.hotel import Hotel
+from app.commands import Dispatcher
+from app.search import TextIndex, Trie, normalize, tokenize
+from app.service import CommandError
+from tests.test_commands import CommandTestCase
+
+
+class TestTokenize(unittest.TestCase):
+    """Tests for the normalization of the indexed text."""
+
+    def test_normalize(self):
+        """Test that case and accents are ignored."""
+        self.assertEqual(normalize("Cancún"), "cancun")
+        self.assertEqual(normalize("ÉCOLE Straße"), "ecole strasse")
+        self.assertEqual(normalize("Plain"), "plain")
+
+    def test_tokenize(self):
+        """Test that text is split into words."""
+        self.assertEqual(
+            tokenize("alice.johnson@example.com"),
+            ["alice", "johnson", "example", "com"],
+        )
+        self.assertEqual(tokenize("Hotel  Playa-del_Sol 5"),
+                         ["hotel", "playa", "del", "sol", "5"])
+        self.assertEqual(tokenize(" .@ "), [])
+
+
+class TestTrie(unittest.TestCase):
+    """Tests for the trie of indexed words."""
+
+    def test_add_remove_and_prefix(self):
+        """Test that words are listed by prefix until removed."""
+        trie = Trie()
+        for word in ("sea", "seaside", "sol", "s"):
+            trie.add(word)
+        self.assertEqual(sorted(trie.with_prefix("se")), ["sea", "seaside"])
+        self.assertEqual(len(list(trie.with_prefix(""))), 4)
+        trie.remove("sea")
+        trie.remove("missing")
+        self.assertNotIn("sea", trie)
+        self.assertIn("seaside", trie)
+        self.assertEqual(list(trie.with_prefix("sea")), ["seaside"])
+        trie.remove("seaside")
+        self.assertEqual(list(trie.with_prefix("se")), [])
+        self.assertEqual(sorted(trie.with_prefix("")), ["s", "sol"])
+
+
+class TestTextIndex(unittest.TestCase):
+    """Tests for the inverted index of the text fields."""
+
+    def setUp(self):
+        self.index = TextIndex("name", "location")
+        self.index.rebuild({
+            1: Hotel(1, "Hotel Playa del Sol", "Cancún"),
+            2: Hotel(2, "Sea View", "Cancun"),
+            3: Hotel(3, "Casa del Mar", "Tulum"),
+        })
+
+    def test_search(self):
+        """Test word, prefix and per-field matching."""
+        self.assertEqual(self.index.search("CANCÚN"), [1, 2])
+        self.assertEqual(self.index.search("del"), [1, 3])
+        self.assertEqual(self.index.search("del canc"), [1])
+        self.assertEqual(self.index.search("canc", prefix=False), [])
+        self.assertEqual(self.index.search("tulum", fields=["name"]), [])
+        self.assertEqual(self.index.search("tu", fields=["location"]), [3])
+        self.assertEqual(self.index.search("del nowhere"), [])
+        self.assertEqual(self.index.search("  "), [])
+        with self.assertRaises(ValueError):
+            self.index.search("x", fields=["email"])
+
+    def test_incremental_changes(self):
+        """Test that changes give the same index as a rebuild."""
+        index = self.index
+        index.search("warm up the trie")
+        index.put(2, Hotel(2, "Sea View", "Tulum"))
+        index.put(4, Hotel(4, "Solar Inn", "Mérida"))
+        index.discard(1)
+        index.discard(99)
+        self.assertEqual(index.search("tulum"), [2, 3])
+        self.assertEqual(index.search("sol"), [4])
+        self.assertEqual(index.search("merida"), [4])
+        self.assertEqual(index.words("ca"), ["casa"])
+
+        rebuilt = TextIndex("name", "location")
+        rebuilt.rebuild({
+            2: Hotel(2, "Sea View", "Tulum"),
+            3: Hotel(3, "Casa del Mar", "Tulum"),
+            4: Hotel(4, "Solar Inn", "Mérida"),
+        })
+        self.assertEqual(sorted(index.words()), sorted(rebuilt.words()))
+        self.assertEqual(index.search("s"), rebuilt.search("s"))
+
+
+class TestModelSearch(CommandTestCase):
+    """Tests for searching the hotels and customers."""
+
+    def test_hotels(self):
+        """Test that the index follows the stored hotels."""
+        with open(Hotel.FILE_PATH, "w", encoding="utf-8") as f:
+            f.write('[{"hotel_id": 1, "name": "Hotel Playa del Sol", '
+                    '"location": "Canc\\u00fan"}]')
+        self.assertEqual(
+            [hotel.hotel_id for hotel in Hotel.search("cancun playa")], [1]
+        )
+        Hotel.create_hotel(2, "Sea View", "Cancún")
+        Hotel.find_by_id(1).update(location="Tulum")
+        self.assertEqual(
+            [hotel.hotel_id for hotel in Hotel.search("canc")], [2]
+        )
+        Hotel.delete_hotel(2)
+        self.assertEqual(Hotel.search("canc"), [])
+
+    def test_customers(self):
+        """Test searching customers by name and email."""
+        Customer.create_customer(1, "Alice Johnson", "alice@example.com")
+        Customer.create_customer(2, "José Núñez", "jose@example.com")
+        self.assertEqual(
+            [c.customer_id for c in Customer.search("example.com")], [1, 2]
+        )
+        self.assertEqual(
+            [c.customer_id for c in Customer.search("jose nunez")], [2]
+        )
+        self.assertEqual(Customer.search("example", fields=["name"]), [])
+
+    def test_command(self):
+        """Test the search command."""
+        Customer.create_customer(1, "Alice Johnson", "alice@example.com")
+        dispatcher = Dispatcher()
+        found = dispatcher.execute(
+            "search", {"collection": "customers", "query": "ALI",
+                       "fields": "name"}
+        )
+        self.assertEqual(found, [
+            {"customer_id": 1, "name": "Alice Johnson",
+             "email": "alice@example.com"},
+        ])
+        self.assertEqual(dispatcher.execute(
+            "search", {"collection": "customers", "query": "ali",
+                       "exact": True}
+        ), [])
+        for params in ({"collection": "reservations", "query": "x"},
+                       {"collection": "hotels", "query": "x",
+                        "fields": ["email"]},
+                       {"collection": "hotels", "query": 5}):
+            with self.subTest(params=params):
+                with self.assertRaises(CommandError):
+                    dispatcher.execute("search", params)
+
+
+if __name__ == "__main__":
+    unittest.main()
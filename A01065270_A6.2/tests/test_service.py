@@ -0,0 +1,85 @@
+import os
+import socket
+import threading
+import unittest
+from unittest.mock import patch
+
+from app import service
+from app.base_classes.hotel import Hotel
+from app.repository import Repository
+from app.service import CommandError, HotelService, ServiceUnavailable
+
+from tests.test_commands import CommandTestCase
+
+
+class TestHotelService(CommandTestCase):
+    """Tests for the hotel service and its clients."""
+
+    BACKEND = "journal"
+
+    def setUp(self):
+        super().setUp()
+        if service.UNIX_SOCKETS:
+            self.address = self.data_path("hotel.sock")
+        else:
+            self.address = ("127.0.0.1", 0)
+        self.server = HotelService(self.address)
+        self.address = self.server.server_address
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        super().tearDown()
+
+    def request(self, command, **params):
+        """Sends a command to the test service."""
+        return service.request(command, self.address, **params)
+
+    def test_commands_run_in_service(self):
+        """Test that commands run against the service's repositories."""
+        self.assertTrue(service.is_running(self.address))
+        hotel = self.request(
+            "create_hotel", name="Grand Hotel", location="New York"
+        )
+        self.assertEqual(Hotel.find_by_id(hotel["hotel_id"]).name,
+                         "Grand Hotel")
+        self.assertTrue(os.path.exists(self.data_path("Hotels.json.journal")))
+        output = self.request("display", collection="hotels",
+                              output_format="jsonl")
+        self.assertIn('"name": "Grand Hotel"', output)
+
+    def test_errors(self):
+        """Test that rejected and malformed requests get error responses."""
+        with self.assertRaises(CommandError):
+            self.request("display", collection="rooms")
+        with socket.socket(self.server.address_family) as sock:
+            sock.connect(self.address)
+            sock.sendall(b"not json\n")
+            with sock.makefile("rb") as f:
+                self.assertIn(b"Malformed request", f.readline())
+
+    def test_call_falls_back_without_service(self):
+        """Test that call() runs the command in process without a service."""
+        unused = (self.data_path("none.sock") if service.UNIX_SOCKETS
+                  else ("127.0.0.1", 1))
+        with self.assertRaises(ServiceUnavailable):
+            service.request("ping", unused)
+        with patch.object(service, "address", return_value=unused):
+            hotel = service.call(
+                "create_hotel", name="City Inn", location="Los Angeles"
+            )
+        Repository.reset_all()
+        self.assertEqual(Hotel.find_by_id(hotel["hotel_id"]).name, "City Inn")
+
+    def test_shutdown(self):
+        """Test that the shutdown command stops the service."""
+        self.request("shutdown")
+        self.thread.join(timeout=5)
+        self.assertFalse(self.thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
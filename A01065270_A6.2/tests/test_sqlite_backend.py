@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import app.config as conf
+from app.base_classes.hotel import Hotel
+from app.base_classes.reservation import Reservation
+from app.repository import Repository
+from app.storage import SqliteBackend, get_backend
+
+
+class TestSqliteBackend(unittest.TestCase):
+    """Tests for the SQLite storage backend."""
+
+    def setUp(self):
+        """Use the SQLite backend on a temporary database."""
+        Repository.reset_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "hotel.db")
+        self.patches = [
+            patch.object(conf, "STORAGE_BACKEND", "sqlite"),
+            patch.object(conf, "SQLITE_PATH", self.db_path),
+        ]
+        for p in self.patches:
+            p.start()
+        self.backend = get_backend()
+
+    def tearDown(self):
+        self.backend.close()
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+        Repository.reset_all()
+
+    def rows(self, query):
+        """Runs a query on a separate connection to the database."""
+        connection = sqlite3.connect(self.db_path)
+        try:
+            return connection.execute(query).fetchall()
+        finally:
+            connection.close()
+
+    def test_get_backend_uses_config(self):
+        """Test that the configured backend is selected."""
+        self.assertIsInstance(self.backend, SqliteBackend)
+
+    def test_mutations_are_stored_in_table(self):
+        """Test that create, update and delete change the table rows."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        Hotel.create_hotel(2, "City Inn", "Los Angeles")
+        Hotel(1, "Grand Hotel", "New York").update(name="Renamed")
+        Hotel.delete_hotel(2)
+
+        self.assertEqual(
+            self.rows("SELECT hotel_id, name, location FROM hotels"),
+            [(1, "Renamed", "New York")],
+        )
+
+    def test_load_restores_records(self):
+        """Test that a fresh repository reads the stored rows back."""
+        Reservation.create_reservation(10, 1, 2)
+        Reservation.create_reservation(11, 3, 4)
+        Repository.reset_all()
+
+        reservation = Reservation.find_by_id(11)
+        self.assertEqual(reservation.to_dict(), {
+            "reservation_id": 11, "customer_id": 3, "hotel_id": 4,
+            "check_in": "", "check_out": "",
+        })
+        self.assertEqual(
+            [r.reservation_id for r in Reservation.repository().all()],
+            [10, 11],
+        )
+
+    def test_creates_indexes(self):
+        """Test that the reservation lookup columns are indexed."""
+        self.backend.load(Reservation)
+        indexes = {
+            row[0] for row in self.rows(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = 'reservations'"
+            )
+        }
+        self.assertIn("idx_reservations_customer_id", indexes)
+        self.assertIn("idx_reservations_hotel_id", indexes)
+
+    def test_reloads_after_external_write(self):
+        """Test that a commit by another connection invalidates the cache."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        self.assertIsNotNone(Hotel.find_by_id(1))
+
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("DELETE FROM hotels")
+        connection.commit()
+        connection.close()
+
+        self.assertIsNone(Hotel.find_by_id(1))
+
+    def test_replace_all(self):
+        """Test that replace_all swaps the table contents."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        self.backend.replace_all(Hotel, [Hotel(5, "Sea View", "Miami")])
+        self.assertEqual(
+            self.rows("SELECT hotel_id, name, location FROM hotels"),
+            [(5, "Sea View", "Miami")],
+        )
+
+    def test_failed_commit_rolls_back(self):
+        """Test that any error during a commit rolls the transaction back."""
+        Hotel.create_hotel(1, "Grand Hotel", "New York")
+        for records in (
+            [Hotel(2, "Big", "Paris", rooms=2 ** 63)],
+            [Hotel(2, "Sea View", "Miami"), Hotel(3, "Bad", "Rome", 2 ** 63)],
+        ):
+            with self.subTest(records=len(records)):
+                with self.assertRaises(OverflowError):
+                    self.backend.replace_all(Hotel, records)
+                with self.assertRaises(OverflowError):
+                    self.backend.commit(
+                        Hotel, {}, [("put", record) for record in records]
+                    )
+                self.assertFalse(self.backend.connection().in_transaction)
+        Hotel.create_hotel(4, "City Inn", "Los Angeles")
+        self.assertEqual(
+            self.rows("SELECT hotel_id FROM hotels"), [(1,), (4,)]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
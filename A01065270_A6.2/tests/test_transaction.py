@@ -0,0 +1,166 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import app.config as conf
+from app.base_classes.customer import Customer
+from app.base_classes.hotel import Hotel
+from app.base_classes.reservation import Reservation
+from app.repository import Repository
+from app.storage import get_backend
+from app.transaction import Transaction
+
+
+class TransactionTestCase(unittest.TestCase):
+    """Sets up small collections in temporary data files."""
+
+    BACKEND = "json"
+
+    def setUp(self):
+        """Point the model classes at temporary data files."""
+        Repository.reset_all()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.patches = [
+            patch.object(conf, "STORAGE_BACKEND", self.BACKEND),
+            patch.object(conf, "SQLITE_PATH", self.data_path("hotel.db")),
+        ] + [
+            patch.object(model, "FILE_PATH", self.data_path(name))
+            for model, name in (
+                (Hotel, "Hotels.json"),
+                (Customer, "Customers.json"),
+                (Reservation, "Reservations.json"),
+            )
+        ]
+        for p in self.patches:
+            p.start()
+
+        Customer.create_customer(1, "Alice Johnson", "alice@example.com")
+        Hotel.create_hotel(10, "Grand Hotel", "New York")
+        Hotel.create_hotel(11, "City Inn", "Los Angeles")
+        Reservation.create_reservation(100, 1, 10)
+        Reservation.create_reservation(101, 1, 11)
+
+    def tearDown(self):
+        get_backend("sqlite").close()
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+        Repository.reset_all()
+
+    def data_path(self, name):
+        """Returns the path of a file in the temporary data directory."""
+        return os.path.join(self.tmp_dir.name, name)
+
+    def stored_ids(self, model):
+        """Returns the IDs stored for a model, bypassing the cache."""
+        Repository.reset_all()
+        return sorted(
+            getattr(r, model.PRIMARY_KEY) for r in model.repository().all()
+        )
+
+
+class TestTransaction(TransactionTestCase):
+    """Tests for transactions spanning several collections."""
+
+    def test_commit_writes_all_collections(self):
+        """Test that staged changes are committed together."""
+        self.assertTrue(Hotel.delete_hotel_with_reservations(10))
+        self.assertEqual(self.stored_ids(Hotel), [11])
+        self.assertEqual(self.stored_ids(Reservation), [101])
+        self.assertFalse(Hotel.delete_hotel_with_reservations(99))
+
+    def test_exception_rolls_back(self):
+        """Test that an exception discards every staged change."""
+        with self.assertRaises(RuntimeError):
+            with Transaction(Hotel, Reservation) as tx:
+                tx.remove(Hotel, 10)
+                tx.update(Reservation, 100, hotel_id=11)
+                raise RuntimeError("abort")
+
+        self.assertEqual(Reservation.find_by_id(100).hotel_id, 10)
+        self.assertEqual(self.stored_ids(Hotel), [10, 11])
+        self.assertEqual(Reservation.find_by_id(100).hotel_id, 10)
+
+    def test_failed_prepare_leaves_files_untouched(self):
+        """Test that a write failure before the commit point changes nothing."""
+        backend = get_backend()
+        original = backend.prepare
+
+        def failing_prepare(model, records, changes, suffix):
+            if model is Reservation:
+                raise OSError("Disk full")
+            return original(model, records, changes, suffix)
+
+        with patch.object(backend, "prepare", side_effect=failing_prepare):
+            with self.assertRaises(OSError):
+                Customer.delete_customer_with_reservations(1)
+
+        self.assertEqual(self.stored_ids(Customer), [1])
+        self.assertEqual(self.stored_ids(Reservation), [100, 101])
+        self.assertFalse(
+            [f for f in os.listdir(self.tmp_dir.name) if f.endswith(".tmp")]
+        )
+
+    def test_book_checks_references(self):
+        """Test that book() only creates reservations of known entities."""
+        self.assertFalse(Reservation.book(200, 2, 10))
+        self.assertFalse(Reservation.book(200, 1, 12))
+        self.assertFalse(Reservation.book(100, 1, 10))
+        self.assertIsInstance(Reservation.book(200, 1, 11), Reservation)
+        self.assertEqual(self.stored_ids(Reservation), [100, 101, 200])
+
+    def test_requires_declared_models(self):
+        """Test that only the declared collections can be used."""
+        with Transaction(Hotel) as tx:
+            with self.assertRaises(ValueError):
+                tx.get(Customer, 1)
+        with self.assertRaises(RuntimeError):
+            tx.get(Hotel, 10)
+
+
+class TestTransactionRecovery(TransactionTestCase):
+    """Tests for finishing an interrupted transaction commit."""
+
+    def test_recover_finishes_renames(self):
+        """Test that a logged commit is rolled forward on the next load."""
+        path = Hotel.FILE_PATH
+        tmp_path = path + ".1-x.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([{"hotel_id": 12, "name": "New", "location": "Rome"}], f)
+        log_path = self.data_path("transaction-1-x.txn")
+        with open(log_path, "w", encoding="utf-8") as f:
+            json.dump([[os.path.abspath(tmp_path), os.path.abspath(path)]], f)
+
+        self.assertEqual(self.stored_ids(Hotel), [12])
+        self.assertFalse(os.path.exists(log_path))
+
+
+class TestJournalTransaction(TestTransaction):
+    """Runs the transaction tests on the journal backend."""
+
+    BACKEND = "journal"
+
+
+class TestSqliteTransaction(TestTransaction):
+    """Runs the transaction tests on the SQLite backend."""
+
+    BACKEND = "sqlite"
+
+    def test_failed_prepare_leaves_files_untouched(self):
+        """Test that a failing statement rolls back every table."""
+        backend = get_backend()
+        with patch.object(
+            backend, "_apply", side_effect=[None, sqlite3.Error]
+        ):
+            with self.assertRaises(sqlite3.Error):
+                Customer.delete_customer_with_reservations(1)
+
+        self.assertEqual(self.stored_ids(Customer), [1])
+        self.assertEqual(self.stored_ids(Reservation), [100, 101])
+
+
+if __name__ == "__main__":
+    unittest.main()